@@ -1,54 +1,163 @@
 # core/backtester.py
 
+import numpy as np
 import pandas as pd
 
+try:
+    import numba
+except ImportError:  # numba is optional; the pure-Python kernel gives identical results
+    numba = None
 
-def run_backtest(df, signals, initial_capital=10000, position_size_pct=10):
+
+def _step(price, signal, cash, position, entry_cost, high_water, held_bars, position_size,
+          stop_loss_pct, take_profit_pct, trailing_stop_pct, max_holding_bars,
+          commission_pct, slippage_pct):
+    """
+    Apply one bar to the portfolio state; returns the new
+    (cash, position, entry_cost, high_water, held_bars). Disabled exits are passed as 0.
+
+    Exits are checked on the bar's close before the signal. A bar that exits
+    a position does not open a new one. Buys fill at close * (1 + slippage) and
+    sells at close * (1 - slippage). Commission is a percentage of the traded notional.
+
+    This is the single implementation of the trading rules: _execute loops it
+    over a whole history (under numba.njit or as plain Python) and
+    replay.PortfolioState applies it one streamed bar at a time.
+    """
+    exited = False
+
+    if position > 0:
+        held_bars += 1
+        if price > high_water:
+            high_water = price
+        avg_entry = entry_cost / position
+        if stop_loss_pct > 0 and price <= avg_entry * (1 - stop_loss_pct / 100):
+            exited = True
+        elif take_profit_pct > 0 and price >= avg_entry * (1 + take_profit_pct / 100):
+            exited = True
+        elif trailing_stop_pct > 0 and price <= high_water * (1 - trailing_stop_pct / 100):
+            exited = True
+        elif max_holding_bars > 0 and held_bars >= max_holding_bars:
+            exited = True
+
+    # Sell (stop/exit rule or signal)
+    if position > 0 and (exited or signal == -1):
+        fill = price * (1 - slippage_pct / 100)
+        proceeds = position * fill
+        cash += proceeds - proceeds * (commission_pct / 100)
+        position = 0.0
+        entry_cost = 0.0
+        held_bars = 0
+
+    # Buy
+    elif not exited and signal == 1:
+        fill = price * (1 + slippage_pct / 100)
+        if cash >= fill:
+            shares = position_size // fill
+            cost = shares * fill
+            cash -= cost + cost * (commission_pct / 100)
+            if position == 0 and shares > 0:
+                high_water = price
+                held_bars = 0
+            position += shares
+            entry_cost += cost
+
+    return cash, position, entry_cost, high_water, held_bars
+
+
+def _make_execute(step):
+    """The bar-by-bar kernel over a history, built on `step` (plain or jitted _step)."""
+
+    def _execute(close, signals, initial_capital, position_size_pct,
+                 stop_loss_pct, take_profit_pct, trailing_stop_pct, max_holding_bars,
+                 commission_pct, slippage_pct, cash_out, position_out, total_out):
+        # Written against plain indexing only, so the same code runs under
+        # numba.njit or as ordinary Python over lists
+        position_size = initial_capital * (position_size_pct / 100)
+        cash = initial_capital
+        position = 0.0
+        entry_cost = 0.0    # total fill cost of the open position, for average entry price
+        high_water = 0.0    # highest close since entry, for the trailing stop
+        held_bars = 0
+
+        for i in range(len(close)):
+            price = close[i]
+            cash, position, entry_cost, high_water, held_bars = step(
+                price, signals[i], cash, position, entry_cost, high_water, held_bars, position_size,
+                stop_loss_pct, take_profit_pct, trailing_stop_pct, max_holding_bars,
+                commission_pct, slippage_pct
+            )
+            cash_out[i] = cash
+            position_out[i] = position
+            total_out[i] = cash + (position * price)
+
+    return _execute
+
+
+_execute = _make_execute(_step)
+_execute_jit = numba.njit(cache=True)(_make_execute(numba.njit(cache=True)(_step))) if numba is not None else None
+
+
+def _run_kernel(close, signals, args, jit):
+    n = len(close)
+    if jit and _execute_jit is not None:
+        cash = np.empty(n)
+        position = np.empty(n)
+        total = np.empty(n)
+        _execute_jit(close, signals, *args, cash, position, total)
+        return cash, position, total
+
+    # Python floats over lists are much faster to index than NumPy scalars
+    cash = [0.0] * n
+    position = [0.0] * n
+    total = [0.0] * n
+    _execute(close.tolist(), signals.tolist(), *args, cash, position, total)
+    return np.array(cash), np.array(position), np.array(total)
+
+
+def run_backtest(df, signals, initial_capital=10000, position_size_pct=10,
+                 stop_loss_pct=None, take_profit_pct=None, trailing_stop_pct=None,
+                 max_holding_bars=None, commission_pct=0.0, slippage_pct=0.0, jit=None):
     """
     Run a basic backtest using provided signals and user config.
-    
+
     Arguments:
         df: DataFrame with 'Close' price
         signals: Series with 1 (buy), -1 (sell), 0 (hold)
         initial_capital: starting capital
         position_size_pct: percentage of capital to use per trade
+        stop_loss_pct: exit when close falls this % below the average entry price
+        take_profit_pct: exit when close rises this % above the average entry price
+        trailing_stop_pct: exit when close falls this % below its high since entry
+        max_holding_bars: exit after holding a position for this many bars
+        commission_pct: commission as a % of traded notional
+        slippage_pct: fills are this % worse than the close
+        jit: use the numba kernel (None = when numba is installed)
 
     Returns:
         portfolio: DataFrame with equity curve and positions
     """
-    df = df.copy()
     signals = signals.reindex(df.index).fillna(0)
 
-    capital = initial_capital
-    position_size = capital * (position_size_pct / 100)
-    cash = capital
-    position = 0
-    portfolio = []
-
-    for i in range(len(df)):
-        price = float(df['Close'].iloc[i])
-        signal = signals.iloc[i]
-
-        # Buy
-        if signal == 1 and cash >= price:
-            shares = position_size // price
-            cost = shares * price
-            cash -= cost
-            position += shares
+    close = np.ascontiguousarray(df['Close'].to_numpy(dtype=np.float64))
+    sig = np.ascontiguousarray(signals.to_numpy(dtype=np.float64).astype(np.int64))
+    args = (
+        float(initial_capital),
+        float(position_size_pct),
+        float(stop_loss_pct or 0.0),
+        float(take_profit_pct or 0.0),
+        float(trailing_stop_pct or 0.0),
+        int(max_holding_bars or 0),
+        float(commission_pct or 0.0),
+        float(slippage_pct or 0.0),
+    )
+    cash, position, total = _run_kernel(close, sig, args, jit is not False)
 
-        # Sell
-        elif signal == -1 and position > 0:
-            cash += position * price
-            position = 0
-
-        value = cash + (position * price)
-        portfolio.append({
-            'date': df.index[i],
-            'price': price,
-            'cash': cash,
-            'position': position,
-            'total': value
-        })
-
-    portfolio_df = pd.DataFrame(portfolio).set_index('date')
+    portfolio_df = pd.DataFrame({
+        'price': close,
+        'cash': cash,
+        'position': position,
+        'total': total
+    }, index=df.index)
+    portfolio_df.index.name = 'date'
     return portfolio_df
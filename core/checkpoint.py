@@ -0,0 +1,147 @@
+# core/checkpoint.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+JOURNAL_VERSION = 1
+
+
+def job_key(ticker, strat_cfg, user_cfg=None):
+    """
+    Stable key for one (ticker, parameters) job. The run settings that change its
+    result (dates, capital, exits, costs, timeframe) are part of the key, so one
+    journal can be reused across differently configured sweeps without mixing them.
+    """
+    settings = {k: v for k, v in (user_cfg or {}).items() if k != "tickers"}
+    payload = json.dumps([ticker, strat_cfg, settings], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _json_default(value):
+    # numpy scalars (metrics, bootstrap summaries) become plain numbers
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class RunJournal:
+    """
+    Append-only checkpoint of completed jobs for sweeps and batch runs.
+
+        with RunJournal("sweep.journal") as journal:
+            jobs = [j for j in jobs if job_key(...) not in journal]
+            ...
+            journal.record(key, metrics, ticker=ticker, params=params)
+
+    The file is JSON Lines: a header line, then one {"key", "result", ...} line
+    per finished job. Records are buffered and written in batches (every
+    flush_every records or flush_interval seconds, and on close), each batch as
+    a single write followed by fsync, so appending stays cheap at high job rates
+    and a crash loses at most the last unflushed batch. A line cut short by a
+    crash mid-write is ignored when the journal is reopened.
+    """
+
+    def __init__(self, path, flush_every=100, flush_interval=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._results = self._load()
+        self.resumed = len(self._results)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        torn = not new_file and not self._ends_with_newline()
+        self._file = open(path, "a", encoding="utf-8")
+        if new_file:
+            self._file.write(json.dumps({"journal": JOURNAL_VERSION, "created": time.time()}) + "\n")
+        elif torn:
+            # Terminate a half-written last line so the next batch starts cleanly
+            self._file.write("\n")
+        self._file.flush()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self):
+        results = {}
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return results
+        with f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    print(f"Ignoring incomplete journal line {number} in {self.path}")
+                    continue
+                if "journal" in entry:
+                    if entry["journal"] != JOURNAL_VERSION:
+                        print(f"Ignoring {self.path}: journal version {entry['journal']} is not supported")
+                        return {}
+                    continue
+                if "key" in entry:
+                    results[entry["key"]] = entry.get("result")
+        return results
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._results
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._results.get(key, default)
+
+    def completed(self):
+        """{key: result} for every job recorded so far (including this session's)."""
+        with self._lock:
+            return dict(self._results)
+
+    def record(self, key, result, **info):
+        """Mark a job done. Extra keyword fields (ticker, params, ...) are stored for reference."""
+        entry = {"key": key, "result": result}
+        entry.update(info)
+        line = json.dumps(entry, default=_json_default) + "\n"
+        with self._lock:
+            self._results[key] = result
+            self._pending.append(line)
+            due = (len(self._pending) >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending or self._file.closed:
+            return
+        self._file.write("".join(self._pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = []
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
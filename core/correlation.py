@@ -0,0 +1,173 @@
+# core/correlation.py
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BLOCK_SIZE = 256  # assets per block: a 256-column slab of 5000 bars is ~10MB
+
+
+def returns_frame(series, price_column="Close"):
+    """
+    Aligned simple returns, one column per name.
+
+    `series` maps name -> equity curve (Series) or OHLCV frame (price_column is
+    used). Returns are taken on each series' own bars before aligning, so a gap
+    in one asset never turns into a fake multi-day return; after the outer join
+    a bar an asset did not trade is NaN and handled pairwise downstream.
+    """
+    columns = {}
+    for name, values in series.items():
+        if isinstance(values, pd.DataFrame):
+            if values.empty or price_column not in values.columns:
+                continue
+            values = values[price_column]
+        values = values.dropna()
+        if len(values) < 2:
+            continue
+        columns[name] = values.astype(np.float64).pct_change().iloc[1:]
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat(columns, axis=1, join="outer", sort=True)
+
+
+def _prepare(values):
+    """(centred values with NaN as 0, presence mask as float) for the matrix products."""
+    values = np.asarray(values, dtype=np.float64)
+    mask = np.isfinite(values)
+    # Moments are shift invariant; removing each column's mean first keeps the
+    # raw sums small and avoids cancellation in sum(xy) - sum(x)sum(y)/n
+    x = np.where(mask, values, 0.0)
+    centre = x.sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+    x = np.where(mask, x - centre, 0.0)
+    return x, mask.astype(np.float64)
+
+
+def _moments(xa, ma, xb, mb):
+    """Pairwise sums over rows where both columns are present, via six matrix products."""
+    n = ma.T @ mb
+    sa = xa.T @ mb
+    sb = ma.T @ xb
+    sab = xa.T @ xb
+    saa = (xa * xa).T @ mb
+    sbb = ma.T @ (xb * xb)
+    return n, sa, sb, sab, saa, sbb
+
+
+def _finish(n, sa, sb, sab, saa, sbb, min_periods):
+    """Sample covariance and correlation from pairwise sums (NaN below min_periods)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov_num = sab - sa * sb / n
+        var_a = saa - sa * sa / n
+        var_b = sbb - sb * sb / n
+        cov = cov_num / (n - 1)
+        corr = cov_num / np.sqrt(var_a * var_b)
+    valid = n >= max(min_periods, 2)
+    cov[~valid] = np.nan
+    corr[~valid] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    return cov, corr
+
+
+def pairwise_cov_corr(returns, min_periods=2, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Covariance and correlation of every pair of columns, each pair using only the
+    bars where both are present (like DataFrame.cov/corr, without the per-pair
+    Python loop).
+
+    The columns are processed in block_size x block_size tiles so each step is a
+    few BLAS matrix products over slabs that fit in cache, and only the two
+    N x N results (plus one tile of temporaries) are ever held in memory.
+    Returns (cov, corr) as DataFrames if given a DataFrame, else arrays.
+    """
+    names = returns.columns if isinstance(returns, pd.DataFrame) else None
+    x, m = _prepare(returns)
+    n_assets = x.shape[1]
+    cov = np.empty((n_assets, n_assets))
+    corr = np.empty((n_assets, n_assets))
+    for i in range(0, n_assets, block_size):
+        bi = slice(i, i + block_size)
+        for j in range(i, n_assets, block_size):
+            bj = slice(j, j + block_size)
+            tile_cov, tile_corr = _finish(*_moments(x[:, bi], m[:, bi], x[:, bj], m[:, bj]), min_periods)
+            cov[bi, bj] = tile_cov
+            corr[bi, bj] = tile_corr
+            if i != j:
+                cov[bj, bi] = tile_cov.T
+                corr[bj, bi] = tile_corr.T
+    if names is not None:
+        return pd.DataFrame(cov, index=names, columns=names), pd.DataFrame(corr, index=names, columns=names)
+    return cov, corr
+
+
+class RollingCovariance:
+    """
+    Pairwise covariance/correlation over a trailing window, updated incrementally.
+
+        rolling = RollingCovariance(returns, window=252)
+        for timestamp, cov, corr in rolling.iter(step=21):
+            ...
+
+    The six pairwise sums behind pairwise_cov_corr are kept for the current
+    window. Moving forward by `step` bars adds the entering rows and subtracts
+    the leaving ones with two rank-`step` matrix products, instead of
+    recomputing the window from scratch, so each update costs O(N^2 * step)
+    rather than O(N^2 * window). Matrices are produced one at a time, so memory
+    stays at a few N x N arrays however long the history is.
+    """
+
+    def __init__(self, returns, window, min_periods=None):
+        if window < 2:
+            raise ValueError("window must be at least 2 bars")
+        self.names = returns.columns if isinstance(returns, pd.DataFrame) else None
+        self.index = returns.index if isinstance(returns, pd.DataFrame) else None
+        self.window = window
+        self.min_periods = window // 2 if min_periods is None else min_periods
+        self._x, self._m = _prepare(returns)
+        self._sums = None
+        self._start = 0
+        self._end = 0  # current window is rows [_start, _end)
+
+    def _add(self, rows, sign):
+        x, m = self._x[rows], self._m[rows]
+        sums = _moments(x, m, x, m)
+        if self._sums is None:
+            self._sums = [s.copy() for s in sums]
+        else:
+            for total, part in zip(self._sums, sums):
+                if sign > 0:
+                    total += part
+                else:
+                    total -= part
+
+    def advance_to(self, end):
+        """Move the window so it covers the `window` rows ending at row `end` (exclusive)."""
+        start = max(0, end - self.window)
+        if self._sums is None or start >= self._end or end < self._end:
+            # First call, a jump past the whole window, or moving backwards: rebuild
+            self._sums = None
+            self._add(slice(start, end), 1)
+        else:
+            if start > self._start:
+                self._add(slice(self._start, start), -1)
+            if end > self._end:
+                self._add(slice(self._end, end), 1)
+        self._start, self._end = start, end
+
+    def current(self):
+        """(cov, corr) for the current window."""
+        cov, corr = _finish(*self._sums, self.min_periods)
+        if self.names is not None:
+            return (
+                pd.DataFrame(cov, index=self.names, columns=self.names),
+                pd.DataFrame(corr, index=self.names, columns=self.names),
+            )
+        return cov, corr
+
+    def iter(self, step=1, start=None):
+        """Yield (label, cov, corr) every `step` bars, from the first full window on."""
+        first = self.window if start is None else max(start, 1)
+        for end in range(first, len(self._x) + 1, step):
+            self.advance_to(end)
+            label = self.index[end - 1] if self.index is not None else end - 1
+            cov, corr = self.current()
+            yield label, cov, corr
@@ -0,0 +1,300 @@
+# core/distributed.py
+
+import argparse
+import collections
+import itertools
+import os
+import secrets
+import socket
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+
+from core.pipeline import run_ticker, compute_metrics
+
+AUTHKEY_ENV = "CANAL_AUTHKEY"
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return (host or "localhost", int(port))
+
+
+def resolve_authkey(text=None):
+    """The shared secret from text or $CANAL_AUTHKEY as bytes, or None if neither is set."""
+    text = text or os.environ.get(AUTHKEY_ENV)
+    return text.encode() if text else None
+
+
+def generate_authkey():
+    return secrets.token_hex(16)
+
+
+def is_loopback(host):
+    try:
+        return all(info[4][0].startswith("127.") or info[4][0] == "::1"
+                   for info in socket.getaddrinfo(host, None))
+    except OSError:
+        return False
+
+
+def build_jobs(tickers, strat_cfg, param_grid, user_cfg):
+    """
+    Build one job per (ticker, parameter set).
+
+    Arguments:
+        param_grid: dict of parameter name -> list of values; the cartesian product is swept
+    """
+    names = list(param_grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(param_grid[n] for n in names))] or [{}]
+    jobs = []
+    for ticker in tickers:
+        for params in combos:
+            cfg = dict(strat_cfg)
+            cfg.update(params)
+            jobs.append({
+                "job_id": len(jobs),
+                "ticker": ticker,
+                "strat_cfg": cfg,
+                "user_cfg": user_cfg,
+            })
+    return jobs
+
+
+def run_job(job, load_fn):
+    """Execute one job on a worker and return its metrics."""
+    user_cfg = job["user_cfg"]
+    df = load_fn(job["ticker"], user_cfg["start_date"], user_cfg["end_date"])
+    if df.empty:
+        raise ValueError(f"No data for {job['ticker']}")
+    portfolio = run_ticker(df, job["strat_cfg"], user_cfg)
+    if portfolio is None:
+        raise ValueError(f"Unknown strategy {job['strat_cfg'].get('strategy')}")
+    return {k: float(v) for k, v in compute_metrics(portfolio).items()}
+
+
+class Coordinator:
+    """
+    Serves jobs to worker processes over a socket work queue.
+
+    Workers pull jobs one at a time and send heartbeats while they run. A job is
+    put back on the queue when its worker reports an error, disconnects, or
+    misses heartbeats for heartbeat_timeout seconds; after max_attempts failures
+    it is reported as failed. Results are streamed to on_result as they arrive.
+    """
+
+    def __init__(self, jobs, address=("localhost", 0), authkey=None,
+                 heartbeat_timeout=30.0, max_attempts=3, on_result=None):
+        # Messages are pickled, so anyone holding the key can run code here; there is no default
+        if not authkey:
+            raise ValueError("Coordinator needs an authkey")
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self.pending = collections.deque(jobs)
+        self.total = len(jobs)
+        self.in_flight = {}        # job_id -> (job, worker_name)
+        self.attempts = collections.Counter()
+        self.results = {}
+        self.failed = {}
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.on_result = on_result
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._closed = False
+
+    def done(self):
+        return len(self.results) + len(self.failed) >= self.total
+
+    def serve(self, timeout=None):
+        """Accept workers until every job has a result (or failed). Returns the results dict."""
+        acceptor = threading.Thread(target=self._accept_loop, daemon=True)
+        acceptor.start()
+        if self.total == 0:
+            self._done.set()
+        self._done.wait(timeout)
+        self.close()
+        return self.results
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # Unblock accept() with a throwaway connection, then close the socket
+            with socket.create_connection(self.address, timeout=1):
+                pass
+        except OSError:
+            pass
+        self.listener.close()
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except Exception:
+                if self._closed:
+                    return
+                continue
+            if self._closed:
+                conn.close()
+                return
+            threading.Thread(target=self._handle_worker, args=(conn,), daemon=True).start()
+
+    def _next_job(self, worker):
+        with self._lock:
+            if not self.pending:
+                return None
+            job = self.pending.popleft()
+            self.in_flight[job["job_id"]] = (job, worker)
+            return job
+
+    def _requeue(self, job_id, error):
+        with self._lock:
+            entry = self.in_flight.pop(job_id, None)
+            if entry is None:
+                return
+            job, worker = entry
+            self.attempts[job_id] += 1
+            if self.attempts[job_id] >= self.max_attempts:
+                self.failed[job_id] = {"job": job, "error": error}
+                print(f"Job {job_id} ({job['ticker']}) failed after {self.attempts[job_id]} attempts: {error}")
+            else:
+                self.pending.append(job)
+            if self.done():
+                self._done.set()
+
+    def _complete(self, job_id, metrics):
+        with self._lock:
+            entry = self.in_flight.pop(job_id, None)
+            if entry is None or job_id in self.results:
+                return
+            job, _ = entry
+            self.results[job_id] = {"job": job, "metrics": metrics}
+            if self.done():
+                self._done.set()
+        if self.on_result:
+            self.on_result(job, metrics)
+
+    def _handle_worker(self, conn):
+        worker = "?"
+        current = None
+        try:
+            while not self._done.is_set():
+                if not conn.poll(self.heartbeat_timeout):
+                    raise TimeoutError("missed heartbeats")
+                msg = conn.recv()
+                kind = msg.get("type")
+                if kind == "hello":
+                    worker = msg.get("worker", worker)
+                elif kind == "heartbeat":
+                    continue
+                elif kind == "result":
+                    self._complete(msg["job_id"], msg["metrics"])
+                    current = None
+                elif kind == "error":
+                    self._requeue(msg["job_id"], msg["error"])
+                    current = None
+
+                if kind in ("hello", "ready", "result", "error"):
+                    job = self._next_job(worker)
+                    if job is not None:
+                        current = job["job_id"]
+                        conn.send({"type": "job", "job": job})
+                    elif self.done():
+                        break
+                    else:
+                        # Other workers still hold jobs that may be re-queued
+                        conn.send({"type": "wait", "seconds": 0.5})
+            conn.send({"type": "shutdown"})
+        except (EOFError, OSError, TimeoutError) as e:
+            if current is not None:
+                self._requeue(current, f"worker {worker} lost: {e}")
+        finally:
+            conn.close()
+
+
+def run_worker(address, authkey, load_fn=None, heartbeat_interval=5.0, name=None):
+    """
+    Connect to a coordinator and process jobs until it says to shut down.
+    A background thread sends heartbeats while a job is running.
+    """
+    if not authkey:
+        raise ValueError("Worker needs an authkey")
+    if load_fn is None:
+        from data.data_service import DataService
+        load_fn = DataService.load_data
+
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    conn = Client(address, authkey=authkey)
+    send_lock = threading.Lock()
+    running = threading.Event()
+    stop = threading.Event()
+
+    def send(msg):
+        with send_lock:
+            conn.send(msg)
+
+    def heartbeat():
+        while not stop.wait(heartbeat_interval):
+            if running.is_set():
+                try:
+                    send({"type": "heartbeat"})
+                except OSError:
+                    return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    completed = 0
+    try:
+        send({"type": "hello", "worker": name})
+        while True:
+            msg = conn.recv()
+            kind = msg.get("type")
+            if kind == "shutdown":
+                break
+            if kind == "wait":
+                time.sleep(msg.get("seconds", 0.5))
+                send({"type": "ready"})
+                continue
+            job = msg["job"]
+            running.set()
+            try:
+                metrics = run_job(job, load_fn)
+                reply = {"type": "result", "job_id": job["job_id"], "metrics": metrics}
+            except Exception as e:
+                reply = {"type": "error", "job_id": job["job_id"], "error": str(e)}
+            finally:
+                running.clear()
+            send(reply)
+            completed += 1
+    except (EOFError, OSError):
+        pass
+    finally:
+        stop.set()
+        conn.close()
+    return completed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Canalytics sweep worker")
+    parser.add_argument("command", choices=["worker"])
+    parser.add_argument("address", help="Coordinator HOST:PORT")
+    parser.add_argument("--authkey", default=None, help="Shared secret (required unless $CANAL_AUTHKEY is set)")
+    parser.add_argument("--csv", help="Load prices from a CSV file instead of yfinance")
+    parser.add_argument("--bundle", help="Load prices from a data bundle")
+    args = parser.parse_args(argv)
+    authkey = resolve_authkey(args.authkey)
+    if authkey is None:
+        parser.error(f"--authkey or ${AUTHKEY_ENV} is required")
+    if args.csv:
+        from data.data_service import DataService
+        DataService.set_data_source("CSV File", csv_path=args.csv)
+    if args.bundle:
+        from data.data_service import DataService
+        DataService.set_data_source("Bundle", bundle_path=args.bundle)
+    done = run_worker(parse_address(args.address), authkey=authkey)
+    print(f"Worker finished {done} jobs")
+
+
+if __name__ == "__main__":
+    main()
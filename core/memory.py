@@ -0,0 +1,363 @@
+# core/memory.py
+
+import collections
+import contextlib
+import gc
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import MutableMapping
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; /proc (Linux) or getrusage is used instead
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import numpy as np
+import pandas as pd
+
+MB = 2 ** 20
+
+
+def current_rss():
+    """Resident set size of this process in bytes (0 if it cannot be measured)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # Peak rather than current, but still bounds what the process has used
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return 0
+
+
+def object_bytes(obj):
+    """Shallow memory of the frames/arrays a pipeline stage produced (0 for anything else)."""
+    if obj is None:
+        return 0
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(object_bytes(v) for v in obj.values())
+    return 0
+
+
+class StageStats:
+    """Accumulated numbers for one named pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0          # frames produced (tracked), summed over calls
+        self.max_bytes = 0      # largest single call
+        self.peak_rise = 0      # largest RSS increase seen during one call
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "seconds": self.seconds,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "peak_rise": self.peak_rise,
+        }
+
+
+class _OpenStage:
+    def __init__(self, stats, rss):
+        self.stats = stats
+        self.start_rss = rss
+        self.peak_rss = rss
+        self.tracked = 0
+
+    def track(self, obj):
+        """Count obj (a frame, Series or array this stage produced) towards the stage."""
+        self.tracked += object_bytes(obj)
+        return obj
+
+
+class MemoryMonitor:
+    """
+    Per-run memory accounting with an optional budget.
+
+        monitor = MemoryMonitor(budget_bytes=2 * 2**30)
+        with monitor:
+            with monitor.stage("load") as stage:
+                df = stage.track(load(...))
+            size = monitor.batch_size(50)
+        print(monitor.format_report())
+
+    A background thread samples the process RSS every `interval` seconds (and at
+    every stage boundary) to find the run's peak and each stage's largest rise;
+    stages also add up the bytes of the frames they produce.
+
+    With a budget, the pipeline asks the monitor before each batch: above
+    soft_fraction of the budget it shrinks batches, lowers download
+    concurrency, runs the release hooks (e.g. dropping DataService's in-memory
+    frames) and tells callers to spill kept results to disk (SpillDict). When
+    pressure falls back, batch size and concurrency recover. Every action is
+    counted in the report.
+    """
+
+    def __init__(self, budget_bytes=None, soft_fraction=0.75, interval=0.02, spill_dir=None):
+        self.budget = budget_bytes or None
+        self.soft_fraction = soft_fraction
+        self.interval = interval
+        self.spill_dir = spill_dir
+        self.stages = collections.OrderedDict()
+        self.actions = collections.Counter()
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+        self.spilled_bytes = 0
+        self._open = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._release_hooks = []
+        self._batch = None
+        self._concurrency = None
+        self._started = time.perf_counter()
+        self._own_spill_dir = False
+        self._spill_ids = itertools.count()
+
+    # Sampling
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sample_loop, name="memory-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sample()
+        if self._own_spill_dir and self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        rss = current_rss()
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            for stage in self._open:
+                stage.peak_rss = max(stage.peak_rss, rss)
+        return rss
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time and measure one call of a named stage; yields an object with track(obj)."""
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(name)
+        rss = self.sample()
+        stage = _OpenStage(stats, rss)
+        with self._lock:
+            self._open.append(stage)
+        started = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sample()
+            with self._lock:
+                self._open.remove(stage)
+                stats.calls += 1
+                stats.seconds += elapsed
+                stats.bytes += stage.tracked
+                stats.max_bytes = max(stats.max_bytes, stage.tracked)
+                stats.peak_rise = max(stats.peak_rise, stage.peak_rss - stage.start_rss)
+
+    # Budget enforcement
+
+    def pressure(self):
+        """Current RSS as a fraction of the budget (0 without a budget)."""
+        if not self.budget:
+            return 0.0
+        return self.sample() / self.budget
+
+    def over_soft_limit(self):
+        return self.pressure() >= self.soft_fraction
+
+    def add_release_hook(self, fn):
+        """fn() is called to free memory (caches etc.) when the soft limit is reached."""
+        self._release_hooks.append(fn)
+
+    def relieve(self):
+        """Free what can be freed if over the soft limit. Call between batches."""
+        if not self.over_soft_limit():
+            return False
+        for fn in self._release_hooks:
+            fn()
+        gc.collect()
+        self.actions["released"] += 1
+        if self.pressure() >= 1.0:
+            self.actions["over_budget"] += 1
+            if self.actions["over_budget"] == 1:
+                print(f"Memory: {self.sample() / MB:.0f} MB is over the {self.budget / MB:.0f} MB budget")
+        return True
+
+    def batch_size(self, requested):
+        """Tickers to load in the next batch: halved under pressure, regrown as it eases."""
+        if not self.budget or not requested:
+            return requested
+        if self._batch is None:
+            self._batch = requested
+        pressure = self.pressure()
+        if pressure >= self.soft_fraction and self._batch > 1:
+            self._batch = max(1, self._batch // 2)
+            self.actions["batch_shrunk"] += 1
+        elif pressure < self.soft_fraction * 0.6 and self._batch < requested:
+            self._batch = min(requested, self._batch * 2)
+        return self._batch
+
+    def concurrency(self, requested):
+        """Parallel downloads to allow: halved under pressure, regrown as it eases."""
+        if not self.budget:
+            return requested
+        if self._concurrency is None:
+            self._concurrency = requested
+        pressure = self.pressure()
+        if pressure >= self.soft_fraction and self._concurrency > 1:
+            self._concurrency = max(1, self._concurrency // 2)
+            self.actions["concurrency_throttled"] += 1
+        elif pressure < self.soft_fraction * 0.6 and self._concurrency < requested:
+            self._concurrency = min(requested, self._concurrency * 2)
+        return self._concurrency
+
+    def spill_path(self, key):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="canalytics-spill-")
+            self._own_spill_dir = True
+        os.makedirs(self.spill_dir, exist_ok=True)
+        return os.path.join(self.spill_dir, f"{next(self._spill_ids)}.pkl")
+
+    # Reporting
+
+    def report(self):
+        return {
+            "budget_bytes": self.budget,
+            "start_rss": self.start_rss,
+            "peak_rss": self.peak_rss,
+            "end_rss": current_rss(),
+            "seconds": time.perf_counter() - self._started,
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+            "actions": dict(self.actions),
+            "spilled_bytes": self.spilled_bytes,
+        }
+
+    def summary(self):
+        """One line for a status bar."""
+        budget = f" of {self.budget / MB:.0f} MB budget" if self.budget else ""
+        actions = ", ".join(f"{name.replace('_', ' ')} x{count}" for name, count in self.actions.items())
+        return f"Peak memory {self.peak_rss / MB:.0f} MB{budget}" + (f" ({actions})" if actions else "")
+
+    def format_report(self):
+        lines = [
+            f"Memory: start {self.start_rss / MB:.0f} MB, peak {self.peak_rss / MB:.0f} MB, "
+            f"end {current_rss() / MB:.0f} MB" + (f", budget {self.budget / MB:.0f} MB" if self.budget else "")
+        ]
+        for name, stats in self.stages.items():
+            lines.append(
+                f"  {name:<10} {stats.calls:>6} calls {stats.seconds:>8.2f}s  "
+                f"frames {stats.bytes / MB:>9.1f} MB (max {stats.max_bytes / MB:.1f} MB)  "
+                f"peak rise {stats.peak_rise / MB:.1f} MB"
+            )
+        if self.actions:
+            lines.append("  actions: " + ", ".join(f"{k}={v}" for k, v in self.actions.items()))
+        if self.spilled_bytes:
+            lines.append(f"  spilled to disk: {self.spilled_bytes / MB:.1f} MB")
+        return "\n".join(lines)
+
+
+class SpillDict(MutableMapping):
+    """
+    Dict of results (e.g. equity curves) that moves values to disk under memory pressure.
+
+    While the monitor is over its soft limit, new values are pickled to the
+    monitor's spill directory instead of being kept; reading one loads it back
+    (without caching it). With max_in_memory, values beyond that many are
+    spilled regardless of pressure, so a large universe never holds more than a
+    fixed number in memory. Without a monitor it is a plain dict.
+    """
+
+    def __init__(self, monitor=None, max_in_memory=None):
+        self.monitor = monitor
+        self.max_in_memory = max_in_memory
+        self._keys = {}  # insertion order across both stores
+        self._memory = {}
+        self._spilled = {}  # key -> path
+
+    def __setitem__(self, key, value):
+        self._discard(key)
+        self._keys[key] = None
+        full = self.max_in_memory is not None and len(self._memory) >= self.max_in_memory
+        if self.monitor is not None and (full or self.monitor.over_soft_limit()):
+            path = self.monitor.spill_path(key)
+            with open(path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._spilled[key] = path
+            self.monitor.spilled_bytes += object_bytes(value)
+            self.monitor.actions["spilled"] += 1
+        else:
+            self._memory[key] = value
+
+    def __getitem__(self, key):
+        if key in self._memory:
+            return self._memory[key]
+        path = self._spilled[key]
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._discard(key)
+
+    def _discard(self, key):
+        self._keys.pop(key, None)
+        self._memory.pop(key, None)
+        path = self._spilled.pop(key, None)
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,196 @@
+# core/optimize.py
+
+import math
+
+import numpy as np
+
+from core import backtest as backtest_module
+from core import registry
+from core.pipeline import compute_metrics, execution_params
+
+# Search spaces for the built-in strategies: name -> (low, high) range or list of choices
+DEFAULT_SPACES = {
+    "SMA Crossover": {
+        "short_window": (2, 50),
+        "long_window": (10, 200),
+    },
+    "RSI": {
+        "rsi_period": (2, 50),
+        "threshold_low": (10.0, 45.0),
+        "threshold_high": (55.0, 90.0),
+    },
+}
+
+DEFAULT_CONSTRAINTS = {
+    "SMA Crossover": lambda p: p["short_window"] < p["long_window"],
+}
+
+
+def sample_params(space, rng, constraint=None, max_tries=100):
+    """Draw one parameter set uniformly from space, retrying until constraint holds."""
+    for _ in range(max_tries):
+        params = {}
+        for name, dim in space.items():
+            if isinstance(dim, list):
+                params[name] = dim[rng.integers(len(dim))]
+            elif isinstance(dim[0], int) and isinstance(dim[1], int):
+                params[name] = int(rng.integers(dim[0], dim[1] + 1))
+            else:
+                params[name] = float(rng.uniform(dim[0], dim[1]))
+        if constraint is None or constraint(params):
+            return params
+    raise ValueError("Could not sample parameters satisfying the constraint")
+
+
+def _to_unit(params, space):
+    """Map numeric parameters to [0, 1] so distances are comparable across dimensions."""
+    coords = []
+    for name, dim in space.items():
+        if isinstance(dim, list):
+            coords.append(dim.index(params[name]) / max(len(dim) - 1, 1))
+        else:
+            coords.append((params[name] - dim[0]) / ((dim[1] - dim[0]) or 1))
+    return np.array(coords)
+
+
+def propose_params(history, space, rng, n, constraint=None, gamma=0.25, n_draws=32, bandwidth=0.1):
+    """
+    Bayesian-style (TPE-like) proposals from evaluated (params, score) pairs.
+
+    The best gamma fraction of history forms the "good" set. Candidates are drawn
+    around good points and the one maximizing the good/bad kernel density ratio is kept.
+    Scores only need to be orderable: SuccessiveHalving passes (rung reached, score)
+    so candidates eliminated early still shape the "bad" density.
+    """
+    ranked = sorted(history, key=lambda h: h[1], reverse=True)
+    n_good = max(1, int(math.ceil(gamma * len(ranked))))
+    good = np.array([_to_unit(p, space) for p, _ in ranked[:n_good]])
+    bad = np.array([_to_unit(p, space) for p, _ in ranked[n_good:]]) if len(ranked) > n_good else None
+
+    def density(points, x):
+        d2 = ((x[:, None, :] - points[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-d2 / (2 * bandwidth ** 2)).mean(axis=1) + 1e-12
+
+    proposals = []
+    for _ in range(n):
+        draws = []
+        for _ in range(n_draws):
+            center = ranked[rng.integers(n_good)][0]
+            params = {}
+            for name, dim in space.items():
+                if isinstance(dim, list):
+                    params[name] = center[name] if rng.random() < 0.7 else dim[rng.integers(len(dim))]
+                    continue
+                value = center[name] + rng.normal(0, bandwidth * (dim[1] - dim[0]))
+                value = min(max(value, dim[0]), dim[1])
+                is_int = isinstance(dim[0], int) and isinstance(dim[1], int)
+                params[name] = int(round(value)) if is_int else float(value)
+            if constraint is None or constraint(params):
+                draws.append(params)
+        if not draws:
+            proposals.append(sample_params(space, rng, constraint))
+            continue
+        x = np.array([_to_unit(p, space) for p in draws])
+        score = density(good, x) / (density(bad, x) if bad is not None else 1.0)
+        proposals.append(draws[int(np.argmax(score))])
+    return proposals
+
+
+class SuccessiveHalving:
+    """
+    Adaptive parameter search: random (or proposed) candidates are backtested on
+    a growing prefix of the history and only the best 1/eta survive each rung.
+
+    Signals are generated once per candidate on the full history (all candidates
+    in one matrix pass for the built-in strategies); because the strategies are
+    causal, slicing them gives the same signals as recomputing on the prefix.
+    Each rung then only pays for a run_backtest on the prefix.
+    """
+
+    def __init__(self, df, strategy_name, user_cfg, space=None, constraint=None,
+                 objective="sharpe", eta=3, min_fraction=1 / 9, min_bars=30, seed=None):
+        self.df = df
+        self.spec = registry.get_strategy(strategy_name)
+        if self.spec is None:
+            raise ValueError(f"Unknown strategy '{strategy_name}'")
+        self.space = space or DEFAULT_SPACES.get(strategy_name)
+        if not self.space:
+            raise ValueError(f"No search space for '{strategy_name}'")
+        self.constraint = constraint if constraint is not None else DEFAULT_CONSTRAINTS.get(strategy_name)
+        self.user_cfg = user_cfg
+        self.objective = objective
+        self.eta = eta
+        self.min_fraction = min_fraction
+        self.min_bars = min_bars
+        self.rng = np.random.default_rng(seed)
+        self.history = []          # (params, score) evaluated on the full history
+        self.trials = []           # (params, (rung, score)) for every candidate, at the last rung it reached
+        self.backtests = 0
+        self.bars_evaluated = 0
+
+    def _fractions(self):
+        fractions = [1.0]
+        while fractions[-1] / self.eta >= self.min_fraction:
+            fractions.append(fractions[-1] / self.eta)
+        return fractions[::-1]
+
+    def _score(self, signals, n_bars):
+        df = self.df.iloc[:n_bars]
+        portfolio = backtest_module.run_backtest(
+            df,
+            signals.iloc[:n_bars],
+            initial_capital=self.user_cfg.get("initial_capital", 10000),
+            position_size_pct=self.user_cfg.get("position_size", 10),
+            **execution_params(self.user_cfg)
+        )
+        self.backtests += 1
+        self.bars_evaluated += n_bars
+        value = compute_metrics(portfolio)[self.objective]
+        if value is None or not np.isfinite(value):
+            return -np.inf
+        # Drawdown is negative, so larger is better for every objective
+        return float(value)
+
+    def run_bracket(self, candidates):
+        """Run one successive-halving bracket over candidates; return survivors with full-history scores."""
+        n = len(self.df)
+        pool = list(zip(candidates, self.spec.generate_many(self.df, candidates)))
+        scores = []
+        for rung, fraction in enumerate(self._fractions()):
+            n_bars = max(self.min_bars, int(n * fraction)) if fraction < 1 else n
+            scores = [self._score(signals, min(n_bars, n)) for _, signals in pool]
+            if fraction >= 1:
+                break
+            keep = max(1, len(pool) // self.eta)
+            order = np.argsort(scores)[::-1]
+            # Scores on different prefixes aren't comparable; the rung ranks them
+            self.trials.extend((pool[i][0], (rung, scores[i])) for i in order[keep:])
+            pool = [pool[i] for i in order[:keep]]
+        results = [(params, score) for (params, _), score in zip(pool, scores)]
+        self.trials.extend((params, (rung, score)) for params, score in results)
+        self.history.extend(results)
+        return results
+
+    def search(self, n_candidates=81, brackets=1, bayesian=False):
+        """
+        Run brackets of successive halving. The first bracket samples randomly;
+        with bayesian=True later brackets draw candidates from propose_params.
+
+        Returns:
+            list of (params, score) sorted best first
+        """
+        for _ in range(brackets):
+            if bayesian and self.trials:
+                candidates = propose_params(self.trials, self.space, self.rng, n_candidates, self.constraint)
+            else:
+                candidates = [sample_params(self.space, self.rng, self.constraint) for _ in range(n_candidates)]
+            self.run_bracket(candidates)
+        return sorted(self.history, key=lambda h: h[1], reverse=True)
+
+
+def optimize(df, strategy_name, user_cfg, n_candidates=81, brackets=1, bayesian=False, **kwargs):
+    """Convenience wrapper: run a successive-halving search and return (best_params, best_score, search)."""
+    search = SuccessiveHalving(df, strategy_name, user_cfg, **kwargs)
+    ranked = search.search(n_candidates, brackets, bayesian)
+    best_params, best_score = ranked[0]
+    return best_params, best_score, search
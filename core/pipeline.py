@@ -0,0 +1,199 @@
+# core/pipeline.py
+
+import contextlib
+import os
+
+from core import backtest as backtest_module
+from core import portfolio as portfolio_module
+from core import registry
+
+
+def strategy_params(strat_cfg):
+    """Strategy parameters from a strategy config (everything but the name)."""
+    return {k: v for k, v in strat_cfg.items() if k != "strategy"}
+
+
+# Optional user config keys forwarded to run_backtest as exit rules and trading costs
+EXECUTION_KEYS = (
+    "stop_loss_pct", "take_profit_pct", "trailing_stop_pct",
+    "max_holding_bars", "commission_pct", "slippage_pct"
+)
+
+
+def execution_params(user_cfg):
+    """Exit/cost settings from a user config, skipping unset ones."""
+    return {k: user_cfg[k] for k in EXECUTION_KEYS if user_cfg.get(k) is not None}
+
+
+def generate_signals(df, strat_cfg):
+    """
+    Dispatch to the configured strategy through the registry and return its
+    signal Series, or None if the strategy is unknown.
+    """
+    spec = registry.get_strategy(strat_cfg["strategy"])
+    if spec is None:
+        return None
+    return spec.generate(df, strategy_params(strat_cfg))
+
+
+def strategy_cache_name(name):
+    """
+    Name used in run cache keys. Plugin strategies include their file's mtime
+    so editing the module invalidates runs made with the old code.
+    """
+    spec = registry.get_strategy(name)
+    if spec is not None and spec.source and os.path.exists(spec.source):
+        return f"{name}@{os.path.getmtime(spec.source)}"
+    return name
+
+
+def compute_metrics(portfolio):
+    """
+    Headline metrics for one equity curve: total return, annualized Sharpe and max drawdown.
+    """
+    total = portfolio["total"]
+    returns = total.pct_change().dropna()
+    sharpe = (returns.mean() / returns.std()) * (252 ** 0.5) if not returns.empty else 0.0
+    peak = total.cummax()
+    drawdown = ((total - peak) / peak).min()
+    total_return = (total.iloc[-1] - total.iloc[0]) / total.iloc[0]
+    return {
+        "return": total_return,
+        "sharpe": sharpe,
+        "drawdown": drawdown
+    }
+
+
+def _stage(monitor, name):
+    return monitor.stage(name) if monitor is not None else contextlib.nullcontext(_Untracked)
+
+
+class _Untracked:
+    @staticmethod
+    def track(obj):
+        return obj
+
+
+def run_ticker(df, strat_cfg, user_cfg, cache=None, source_key=None, monitor=None):
+    """
+    Run one strategy/backtest for a single ticker's data.
+
+    Arguments:
+        df: price DataFrame with a 'Close' column
+        strat_cfg: strategy config from StrategyEngineDialog.get_config()
+        user_cfg: user config from UserInputDialog.get_config()
+        cache: optional RunCache; identical runs are served from it
+        source_key: identifies where df came from, so the cache can invalidate stale runs
+        monitor: optional core.memory.MemoryMonitor; signals and backtest are measured as stages
+
+    Returns:
+        portfolio DataFrame, or None if the strategy is unknown
+    """
+    def _run():
+        with _stage(monitor, "signals") as stage:
+            signals = stage.track(generate_signals(df, strat_cfg))
+        if signals is None:
+            return None
+        with _stage(monitor, "backtest") as stage:
+            return stage.track(backtest_module.run_backtest(
+                df,
+                signals,
+                initial_capital=user_cfg["initial_capital"],
+                position_size_pct=user_cfg["position_size"],
+                **execution_params(user_cfg)
+            ))
+
+    if cache is None:
+        return _run()
+    return cache.get_or_run(
+        df,
+        strategy_cache_name(strat_cfg["strategy"]),
+        strategy_params(strat_cfg),
+        user_cfg["initial_capital"],
+        user_cfg["position_size"],
+        _run,
+        source_key=source_key,
+        execution=execution_params(user_cfg)
+    )
+
+
+def run_portfolio(data, strat_cfg, user_cfg):
+    """
+    Run the strategy on every ticker and backtest them together on one shared cash pool.
+
+    Arguments:
+        data: dict of ticker -> price DataFrame
+
+    Returns:
+        result dict from core.portfolio.run_portfolio_backtest plus "metrics",
+        or None if the strategy is unknown
+    """
+    signals = {}
+    for ticker, df in data.items():
+        sig = generate_signals(df, strat_cfg)
+        if sig is None:
+            return None
+        signals[ticker] = sig
+
+    execution = execution_params(user_cfg)
+    result = portfolio_module.run_portfolio_backtest(
+        data,
+        signals,
+        initial_capital=user_cfg["initial_capital"],
+        sizing=user_cfg.get("sizing", "equal"),
+        position_size_pct=user_cfg["position_size"],
+        asset_weights=user_cfg.get("asset_weights"),
+        rebalance=user_cfg.get("rebalance", "signal"),
+        commission_pct=execution.get("commission_pct", 0.0),
+        slippage_pct=execution.get("slippage_pct", 0.0)
+    )
+    result["metrics"] = compute_metrics(result["portfolio"])
+    return result
+
+
+def iter_pipeline(user_cfg, strat_cfg, load_fn, cache=None, source_name="", batch_size=None,
+                  prefetch_fn=None, monitor=None):
+    """
+    Run the pipeline ticker by ticker, yielding (ticker, {"portfolio", "metrics"})
+    as each one finishes, so large universes never hold every frame at once.
+
+    Arguments:
+        batch_size: tickers per batch (None = one batch)
+        prefetch_fn: optional callable(tickers, start, end) called before each
+            batch, e.g. to download the batch concurrently into the data cache
+        monitor: optional core.memory.MemoryMonitor. Each stage is measured, and
+            with a budget the batch size shrinks (and caches are released) under pressure
+    """
+    tickers = list(user_cfg.get("tickers", []))
+    start = user_cfg["start_date"]
+    end = user_cfg["end_date"]
+    position = 0
+    while position < len(tickers):
+        size = batch_size or len(tickers)
+        if monitor is not None:
+            monitor.relieve()
+            size = monitor.batch_size(size)
+        batch = tickers[position:position + size]
+        position += len(batch)
+        if prefetch_fn is not None:
+            with _stage(monitor, "prefetch"):
+                prefetch_fn(batch, start, end)
+        for ticker in batch:
+            with _stage(monitor, "load") as stage:
+                df = stage.track(load_fn(ticker, start, end))
+            if df.empty:
+                print(f"Failed to load data for {ticker}")
+                continue
+            portfolio = run_ticker(
+                df, strat_cfg, user_cfg, cache=cache, source_key=f"{source_name}|{ticker}|{start}|{end}",
+                monitor=monitor
+            )
+            if portfolio is None:
+                print("Unknown strategy")
+                continue
+            with _stage(monitor, "metrics"):
+                metrics = compute_metrics(portfolio)
+            yield ticker, {
+                "portfolio": portfolio,
+                "metrics": metrics
+            }
@@ -0,0 +1,204 @@
+# core/portfolio.py
+
+import numpy as np
+import pandas as pd
+
+
+def align_universe(data, column="Close"):
+    """
+    Align one price column across tickers on the union of their dates.
+
+    Arguments:
+        data: dict of ticker -> DataFrame
+
+    Returns:
+        DataFrame (dates x tickers); gaps between a ticker's first and last bar are
+        forward-filled, dates before its first or after its last bar (delisted,
+        halted to the end of the data) stay NaN
+    """
+    prices = pd.DataFrame({ticker: df[column] for ticker, df in data.items() if not df.empty}).sort_index()
+    filled = prices.ffill()
+    for ticker in prices.columns:
+        filled.loc[filled.index > prices[ticker].last_valid_index(), ticker] = np.nan
+    return filled
+
+
+def signals_to_state(signals, index, columns):
+    """
+    Turn 1/-1/0 signal Series into a long/flat state matrix:
+    1 from a buy until the next sell, 0 otherwise.
+    """
+    raw = pd.DataFrame({t: signals[t] for t in columns if t in signals}, index=index, columns=columns)
+    raw = raw.reindex(index).fillna(0)
+    state = raw.replace(0, np.nan).ffill().fillna(0)
+    return (state > 0).astype(np.float64)
+
+
+def target_weights(state, tradable, sizing="equal", position_size_pct=10, asset_weights=None):
+    """
+    Target portfolio weights per bar, computed for all bars and assets at once.
+
+    Sizing rules:
+        "equal": active assets split the capital equally
+        "fixed": each active asset gets position_size_pct % of equity
+    asset_weights (ticker -> % of equity) overrides the rule per asset.
+    Rows are scaled down when the total would exceed 100% (no leverage).
+    """
+    active = state * tradable
+    if sizing == "equal":
+        count = active.sum(axis=1, keepdims=True)
+        weights = np.divide(active, count, out=np.zeros_like(active), where=count > 0)
+    elif sizing == "fixed":
+        weights = active * (position_size_pct / 100)
+    else:
+        raise ValueError(f"Unknown sizing rule '{sizing}'")
+
+    if asset_weights:
+        for j, w in enumerate(asset_weights):
+            if w is not None:
+                weights[:, j] = active[:, j] * (w / 100)
+
+    gross = weights.sum(axis=1, keepdims=True)
+    scale = np.where(gross > 1, 1 / np.where(gross > 0, gross, 1), 1)
+    return weights * scale
+
+
+def parse_asset_weights(text):
+    """
+    Parse "AAPL=30, MSFT=20" into {"AAPL": 30.0, "MSFT": 20.0} (% of equity per asset).
+
+    Raises:
+        ValueError on an entry that is not TICKER=NUMBER
+    """
+    weights = {}
+    for item in text.replace(";", ",").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        ticker, sep, value = item.partition("=")
+        try:
+            if not sep or not ticker.strip():
+                raise ValueError
+            weights[ticker.strip().upper()] = float(value)
+        except ValueError:
+            raise ValueError(f"Expected TICKER=WEIGHT, got '{item}'") from None
+    return weights
+
+
+def periodic_mask(index, rebalance="signal"):
+    """First bar of each period for a pandas frequency ("W", "M", ...), every N bars for an int."""
+    if rebalance == "signal" or rebalance is None:
+        periodic = np.zeros(len(index), dtype=bool)
+    elif isinstance(rebalance, int):
+        periodic = np.arange(len(index)) % rebalance == 0
+    else:
+        periods = pd.DatetimeIndex(index).to_period(rebalance)
+        periodic = np.ones(len(index), dtype=bool)
+        periodic[1:] = periods[1:] != periods[:-1]
+    if len(index):
+        periodic[0] = True
+    return periodic
+
+
+def rebalance_mask(index, weights, rebalance="signal"):
+    """
+    Bars on which the portfolio trades: every change of target, plus the
+    periodic rebalance bars (see periodic_mask).
+    """
+    changed = np.zeros(len(index), dtype=bool)
+    if len(index):
+        changed[0] = True
+        changed[1:] = np.any(weights[1:] != weights[:-1], axis=1)
+    return changed | periodic_mask(index, rebalance)
+
+
+def run_portfolio_backtest(data, signals, initial_capital=10000, sizing="equal",
+                           position_size_pct=10, asset_weights=None, rebalance="signal",
+                           commission_pct=0.0, slippage_pct=0.0):
+    """
+    Backtest a universe of tickers drawing from one shared cash pool.
+
+    Arguments:
+        data: dict of ticker -> DataFrame with 'Close'
+        signals: dict of ticker -> Series with 1 (buy), -1 (sell), 0 (hold)
+        initial_capital: starting capital for the whole portfolio
+        sizing: "equal" or "fixed" (see target_weights)
+        position_size_pct: % of equity per position for "fixed" sizing
+        asset_weights: optional dict of ticker -> % of equity, overriding sizing per asset
+        rebalance: "signal", a pandas frequency like "W"/"M", or a bar count. Every
+            asset is brought back to target on periodic bars; a signal only
+            trades the assets whose target changed
+        commission_pct, slippage_pct: costs as % of traded notional
+
+    Positions are whole shares, as in run_backtest. A ticker is only traded
+    between its first and last bar; a position still open after its last bar
+    is closed at that bar's close on the next bar.
+
+    Returns:
+        dict with
+            "portfolio": DataFrame with cash, invested and total
+            "holdings": DataFrame of shares held per ticker
+            "values": DataFrame of market value per ticker
+    """
+    prices_df = align_universe(data)
+    index, tickers = prices_df.index, list(prices_df.columns)
+    tradable = prices_df.notna().to_numpy()
+    # Held positions are valued at the last close until they are sold
+    prices = np.nan_to_num(prices_df.ffill().to_numpy(dtype=np.float64))
+
+    state = signals_to_state(signals, index, tickers).to_numpy()
+    per_asset = [asset_weights.get(t) for t in tickers] if asset_weights else None
+    weights = target_weights(state, tradable, sizing, position_size_pct, per_asset)
+    periodic = periodic_mask(index, rebalance)
+    events = np.flatnonzero(rebalance_mask(index, weights, rebalance))
+
+    cost_rate = (commission_pct + slippage_pct) / 100
+    n_bars, n_assets = prices.shape
+    holdings = np.zeros((n_bars, n_assets))
+    cash = np.empty(n_bars)
+    shares = np.zeros(n_assets)
+    cash_now = float(initial_capital)
+
+    # Holdings only change on rebalance bars, so each stretch between events
+    # is filled in one block and valued with a single matrix product below.
+    # Periodic bars bring every asset back to its target; on other events only
+    # the assets whose target changed are traded, unless that needs more cash
+    # than there is (the others have grown), in which case all are rebalanced.
+    bounds = np.append(events, n_bars)
+    for k in range(len(events)):
+        t = events[k]
+        price = prices[t]
+        equity = cash_now + shares @ price
+        full = np.floor(np.divide(weights[t] * equity, price, out=np.zeros(n_assets), where=price > 0))
+        target = None
+        if not periodic[t]:
+            moved = weights[t] != weights[t - 1]
+            target = np.where(moved, full, shares)
+            costs = np.abs(target - shares) @ price * cost_rate
+            if cash_now - (target - shares) @ price - costs < 0:
+                target = None
+        if target is None:
+            target = full
+            costs = np.abs(target - shares) @ price * cost_rate
+            if costs > 0:
+                # Shrink the target so the costs are paid out of the rebalance itself
+                target = np.floor(target * (max(equity - costs, 0) / equity if equity > 0 else 0))
+                costs = np.abs(target - shares) @ price * cost_rate
+        cash_now = cash_now - (target - shares) @ price - costs
+        shares = target
+        holdings[t:bounds[k + 1]] = shares
+        cash[t:bounds[k + 1]] = cash_now
+
+    values = holdings * prices
+    invested = values.sum(axis=1)
+    portfolio = pd.DataFrame({
+        "cash": cash,
+        "invested": invested,
+        "total": cash + invested
+    }, index=index)
+    portfolio.index.name = "date"
+    return {
+        "portfolio": portfolio,
+        "holdings": pd.DataFrame(holdings, index=index, columns=tickers),
+        "values": pd.DataFrame(values, index=index, columns=tickers)
+    }
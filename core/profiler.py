@@ -0,0 +1,149 @@
+# core/profiler.py
+
+import collections
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Leaf frames that mean a thread is parked (waiting on a lock, queue or socket), not working
+_IDLE_FILES = {"threading.py", "queue.py", "selectors.py", "connection.py"}
+_IDLE_FUNCTIONS = {("thread.py", "_worker")}
+
+APP_NAME = "Canalytics"  # organization/application name of the app's QSettings
+
+
+def default_log_dir():
+    """
+    The app's logs folder (what System settings' "Open Logs Folder" opens).
+
+    Built from the generic data location and a fixed app name (the one QSettings
+    uses), not AppDataLocation: that depends on the QApplication's name, and
+    headless runs have no QApplication, so GUI and headless logs would differ.
+    """
+    from PyQt5.QtCore import QStandardPaths
+    log_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation), APP_NAME, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    return log_dir
+
+
+def _label(code):
+    # ';' separates frames in collapsed stacks, so it must not appear in a label
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for a whole run.
+
+        with SamplingProfiler() as profiler:
+            run()
+        profiler.write(default_log_dir(), "run")
+
+    A background thread snapshots every other thread's Python stack every
+    `interval` seconds via sys._current_frames(); the profiled code is not
+    instrumented, so the overhead is the cost of the snapshots (around 1% at
+    the default 5ms). Threads parked on locks or queues are skipped, so pool
+    workers waiting for work don't drown out the ones doing it. Snapshots can
+    only be taken while the sampler holds the GIL, so code that releases it
+    (file and socket I/O) is somewhat over-represented.
+
+    write() produces:
+        <prefix>-<timestamp>.folded   collapsed stacks ("thread;outer;...;leaf count"),
+                                      the input format of flamegraph.pl, speedscope and inferno
+        <prefix>-<timestamp>.txt      top-N functions by self and total samples
+    """
+
+    def __init__(self, interval=0.005, include_idle=False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks = collections.Counter()  # tuple of labels (outermost first) -> samples
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.elapsed = time.perf_counter() - self.started
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if not self.include_idle and (
+                    os.path.basename(code.co_filename) in _IDLE_FILES
+                    or (os.path.basename(code.co_filename), code.co_name) in _IDLE_FUNCTIONS
+                ):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}").replace(";", ","))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Collapsed-stack lines, heaviest first."""
+        return [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+
+    def hotspots(self, n=25):
+        """(self, total) top-n lists of (label, samples); total counts a function once per stack."""
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                total[label] += count
+        return own.most_common(n), total.most_common(n)
+
+    def summary(self, n=25):
+        stack_samples = sum(self.stacks.values())
+        lines = [
+            f"Sampling profile: {self.elapsed:.2f}s wall, {self.samples} ticks every {self.interval * 1000:.0f}ms, "
+            f"{stack_samples} busy thread samples",
+            "",
+        ]
+        own, total = self.hotspots(n)
+        for title, rows in (("Self (leaf) samples", own), ("Total (inclusive) samples", total)):
+            lines.append(title)
+            for label, count in rows:
+                share = count / stack_samples if stack_samples else 0.0
+                lines.append(f"  {count:>8} {share:>7.1%}  {label}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def write(self, directory, prefix="profile", n=25):
+        """Write the .folded and .txt files into directory; returns their paths."""
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.join(directory, f"{prefix}-{datetime.now():%Y%m%d-%H%M%S}")
+        folded = stem + ".folded"
+        with open(folded, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        summary = stem + ".txt"
+        with open(summary, "w", encoding="utf-8") as f:
+            f.write(self.summary(n))
+        return folded, summary
@@ -0,0 +1,201 @@
+# core/registry.py
+
+import importlib.util
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import strategy as strategy_module
+
+# Custom strategy modules are discovered here; see strategies/momentum.py for the contract
+DEFAULT_PLUGIN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "strategies")
+
+PARAM_TYPES = {"int": int, "float": float}
+
+# The plugin folders are rescanned at most this often (seconds); get_strategy is called per ticker
+REFRESH_INTERVAL = 2.0
+
+
+class StrategySpec:
+    """
+    A registered strategy: its display name, parameter schema and signal function.
+
+    params is a list of dicts with keys "name", "label", "type" ("int" or "float")
+    and "default". The UI builds its input fields from it.
+
+    Vectorized strategies take a dict of NumPy arrays (one per OHLCV column,
+    lower-case keys) plus their parameters and return a NumPy array of 1/-1/0.
+    Non-vectorized strategies take the price DataFrame and return a Series.
+
+    matrix, if given, computes many parameter sets at once: it takes the price
+    DataFrame plus one array per parameter and returns a DataFrame with one
+    signal column per parameter set (see strategy.rsi_matrix).
+    """
+
+    def __init__(self, name, func, params=None, vectorized=False, source=None, matrix=None):
+        self.name = name
+        self.func = func
+        self.params = list(params or [])
+        self.vectorized = vectorized
+        self.source = source
+        self.matrix = matrix
+
+    def defaults(self):
+        return {p["name"]: p["default"] for p in self.params}
+
+    def coerce_params(self, values):
+        """Fill in defaults and cast values to their declared types."""
+        params = self.defaults()
+        for p in self.params:
+            raw = values.get(p["name"])
+            if raw is None or raw == "":
+                continue
+            try:
+                params[p["name"]] = PARAM_TYPES.get(p.get("type", "float"), float)(raw)
+            except (TypeError, ValueError):
+                pass
+        return params
+
+    def generate(self, df, params):
+        """Return a signal Series aligned to df.index."""
+        params = self.coerce_params(params)
+        if not self.vectorized:
+            return self.func(df, **params)
+        prices = {str(col).lower(): df[col].to_numpy(dtype=np.float64) for col in df.columns}
+        signals = np.asarray(self.func(prices, **params))
+        if signals.shape != (len(df),):
+            raise ValueError(f"Strategy '{self.name}' returned shape {signals.shape}, expected ({len(df)},)")
+        return pd.Series(np.sign(signals).astype(np.int8), index=df.index)
+
+    def generate_many(self, df, param_sets):
+        """Signal Series for each parameter set, in one matrix pass when the strategy has one."""
+        param_sets = [self.coerce_params(params) for params in param_sets]
+        if self.matrix is None or not param_sets:
+            return [self.generate(df, params) for params in param_sets]
+        arrays = {name: np.array([params[name] for params in param_sets]) for name in self.defaults()}
+        signals = self.matrix(df, **arrays).to_numpy()
+        return [pd.Series(signals[:, i], index=df.index) for i in range(len(param_sets))]
+
+
+_registry = {}
+_builtin_names = set()
+_plugin_dirs = [DEFAULT_PLUGIN_DIR]
+_loaded_modules = {}  # path -> (mtime, strategy name, or None if the module failed to load)
+_refresh_lock = threading.Lock()
+_last_refresh = None
+
+
+def register_strategy(name, func, params=None, vectorized=False, source=None, matrix=None):
+    _registry[name] = StrategySpec(name, func, params, vectorized, source, matrix)
+    return _registry[name]
+
+
+def add_plugin_dir(directory):
+    global _last_refresh
+    if directory not in _plugin_dirs:
+        _plugin_dirs.append(directory)
+        _last_refresh = None
+
+
+def refresh(force=False):
+    """
+    Discover strategy modules in the plugin directories.
+    Modules are only re-imported when their file changes; deleted files are unregistered.
+    A module that fails to import is reported once and retried when its file changes.
+    Scans run at most every REFRESH_INTERVAL seconds unless force is set.
+    """
+    global _last_refresh
+    with _refresh_lock:
+        now = time.monotonic()
+        if not force and _last_refresh is not None and now - _last_refresh < REFRESH_INTERVAL:
+            return
+        _last_refresh = now
+
+        paths = []
+        for directory in _plugin_dirs:
+            if not os.path.isdir(directory):
+                continue
+            for fname in sorted(os.listdir(directory)):
+                if fname.endswith(".py") and not fname.startswith("_"):
+                    paths.append(os.path.join(directory, fname))
+
+        # Unregister deleted files first, so their names are free for the modules below
+        for path in [p for p in _loaded_modules if p not in paths]:
+            _unregister_plugin(path)
+
+        for path in paths:
+            mtime = os.path.getmtime(path)
+            cached = _loaded_modules.get(path)
+            if cached and cached[0] == mtime:
+                continue
+            try:
+                _load_plugin(path, mtime)
+            except Exception as e:
+                print(f"Failed to load strategy plugin {os.path.basename(path)}: {e}")
+                _unregister_plugin(path)
+                _loaded_modules[path] = (mtime, None)
+
+
+def _unregister_plugin(path):
+    _, name = _loaded_modules.pop(path, (None, None))
+    if name in _registry and _registry[name].source == path:
+        del _registry[name]
+        # A module refused because it reused this name may load now
+        for other, (_, other_name) in list(_loaded_modules.items()):
+            if other_name is None:
+                del _loaded_modules[other]
+
+
+def _load_plugin(path, mtime):
+    module_name = "canal_strategy_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    name = getattr(module, "NAME", None) or module_name
+    func = getattr(module, "generate_signals")
+    if name in _builtin_names:
+        raise ValueError(f"NAME '{name}' is a built-in strategy; choose another name")
+    other = _registry.get(name)
+    if other is not None and other.source != path:
+        raise ValueError(f"NAME '{name}' is already used by {os.path.basename(other.source)}")
+    previous = _loaded_modules.get(path)
+    if previous and previous[1] != name and previous[1] in _registry:
+        del _registry[previous[1]]
+    register_strategy(name, func, getattr(module, "PARAMS", []), vectorized=True, source=path)
+    _loaded_modules[path] = (mtime, name)
+
+
+def get_strategy(name):
+    refresh()
+    return _registry.get(name)
+
+
+def strategy_names():
+    # Called when a strategy list is shown, so always rescan
+    refresh(force=True)
+    return list(_registry.keys())
+
+
+def _rsi(df, rsi_period=14, threshold_low=30, threshold_high=70):
+    return strategy_module.rsi_strategy(df, period=rsi_period, threshold_low=threshold_low, threshold_high=threshold_high)
+
+
+def _rsi_matrix(df, rsi_period, threshold_low, threshold_high):
+    return strategy_module.rsi_matrix(df, rsi_period, threshold_low, threshold_high)
+
+
+register_strategy("SMA Crossover", strategy_module.sma_crossover_strategy, [
+    {"name": "short_window", "label": "Short Window", "type": "int", "default": 10},
+    {"name": "long_window", "label": "Long Window", "type": "int", "default": 30},
+], matrix=strategy_module.sma_crossover_matrix)
+register_strategy("RSI", _rsi, [
+    {"name": "rsi_period", "label": "RSI Period", "type": "int", "default": 14},
+    {"name": "threshold_low", "label": "Buy Below (RSI)", "type": "float", "default": 30},
+    {"name": "threshold_high", "label": "Sell Above (RSI)", "type": "float", "default": 70},
+], matrix=_rsi_matrix)
+register_strategy("Buy & Hold", strategy_module.buy_and_hold_strategy)
+_builtin_names.update(_registry)
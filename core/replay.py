@@ -0,0 +1,349 @@
+# core/replay.py
+
+import collections
+import math
+import sched
+import threading
+import time
+
+import pandas as pd
+
+from core import backtest
+
+
+# ---------------------------------------------------------------- bar sources
+
+def frame_bars(df, start=None, end=None):
+    """Yield (timestamp, close) from an in-memory or cached DataFrame, one bar at a time."""
+    if start or end:
+        df = df.loc[start:end]
+    for ts, close in zip(df.index, df["Close"].to_numpy()):
+        yield ts, float(close)
+
+
+def csv_bars(path, start=None, end=None, chunksize=10000):
+    """
+    Yield (timestamp, close) from a CSV file (date index in the first column)
+    reading chunksize rows at a time, so the whole file is never in memory.
+    """
+    start = pd.Timestamp(start) if start else None
+    end = pd.Timestamp(end) if end else None
+    for chunk in pd.read_csv(path, index_col=0, parse_dates=True, chunksize=chunksize):
+        if start is not None:
+            chunk = chunk[chunk.index >= start]
+        if end is not None:
+            if len(chunk) and chunk.index[0] > end:
+                return
+            chunk = chunk[chunk.index <= end]
+        for ts, close in zip(chunk.index, chunk["Close"].to_numpy()):
+            yield ts, float(close)
+
+
+def bundle_bars(path, ticker, start=None, end=None):
+    """
+    Yield (timestamp, close) for one ticker of a data bundle. Only the Close
+    column is read from the file, not the whole OHLCV frame.
+    """
+    from data.bundle import open_bundle
+
+    df = open_bundle(path).load(ticker, start, end, columns=["Close"])
+    if df.empty:
+        return
+    for ts, close in zip(df.index, df["Close"].to_numpy()):
+        yield ts, float(close)
+
+
+# ---------------------------------------------------------------- incremental signals
+
+class RollingMean:
+    """Mean of the last `window` values (or fewer at the start), in O(1) per update."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = collections.deque()
+        self.total = 0.0
+
+    def update(self, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        return self.total / len(self.values)
+
+
+class IncrementalSMACrossover:
+    """Bar-at-a-time equivalent of strategy.sma_crossover_strategy."""
+
+    def __init__(self, short_window=10, long_window=30):
+        self.short = RollingMean(short_window)
+        self.long = RollingMean(long_window)
+        self.prev_state = None
+
+    def update(self, close):
+        short_ma = self.short.update(close)
+        long_ma = self.long.update(close)
+        state = 1 if short_ma > long_ma else (-1 if short_ma < long_ma else 0)
+        diff = 0 if self.prev_state is None else state - self.prev_state
+        self.prev_state = state
+        return 1 if diff > 0 else (-1 if diff < 0 else 0)
+
+
+class IncrementalRSI:
+    """Bar-at-a-time equivalent of strategy.rsi_strategy (simple rolling averages)."""
+
+    def __init__(self, rsi_period=14, threshold_low=30, threshold_high=70):
+        self.period = rsi_period
+        self.threshold_low = threshold_low
+        self.threshold_high = threshold_high
+        self.window = collections.deque()   # (gain, loss), None for the first bar
+        self.gain_total = 0.0
+        self.loss_total = 0.0
+        self.count = 0
+        self.prev_close = None
+
+    def update(self, close):
+        entry = None
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            entry = (max(delta, 0.0), max(-delta, 0.0))
+            self.gain_total += entry[0]
+            self.loss_total += entry[1]
+            self.count += 1
+        self.prev_close = close
+        self.window.append(entry)
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            if old is not None:
+                self.gain_total -= old[0]
+                self.loss_total -= old[1]
+                self.count -= 1
+        if self.count == 0:
+            return 0
+
+        avg_gain = self.gain_total / self.count
+        avg_loss = self.loss_total / self.count
+        rs = avg_gain / (avg_loss if avg_loss != 0 else 1e-10)
+        rsi = 100 - (100 / (1 + rs))
+        if rsi < self.threshold_low:
+            return 1
+        if rsi > self.threshold_high:
+            return -1
+        return 0
+
+
+class IncrementalBuyAndHold:
+    def __init__(self):
+        self.first = True
+
+    def update(self, close):
+        signal = 1 if self.first else 0
+        self.first = False
+        return signal
+
+
+INCREMENTAL_STRATEGIES = {
+    "SMA Crossover": IncrementalSMACrossover,
+    "RSI": IncrementalRSI,
+    "Buy & Hold": IncrementalBuyAndHold,
+}
+
+
+def make_signal_generator(strat_cfg):
+    """Build the incremental signal generator for a strategy config, or None if unsupported."""
+    from core import registry
+
+    cls = INCREMENTAL_STRATEGIES.get(strat_cfg["strategy"])
+    if cls is None:
+        return None
+    params = {k: v for k, v in strat_cfg.items() if k != "strategy"}
+    spec = registry.get_strategy(strat_cfg["strategy"])
+    return cls(**spec.coerce_params(params))
+
+
+# ---------------------------------------------------------------- portfolio and metrics
+
+class PortfolioState:
+    """
+    Incremental portfolio driven by backtest._step, the same per-bar rules as
+    backtest.run_backtest's kernel (exits checked on the close before the
+    signal, costs as % of notional).
+    """
+
+    def __init__(self, initial_capital=10000, position_size_pct=10, stop_loss_pct=None,
+                 take_profit_pct=None, trailing_stop_pct=None, max_holding_bars=None,
+                 commission_pct=0.0, slippage_pct=0.0):
+        self.cash = float(initial_capital)
+        self.position = 0.0
+        self.entry_cost = 0.0
+        self.high_water = 0.0
+        self.held_bars = 0
+        self.rules = (
+            initial_capital * (position_size_pct / 100),
+            float(stop_loss_pct or 0.0),
+            float(take_profit_pct or 0.0),
+            float(trailing_stop_pct or 0.0),
+            int(max_holding_bars or 0),
+            float(commission_pct or 0.0),
+            float(slippage_pct or 0.0),
+        )
+
+    def update(self, price, signal):
+        """Apply one bar; returns the total portfolio value."""
+        self.cash, self.position, self.entry_cost, self.high_water, self.held_bars = backtest._step(
+            price, signal, self.cash, self.position, self.entry_cost, self.high_water, self.held_bars,
+            *self.rules
+        )
+        return self.cash + self.position * price
+
+
+class MetricsAccumulator:
+    """
+    Running total return, Sharpe (Welford mean/variance of bar returns) and max
+    drawdown, matching pipeline.compute_metrics without storing the curve.
+    """
+
+    def __init__(self, periods_per_year=252):
+        self.periods_per_year = periods_per_year
+        self.first = None
+        self.last = None
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+
+    def update(self, value):
+        if self.last is not None and self.last != 0:
+            r = value / self.last - 1
+            self.n += 1
+            delta = r - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (r - self.mean)
+        if self.first is None:
+            self.first = value
+        self.last = value
+        self.peak = max(self.peak, value)
+        if self.peak > 0:
+            self.max_drawdown = min(self.max_drawdown, (value - self.peak) / self.peak)
+
+    def result(self):
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+        sharpe = (self.mean / std) * (self.periods_per_year ** 0.5) if std > 0 else 0.0
+        total_return = (self.last - self.first) / self.first if self.first else 0.0
+        return {"return": total_return, "sharpe": sharpe, "drawdown": self.max_drawdown}
+
+
+# ---------------------------------------------------------------- pipeline
+
+def replay(bars, strat_cfg, user_cfg, speed=None, stop_event=None):
+    """
+    Stream bars through incremental signals, portfolio and metrics.
+
+    Arguments:
+        bars: iterable of (timestamp, close), e.g. csv_bars(...) or frame_bars(...)
+        speed: bars per second to pace the replay at (None = as fast as possible)
+        stop_event: optional threading.Event to end the replay early
+
+    Yields:
+        dict per bar with date, price, signal, cash, position, total and running metrics.
+        Memory use does not grow with the length of the history.
+    """
+    from core.pipeline import execution_params
+
+    signal_gen = make_signal_generator(strat_cfg)
+    if signal_gen is None:
+        raise ValueError(f"Strategy '{strat_cfg['strategy']}' has no incremental implementation")
+    portfolio = PortfolioState(
+        initial_capital=user_cfg.get("initial_capital", 10000),
+        position_size_pct=user_cfg.get("position_size", 10),
+        **execution_params(user_cfg)
+    )
+    metrics = MetricsAccumulator()
+    interval = 1.0 / speed if speed else 0.0
+    next_tick = time.monotonic()
+
+    for ts, close in bars:
+        if stop_event is not None and stop_event.is_set():
+            return
+        if interval:
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        signal = signal_gen.update(close)
+        total = portfolio.update(close, signal)
+        metrics.update(total)
+        yield {
+            "date": ts,
+            "price": close,
+            "signal": signal,
+            "cash": portfolio.cash,
+            "position": portfolio.position,
+            "total": total,
+            "metrics": metrics.result(),
+        }
+
+
+def run_replay(bars, strat_cfg, user_cfg, speed=None, on_bar=None, stop_event=None):
+    """Drain a replay, calling on_bar for each bar; returns the final metrics."""
+    last = None
+    for state in replay(bars, strat_cfg, user_cfg, speed=speed, stop_event=stop_event):
+        if on_bar:
+            on_bar(state)
+        last = state
+    return last["metrics"] if last else None
+
+
+class ReplayScheduler:
+    """
+    Time-based scheduler for replays, run on a background thread.
+
+        scheduler = ReplayScheduler()
+        scheduler.every(3600, lambda: run_replay(...))     # hourly
+        scheduler.at(datetime(2025, 1, 2, 9, 30), job)     # once
+        scheduler.start()
+    """
+
+    def __init__(self):
+        self._sched = sched.scheduler(time.time, time.sleep)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def at(self, when, fn):
+        """Run fn once at a datetime."""
+        with self._lock:
+            return self._sched.enterabs(when.timestamp(), 0, self._run, (fn, None))
+
+    def every(self, seconds, fn, first_delay=0.0):
+        """Run fn every `seconds`, starting after first_delay."""
+        with self._lock:
+            return self._sched.enter(first_delay, 0, self._run, (fn, seconds))
+
+    def _run(self, fn, repeat):
+        if self._stop.is_set():
+            return
+        if repeat:
+            with self._lock:
+                self._sched.enter(repeat, 0, self._run, (fn, repeat))
+        try:
+            fn()
+        except Exception as e:
+            print(f"Scheduled replay failed: {e}")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._sched.run(blocking=False)
+            self._stop.wait(0.2)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,152 @@
+# core/robustness.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def equity_returns(total):
+    """Bar returns of an equity curve (e.g. portfolio["total"]) as a NumPy array."""
+    values = np.asarray(total, dtype=np.float64)
+    return values[1:] / values[:-1] - 1
+
+
+def resample_indices(rng, n_sims, n, method="block", block_size=20):
+    """
+    Index matrix (n_sims x n) for resampling a return series of length n.
+
+    "block": circular block bootstrap with fixed-length blocks (block_size bars,
+             wrapping at the end), keeps short-range autocorrelation
+    "shuffle": random permutation per simulation (same returns, different order)
+    """
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(np.arange(n), (n_sims, n)), axis=1)
+    if method != "block":
+        raise ValueError(f"Unknown resampling method '{method}'")
+    block_size = max(1, min(block_size, n))
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, size=(n_sims, n_blocks, 1))
+    idx = (starts + np.arange(block_size)) % n
+    return idx.reshape(n_sims, -1)[:, :n]
+
+
+def path_stats(returns, periods_per_year=252):
+    """
+    Total return, annualized Sharpe and max drawdown for each row of a
+    (n_sims x n) return matrix, all computed along axis 1.
+    """
+    equity = np.cumprod(1 + returns, axis=1)
+    total_return = equity[:, -1] - 1
+    std = returns.std(axis=1, ddof=1) if returns.shape[1] > 1 else np.zeros(len(returns))
+    sharpe = np.divide(returns.mean(axis=1), std, out=np.zeros(len(returns)), where=std > 0) * np.sqrt(periods_per_year)
+    # Start the peak at 1.0 (initial equity) so a loss on the first bar counts as drawdown
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    drawdown = (equity / peak - 1).min(axis=1)
+    return {"return": total_return, "sharpe": sharpe, "drawdown": drawdown}
+
+
+def _simulate(returns, n_sims, seed, method, block_size, periods_per_year, batch_size):
+    rng = np.random.default_rng(seed)
+    out = {"return": [], "sharpe": [], "drawdown": []}
+    done = 0
+    while done < n_sims:
+        batch = min(batch_size, n_sims - done)
+        idx = resample_indices(rng, batch, len(returns), method, block_size)
+        stats = path_stats(returns[idx], periods_per_year)
+        for key in out:
+            out[key].append(stats[key])
+        done += batch
+    return {key: np.concatenate(parts) for key, parts in out.items()}
+
+
+def bootstrap(total, n_sims=5000, method="block", block_size=20, confidence=0.95, seed=None,
+              n_jobs=1, periods_per_year=252, batch_size=1000):
+    """
+    Monte Carlo robustness analysis of an equity curve.
+
+    Arguments:
+        total: equity curve, e.g. run_backtest(...)["total"]
+        n_sims: number of resampled paths
+        method: "block" (block bootstrap) or "shuffle" (reorder returns)
+        block_size: bars per block for the block bootstrap
+        confidence: width of the reported interval
+        seed: seed for reproducible results; each worker gets an independent child stream
+        n_jobs: worker processes to spread the simulations over
+        batch_size: simulations generated per array batch (bounds memory)
+
+    Returns:
+        dict of metric -> {"low", "median", "high", "observed"} plus "samples"
+        with the raw per-simulation arrays
+    """
+    returns = equity_returns(total)
+    if len(returns) < 2:
+        raise ValueError("Need at least 3 equity points to bootstrap")
+    return _resample_summary(returns, n_sims, method, block_size, confidence, seed,
+                             n_jobs, periods_per_year, batch_size)
+
+
+def trade_returns(ledger, initial_capital):
+    """
+    Account return of each closed trade in a trades.build_ledger ledger: the
+    trade's pnl over the equity before it. A single-asset run is flat between
+    trades, so that equity is initial_capital plus the earlier trades' pnl.
+    """
+    closed = ledger[~ledger["open"].astype(bool)] if len(ledger) else ledger
+    pnl = closed["pnl"].to_numpy(dtype=np.float64)
+    equity_before = float(initial_capital) + np.concatenate(([0.0], np.cumsum(pnl)[:-1]))
+    return pnl / equity_before
+
+
+def trade_bootstrap(ledger, initial_capital, n_sims=5000, replace=False, confidence=0.95, seed=None,
+                    n_jobs=1, periods_per_year=None, batch_size=1000):
+    """
+    Trade-level Monte Carlo over the run's closed trades.
+
+    replace=False reshuffles the trades into random orders. Total return and
+    Sharpe do not depend on the order, so only the drawdown interval has any
+    width: it shows how deep the same trades could have drawn down.
+    replace=True draws trades with replacement, which spreads all three.
+
+    Sharpe is per trade, annualized by periods_per_year (default: trades per
+    year of the ledger's span). Returns the same structure as bootstrap().
+    """
+    returns = trade_returns(ledger, initial_capital)
+    if len(returns) < 2:
+        raise ValueError("Need at least 2 closed trades to reshuffle")
+    if periods_per_year is None:
+        closed = ledger[~ledger["open"].astype(bool)]
+        years = (closed["exit_time"].iloc[-1] - closed["entry_time"].iloc[0]).days / 365.25
+        periods_per_year = len(returns) / years if years > 0 else len(returns)
+    # A block bootstrap with one-trade blocks is plain resampling with replacement
+    return _resample_summary(returns, n_sims, "block" if replace else "shuffle", 1, confidence, seed,
+                             n_jobs, periods_per_year, batch_size)
+
+
+def _resample_summary(returns, n_sims, method, block_size, confidence, seed,
+                      n_jobs, periods_per_year, batch_size):
+    n_jobs = max(1, int(n_jobs))
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    counts = [n_sims // n_jobs + (1 if i < n_sims % n_jobs else 0) for i in range(n_jobs)]
+    args = [(returns, c, s, method, block_size, periods_per_year, batch_size) for c, s in zip(counts, seeds) if c]
+
+    if n_jobs == 1:
+        parts = [_simulate(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_simulate, *zip(*args)))
+
+    samples = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+    observed = path_stats(returns[np.newaxis, :], periods_per_year)
+
+    alpha = (1 - confidence) / 2
+    summary = {}
+    for key, values in samples.items():
+        low, median, high = np.quantile(values, [alpha, 0.5, 1 - alpha])
+        summary[key] = {
+            "low": float(low),
+            "median": float(median),
+            "high": float(high),
+            "observed": float(observed[key][0])
+        }
+    summary["samples"] = samples
+    return summary
@@ -0,0 +1,167 @@
+# core/rolling.py
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional; the pure-Python kernels give identical results
+    numba = None
+
+
+def _rolling_moments(values, window, mean_out, std_out):
+    """
+    Rolling mean and sample standard deviation in one pass.
+
+    Each bar adds the new value and removes the one leaving the window with
+    Welford-style updates, so the cost is O(1) per bar regardless of window and
+    long curves don't accumulate the cancellation error of raw sum/sum-of-squares.
+    NaN values (e.g. the first return) are skipped; output is NaN until the
+    window holds `window` values.
+    """
+    n = len(values)
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        x = values[i]
+        if x == x:
+            count += 1
+            delta = x - mean
+            mean += delta / count
+            m2 += delta * (x - mean)
+        if i >= window:
+            y = values[i - window]
+            if y == y:
+                count -= 1
+                if count == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    delta = y - mean
+                    mean -= delta / count
+                    m2 -= delta * (y - mean)
+        if count == window and window > 1:
+            mean_out[i] = mean
+            std_out[i] = (m2 / (count - 1)) ** 0.5 if m2 > 0 else 0.0
+        else:
+            mean_out[i] = np.nan
+            std_out[i] = np.nan
+
+
+def _rolling_max(values, window, queue, out):
+    """
+    Rolling maximum over the last `window` values (fewer at the start) with a
+    monotonic deque of indices kept in `queue` (len >= n): each index is pushed
+    and popped at most once, so the whole pass is O(n).
+    """
+    head = 0
+    tail = 0
+    for i in range(len(values)):
+        while tail > head and values[queue[tail - 1]] <= values[i]:
+            tail -= 1
+        queue[tail] = i
+        tail += 1
+        if queue[head] <= i - window:
+            head += 1
+        out[i] = values[queue[head]]
+
+
+if numba is not None:
+    _rolling_moments_jit = numba.njit(cache=True)(_rolling_moments)
+    _rolling_max_jit = numba.njit(cache=True)(_rolling_max)
+else:
+    _rolling_moments_jit = _rolling_max_jit = None
+
+
+def rolling_moments(values, window):
+    """(mean, std) arrays of a float array over a trailing window."""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    mean = np.empty(len(values))
+    std = np.empty(len(values))
+    if _rolling_moments_jit is not None:
+        _rolling_moments_jit(values, window, mean, std)
+    else:
+        _rolling_moments(values.tolist(), window, mean, std)
+    return mean, std
+
+
+def rolling_max(values, window):
+    """Trailing-window maximum of a float array."""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    out = np.empty(len(values))
+    queue = np.empty(len(values), dtype=np.int64)
+    if _rolling_max_jit is not None:
+        _rolling_max_jit(values, window, queue, out)
+    else:
+        _rolling_max(values.tolist(), window, queue.tolist(), out)
+    return out
+
+
+def bar_returns(total):
+    """Simple bar-to-bar returns of an equity curve; the first is NaN."""
+    total = np.asarray(total, dtype=np.float64)
+    returns = np.full(len(total), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = total[1:] / total[:-1] - 1
+    return returns
+
+
+def underwater(total):
+    """Drawdown from the running all-time high (<= 0) at every bar."""
+    total = np.asarray(total, dtype=np.float64)
+    return total / np.maximum.accumulate(total) - 1
+
+
+class RollingStats:
+    """
+    Rolling statistics for one equity curve (e.g. run_backtest's "total" column).
+
+    Bar returns and the underwater curve are computed once; each window's
+    results are cached, so moving a window slider back and forth only pays
+    one O(n) pass per new window.
+
+        stats = RollingStats(portfolio["total"])
+        stats.sharpe(63), stats.volatility(63), stats.drawdown(63), stats.underwater()
+    """
+
+    def __init__(self, total, periods_per_year=252, max_cached_windows=32):
+        self.total = np.asarray(total, dtype=np.float64)
+        self.periods_per_year = periods_per_year
+        self.max_cached_windows = max_cached_windows
+        self.returns = bar_returns(self.total)
+        self._underwater = None
+        self._moments = {}
+        self._maxima = {}
+
+    def _cached(self, cache, window, compute):
+        if window not in cache:
+            if len(cache) >= self.max_cached_windows:
+                cache.pop(next(iter(cache)))
+            cache[window] = compute()
+        return cache[window]
+
+    def _window_moments(self, window):
+        return self._cached(self._moments, window, lambda: rolling_moments(self.returns, window))
+
+    def volatility(self, window):
+        """Annualized standard deviation of bar returns over the window."""
+        _, std = self._window_moments(window)
+        return std * self.periods_per_year ** 0.5
+
+    def sharpe(self, window):
+        """Annualized Sharpe ratio (zero risk-free rate) of bar returns over the window."""
+        mean, std = self._window_moments(window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(std > 0, mean / std, 0.0) * self.periods_per_year ** 0.5
+        sharpe[np.isnan(std)] = np.nan
+        return sharpe
+
+    def drawdown(self, window):
+        """Drawdown from the highest equity within the trailing window (<= 0)."""
+        peak = self._cached(self._maxima, window, lambda: rolling_max(self.total, window))
+        return self.total / peak - 1
+
+    def underwater(self):
+        if self._underwater is None:
+            self._underwater = underwater(self.total)
+        return self._underwater
@@ -0,0 +1,148 @@
+# core/run_cache.py
+
+import collections
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+
+def hash_dataframe(df):
+    """
+    Content hash of a price DataFrame (index, columns and values).
+    Two snapshots with identical bars hash the same regardless of where they came from.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([str(c) for c in df.columns]).encode())
+    if not df.empty:
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def make_run_key(data_hash, strategy_name, params, initial_capital, position_size_pct, execution=None):
+    """
+    Build the cache key for one backtest run from the data hash, the strategy
+    name and parameters, and the backtest config (including exit/cost settings).
+    """
+    payload = json.dumps({
+        "strategy": strategy_name,
+        "params": params or {},
+        "initial_capital": float(initial_capital),
+        "position_size_pct": float(position_size_pct),
+        "execution": execution or {},
+    }, sort_keys=True, default=str)
+    run_hash = hashlib.sha256(payload.encode()).hexdigest()
+    return f"{data_hash[:16]}_{run_hash[:32]}"
+
+
+class RunCache:
+    """
+    Memoizes whole backtest runs keyed by a content hash of their inputs.
+
+    The most recent max_memory_entries results are held in memory and, when
+    a store (a data.cache_manager.CacheManager, e.g. DataService.run_store())
+    is given, every result is also written to it so headless runs in later
+    processes can reuse them; the store's size cap evicts the least recently
+    used. When the data snapshot for a ticker changes, every run computed on
+    the previous snapshot is dropped.
+    """
+
+    SOURCE = "runs"  # CacheManager source name; no TTL, runs never go stale by age
+
+    def __init__(self, store=None, max_memory_entries=512):
+        self.store = store
+        self.max_memory_entries = max_memory_entries
+        self._memory = collections.OrderedDict()  # LRU; older entries stay in the store only
+        self._snapshots = {}
+        self.hits = 0
+        self.misses = 0
+        if store is not None:
+            self._snapshots = self._load_index()
+
+    def get(self, key):
+        if key in self._memory:
+            self.hits += 1
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        if self.store is not None:
+            result = self.store.get(key, self.SOURCE)
+            if result is not None:
+                self._remember(key, result)
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key, result):
+        self._remember(key, result)
+        if self.store is not None:
+            try:
+                # Tagged with the data hash so invalidate() can find the runs on a snapshot
+                self.store.put(key, self.SOURCE, None, result, tag=key.split("_", 1)[0])
+            except OSError as e:
+                print(f"Failed to store run {key}: {e}")
+
+    def track_snapshot(self, source_key, data_hash):
+        """
+        Record the data hash currently backing source_key (e.g. ticker/start/end).
+        If it differs from the previous one, runs on the stale snapshot are evicted.
+        """
+        previous = self._snapshots.get(source_key)
+        if previous == data_hash:
+            return
+        self._snapshots[source_key] = data_hash
+        if previous and previous not in self._snapshots.values():
+            self.invalidate(previous)
+        if self.store is not None:
+            self._save_index()
+
+    def invalidate(self, data_hash=None):
+        """Drop runs computed on data_hash, or every run when data_hash is None."""
+        prefix = data_hash[:16] + "_" if data_hash else ""
+        for key in [k for k in self._memory if k.startswith(prefix)]:
+            del self._memory[key]
+        if self.store is not None:
+            if data_hash is None:
+                self.store.clear()
+                self._snapshots = {}
+                self._save_index()
+            else:
+                self.store.discard(data_hash[:16])
+
+    def get_or_run(self, df, strategy_name, params, initial_capital, position_size_pct, run_fn,
+                   source_key=None, execution=None):
+        """
+        Return the cached result for this run, or call run_fn() and store its result.
+        """
+        data_hash = hash_dataframe(df)
+        if source_key is not None:
+            self.track_snapshot(source_key, data_hash)
+        key = make_run_key(data_hash, strategy_name, params, initial_capital, position_size_pct, execution)
+        result = self.get(key)
+        if result is None:
+            result = run_fn()
+            self.put(key, result)
+        return result
+
+    def _index_path(self):
+        return os.path.join(self.store.directory, "snapshots.json")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._snapshots, f)
+        os.replace(tmp, self._index_path())
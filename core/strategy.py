@@ -1,5 +1,8 @@
 # core/strategy.py
 
+import itertools
+
+import numpy as np
 import pandas as pd
 
 
@@ -10,19 +13,17 @@ def sma_crossover_strategy(df, short_window=10, long_window=30):
 
     Returns a Series of signals: 1 = Buy, -1 = Sell, 0 = Hold
     """
-    df = df.copy()
-    df['short_ma'] = df['Close'].rolling(window=short_window, min_periods=1).mean()
-    df['long_ma'] = df['Close'].rolling(window=long_window, min_periods=1).mean()
+    short_ma = df['Close'].rolling(window=short_window, min_periods=1).mean()
+    long_ma = df['Close'].rolling(window=long_window, min_periods=1).mean()
 
     signal = pd.Series(index=df.index, data=0)
 
     # Generate signals
-    signal[df['short_ma'] > df['long_ma']] = 1
-    signal[df['short_ma'] < df['long_ma']] = -1
+    signal[short_ma > long_ma] = 1
+    signal[short_ma < long_ma] = -1
 
     # Only change when crossing
-    signal = signal.diff().fillna(0)
-    signal[signal != 0] = signal[signal != 0].apply(lambda x: 1 if x > 0 else -1)
+    signal = np.sign(signal.diff().fillna(0))
 
     return signal
 
@@ -30,13 +31,8 @@ def sma_crossover_strategy(df, short_window=10, long_window=30):
 def rsi_strategy(df, period=14, threshold_low=30, threshold_high=70):
     """
     RSI strategy: Buy when RSI < threshold_low, Sell when RSI > threshold_high
+    Expects data normalized by DataService.load_data (flat columns).
     """
-    df = df.copy()
-
-    # 🔐 Flatten MultiIndex columns if needed
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-
     assert "Close" in df.columns, "DataFrame must contain 'Close' column"
 
     delta = df['Close'].diff()
@@ -59,6 +55,126 @@ def rsi_strategy(df, period=14, threshold_low=30, threshold_high=70):
     return signal
 
 
+def parameter_grid(**values):
+    """
+    Every combination of the given parameter values, as equal-length arrays:
+
+        parameter_grid(period=[7, 14], threshold_low=[20, 30])
+        -> {"period": [7, 7, 14, 14], "threshold_low": [20, 30, 20, 30]}
+
+    The result can be passed straight to sma_crossover_matrix / rsi_matrix.
+    """
+    names = list(values)
+    combos = list(itertools.product(*(np.atleast_1d(values[name]) for name in names)))
+    return {name: np.array([combo[i] for combo in combos]) for i, name in enumerate(names)}
+
+
+def _broadcast_params(*arrays):
+    return [np.ravel(a) for a in np.broadcast_arrays(*(np.atleast_1d(a) for a in arrays))]
+
+
+def _rolling_means(values, windows):
+    """
+    Trailing means of values for several window lengths at once, as a
+    (bars x windows) array. Same result as rolling(window, min_periods=1).mean()
+    per column: NaNs are skipped, and bars with no valid value are NaN. One
+    cumulative sum serves every window.
+    """
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    end = np.arange(1, len(values) + 1)[:, None]
+    start = np.maximum(end - np.asarray(windows)[None, :], 0)
+    count = counts[end] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (sums[end] - sums[start]) / count
+
+    # Like pandas, a window holding one repeated value averages to exactly that
+    # value, so flat stretches compare equal instead of differing by rounding
+    present = values[valid]
+    positions = np.arange(len(present))
+    changed = np.concatenate(([True], present[1:] != present[:-1]))
+    run = positions - np.maximum.accumulate(np.where(changed, positions, 0)) + 1
+    last = counts[1:] - 1  # latest valid value at or before each bar
+    seen = last >= 0
+    repeated = np.where(seen, run[last], 0) if len(present) else np.zeros(len(values), np.int64)
+    constant = (repeated[:, None] >= count) & (count > 0)
+    if constant.any():
+        latest = np.where(seen, present[last], np.nan) if len(present) else values
+        means = np.where(constant, latest[:, None], means)
+    return means
+
+
+def sma_crossover_matrix(df, short_window, long_window):
+    """
+    sma_crossover_strategy for many parameter sets in one pass.
+
+    short_window and long_window may each be a scalar or an array; they are
+    broadcast against each other and column i uses (short_window[i],
+    long_window[i]) (see parameter_grid for every combination). Each distinct
+    window's moving average is computed once and shared by all columns that use it.
+
+    Returns a DataFrame of int8 signals (1 = Buy, -1 = Sell, 0 = Hold), one row
+    per bar and one column per parameter set, with (short_window, long_window)
+    column labels.
+    """
+    short, long = _broadcast_params(short_window, long_window)
+    short, long = short.astype(np.int64), long.astype(np.int64)
+    windows, inverse = np.unique(np.concatenate([short, long]), return_inverse=True)
+
+    close = df['Close'].to_numpy(dtype=np.float64)
+    finite = close[np.isfinite(close)]
+    # Centre on the first price so the running sums stay small
+    means = _rolling_means(close - (finite[0] if len(finite) else 0.0), windows)
+    short_ma = means[:, inverse[:len(short)]]
+    long_ma = means[:, inverse[len(short):]]
+
+    # Differences below rounding noise of the running sums count as ties, as they do
+    # in pandas' compensated rolling sums
+    gap = short_ma - long_ma
+    tolerance = 1e-10 * (np.abs(finite).max() if len(finite) else 0.0)
+    state = (gap > tolerance).astype(np.int8) - (gap < -tolerance).astype(np.int8)
+    signal = np.zeros_like(state)
+    signal[1:] = np.sign(np.diff(state, axis=0))
+
+    columns = pd.MultiIndex.from_arrays([short, long], names=["short_window", "long_window"])
+    return pd.DataFrame(signal, index=df.index, columns=columns)
+
+
+def rsi_matrix(df, period, threshold_low=30, threshold_high=70):
+    """
+    rsi_strategy for many parameter sets in one pass.
+
+    period, threshold_low and threshold_high may each be a scalar or an array;
+    they are broadcast against each other and column i uses (period[i],
+    threshold_low[i], threshold_high[i]).
+    The price deltas, gains and losses are computed once, the RSI once per
+    distinct period, and the thresholds are applied to all columns together.
+
+    Returns a DataFrame of int8 signals with (period, threshold_low,
+    threshold_high) column labels.
+    """
+    assert "Close" in df.columns, "DataFrame must contain 'Close' column"
+    periods, lows, highs = _broadcast_params(period, threshold_low, threshold_high)
+    periods = periods.astype(np.int64)
+    unique_periods, inverse = np.unique(periods, return_inverse=True)
+
+    close = df['Close'].to_numpy(dtype=np.float64)
+    delta = np.diff(close, prepend=np.nan)
+    avg_gain = _rolling_means(np.clip(delta, 0, None), unique_periods)
+    avg_loss = _rolling_means(-np.clip(delta, None, 0), unique_periods)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rs = avg_gain / np.where(avg_loss == 0, 1e-10, avg_loss)
+        rsi = (100 - (100 / (1 + rs)))[:, inverse]
+
+    signal = (rsi < lows[None, :]).astype(np.int8)
+    signal[rsi > highs[None, :]] = -1
+
+    columns = pd.MultiIndex.from_arrays([periods, lows, highs], names=["period", "threshold_low", "threshold_high"])
+    return pd.DataFrame(signal, index=df.index, columns=columns)
+
+
 def buy_and_hold_strategy(df):
     """
     Buy at the start, hold forever.
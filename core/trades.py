@@ -0,0 +1,120 @@
+# core/trades.py
+
+import numpy as np
+import pandas as pd
+
+LEDGER_COLUMNS = [
+    "entry_time", "exit_time", "entry_price", "exit_price", "shares",
+    "cost", "pnl", "return", "bars_held", "duration", "open",
+]
+
+
+def position_changes(portfolio):
+    """
+    Positions of bars where the position grew (entries/adds) and shrank (exits),
+    as two integer arrays, for drawing markers.
+    """
+    position = portfolio["position"].to_numpy()
+    change = np.diff(position, prepend=0.0)
+    return np.flatnonzero(change > 0), np.flatnonzero(change < 0)
+
+
+def build_ledger(portfolio, initial_capital=None):
+    """
+    Turn run_backtest output (price/cash/position/total) into one row per round trip.
+
+    A trade opens when the position leaves zero and closes on the bar it returns
+    to zero; adds in between belong to the same trade. A trade still open on the
+    last bar is closed there at the last price and flagged open=True.
+
+    Columns:
+        entry_time/exit_time, entry_price/exit_price (bar closes, before slippage),
+        shares (largest position held), cost (cash spent buying, incl. costs),
+        pnl (equity change over the trade, net of costs), return (pnl / cost),
+        bars_held, duration (exit_time - entry_time), open
+
+    initial_capital is only needed to account entry costs for a trade opened on the
+    very first bar; without it that trade's pnl starts from the first bar's equity.
+    """
+    index = portfolio.index
+    price = portfolio["price"].to_numpy(dtype=np.float64)
+    cash = portfolio["cash"].to_numpy(dtype=np.float64)
+    position = portfolio["position"].to_numpy(dtype=np.float64)
+    total = portfolio["total"].to_numpy(dtype=np.float64)
+    n = len(position)
+    if n == 0:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+
+    held = position > 0
+    was_held = np.concatenate(([False], held[:-1]))
+    entries = np.flatnonzero(held & ~was_held)
+    exits = np.flatnonzero(~held & was_held)
+    if len(entries) == 0:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+    is_open = np.zeros(len(entries), dtype=bool)
+    if len(exits) < len(entries):
+        exits = np.append(exits, n - 1)
+        is_open[-1] = True
+
+    # Equity just before each entry (flat, so it is all cash)
+    start_cash = float(initial_capital) if initial_capital is not None else total[0]
+    cash_before = np.concatenate(([start_cash], cash[:-1]))
+    equity_before = np.concatenate(([start_cash], total[:-1]))
+
+    # Cash spent on buys within each trade: outflows summed per segment starting at each entry
+    outflow = np.maximum(cash_before - cash, 0.0)
+    cost = np.add.reduceat(outflow, entries)
+    shares = np.maximum.reduceat(position, entries)
+
+    pnl = total[exits] - equity_before[entries]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.where(cost > 0, pnl / cost, 0.0)
+
+    entry_time = index[entries]
+    exit_time = index[exits]
+    return pd.DataFrame({
+        "entry_time": entry_time,
+        "exit_time": exit_time,
+        "entry_price": price[entries],
+        "exit_price": price[exits],
+        "shares": shares,
+        "cost": cost,
+        "pnl": pnl,
+        "return": ret,
+        "bars_held": exits - entries,
+        "duration": exit_time - entry_time,
+        "open": is_open,
+    })
+
+
+def trade_stats(ledger):
+    """
+    Aggregate statistics over a trade ledger:
+    trades, win_rate, profit_factor, avg_win, avg_loss, expectancy (mean pnl per trade),
+    avg_return and avg_bars_held. Losses are reported as negative numbers.
+    """
+    pnl = ledger["pnl"].to_numpy(dtype=np.float64)
+    n = len(pnl)
+    if n == 0:
+        return {
+            "trades": 0, "win_rate": 0.0, "profit_factor": 0.0, "avg_win": 0.0,
+            "avg_loss": 0.0, "expectancy": 0.0, "avg_return": 0.0, "avg_bars_held": 0.0,
+        }
+    wins = pnl > 0
+    losses = pnl < 0
+    gross_profit = pnl[wins].sum()
+    gross_loss = -pnl[losses].sum()
+    if gross_loss > 0:
+        profit_factor = gross_profit / gross_loss
+    else:
+        profit_factor = float("inf") if gross_profit > 0 else 0.0
+    return {
+        "trades": n,
+        "win_rate": float(wins.sum() / n),
+        "profit_factor": float(profit_factor),
+        "avg_win": float(pnl[wins].mean()) if wins.any() else 0.0,
+        "avg_loss": float(pnl[losses].mean()) if losses.any() else 0.0,
+        "expectancy": float(pnl.mean()),
+        "avg_return": float(ledger["return"].to_numpy(dtype=np.float64).mean()),
+        "avg_bars_held": float(ledger["bars_held"].to_numpy(dtype=np.float64).mean()),
+    }
@@ -0,0 +1,96 @@
+# data/async_loader.py
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from data.data_service import DataService
+
+
+class AsyncDataLoader:
+    """
+    asyncio front end for DataService with its own source configuration.
+
+        loader = AsyncDataLoader(SourceConfig("CSV File", csv_path="prices.csv"))
+        df = await loader.load_data_async("AAPL", "2020-01-01", "2024-01-01", timeout=30)
+        frames = await loader.load_many(["AAPL", "MSFT"], "2020-01-01", "2024-01-01")
+
+    Provider calls are blocking, so they run on a thread pool. Each request gets
+    a threading.Event that is set when its coroutine is cancelled or times out,
+    or by cancel_all(); the load then stops at the next rate-limit or backoff
+    wait. A provider call that is already running finishes but is discarded.
+    Two loaders with different configs can run at the same time; they share
+    DataService's caches and per-source rate limits.
+    """
+
+    def __init__(self, config=None, max_workers=8, timeout=None):
+        self.config = config or DataService.get_source_config()
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-load")
+        self._lock = threading.Lock()
+        self._events = set()
+
+    async def load_data_async(self, ticker, start, end, interval="1d", timeout=None):
+        """
+        Load one ticker (like DataService.load_timeframe). Raises asyncio.TimeoutError
+        after timeout seconds (default: the loader's timeout; None waits indefinitely).
+        """
+        cancel_event = threading.Event()
+        with self._lock:
+            self._events.add(cancel_event)
+        call = functools.partial(
+            DataService.load_timeframe, ticker, start, end, interval,
+            config=self.config, cancel_event=cancel_event
+        )
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, call)
+            return await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            cancel_event.set()
+            raise
+        finally:
+            with self._lock:
+                self._events.discard(cancel_event)
+
+    async def load_many(self, tickers, start, end, interval="1d", timeout=None):
+        """
+        Load tickers concurrently (bounded by the pool and per-source rate limits).
+        Returns {ticker: DataFrame}; tickers that failed or timed out map to an empty frame.
+        """
+        results = await asyncio.gather(
+            *(self.load_data_async(t, start, end, interval, timeout) for t in tickers),
+            return_exceptions=True
+        )
+        frames = {}
+        for ticker, result in zip(tickers, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                print(f"Failed to load data for {ticker}: {result!r}")
+                result = pd.DataFrame()
+            frames[ticker] = result
+        return frames
+
+    def cancel_all(self):
+        """Ask every in-flight load to stop at its next wait point."""
+        with self._lock:
+            events = list(self._events)
+        for event in events:
+            event.set()
+
+    def close(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+
+
+async def load_data_async(ticker, start, end, interval="1d", timeout=None, config=None):
+    """One-off async load with the default (or given) source config."""
+    loader = AsyncDataLoader(config)
+    try:
+        return await loader.load_data_async(ticker, start, end, interval, timeout)
+    finally:
+        loader.close()
@@ -0,0 +1,208 @@
+# data/bundle.py
+
+import json
+import os
+import threading
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from data.normalize import CANONICAL_COLUMNS
+
+BUNDLE_VERSION = 1
+BUNDLE_EXTENSION = ".npz"
+META_MEMBER = "__meta__"
+CALENDAR_MEMBER = "__calendar__"
+
+
+def _member(ticker, column):
+    return f"{ticker}/{column}"
+
+
+def _nanoseconds(index):
+    # pandas may store timestamps in s/ms/us; the calendar is always ns
+    return pd.DatetimeIndex(index).as_unit("ns").asi8
+
+
+def write_bundle(path, frames, source="", timeframe="1d"):
+    """
+    Write normalized OHLCV frames ({ticker: DataFrame}) as one compressed bundle.
+
+    Layout (a zip of .npy arrays, each deflated separately, so readers can pull
+    single columns without touching the rest):
+        __meta__             JSON: version, source, timeframe, columns, and per
+                             ticker the row count, first/last date and columns
+        __calendar__         int64 ns timestamps: the union of all tickers' bars
+        <TICKER>/__rows__    int32 positions of the ticker's bars in the calendar
+        <TICKER>/<Column>    one array per column, in the frame's own dtype
+
+    The file is written to a temporary name and moved into place, so a reader
+    never sees a half-written bundle. Returns the metadata dict.
+    """
+    frames = {ticker: df for ticker, df in frames.items() if df is not None and not df.empty}
+    calendar = np.unique(np.concatenate([_nanoseconds(df.index) for df in frames.values()])) if frames else np.array([], np.int64)
+
+    arrays = {CALENDAR_MEMBER: calendar}
+    tickers = {}
+    for ticker, df in frames.items():
+        columns = [c for c in CANONICAL_COLUMNS if c in df.columns]
+        arrays[_member(ticker, "__rows__")] = np.searchsorted(calendar, _nanoseconds(df.index)).astype(np.int32)
+        for column in columns:
+            arrays[_member(ticker, column)] = df[column].to_numpy()
+        tickers[ticker] = {
+            "rows": len(df),
+            "first": str(df.index[0].date() if timeframe == "1d" else df.index[0]),
+            "last": str(df.index[-1].date() if timeframe == "1d" else df.index[-1]),
+            "columns": columns,
+        }
+
+    meta = {
+        "version": BUNDLE_VERSION,
+        "created": time.time(),
+        "source": source,
+        "timeframe": timeframe,
+        "calendar": {
+            "bars": len(calendar),
+            "first": str(pd.Timestamp(calendar[0])) if len(calendar) else None,
+            "last": str(pd.Timestamp(calendar[-1])) if len(calendar) else None,
+        },
+        "tickers": tickers,
+    }
+    arrays[META_MEMBER] = np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+    return meta
+
+
+class Bundle:
+    """
+    Read side of a bundle written by write_bundle.
+
+        bundle = Bundle("universe.npz")
+        bundle.tickers()
+        df = bundle.load("AAPL", "2020-01-01", "2024-01-01", columns=["Close"])
+
+    Opening reads only the zip directory and the metadata; the calendar is read
+    on first use and each (ticker, column) array only when it is asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._npz = np.load(path, allow_pickle=False)
+        self._lock = threading.Lock()  # the zip handle is shared by all reads
+        self.meta = json.loads(self._npz[META_MEMBER].tobytes().decode())
+        if self.meta.get("version") != BUNDLE_VERSION:
+            self._npz.close()
+            raise ValueError(f"{path}: unsupported bundle version {self.meta.get('version')}")
+        self._calendar = None
+
+    @property
+    def timeframe(self):
+        return self.meta["timeframe"]
+
+    def tickers(self):
+        return list(self.meta["tickers"])
+
+    def __contains__(self, ticker):
+        return ticker in self.meta["tickers"]
+
+    def info(self, ticker):
+        return self.meta["tickers"].get(ticker)
+
+    def _read(self, member):
+        with self._lock:
+            return self._npz[member]
+
+    @property
+    def calendar(self):
+        """DatetimeIndex of every bar in the bundle (the union across tickers)."""
+        if self._calendar is None:
+            self._calendar = pd.DatetimeIndex(self._read(CALENDAR_MEMBER).view("datetime64[ns]"))
+        return self._calendar
+
+    def load(self, ticker, start=None, end=None, columns=None):
+        """
+        The ticker's bars between start and end (inclusive) as a normalized frame,
+        reading only the requested columns. Empty if the ticker is not in the bundle.
+        """
+        info = self.info(ticker)
+        if info is None:
+            return pd.DataFrame(columns=columns or ["Open", "High", "Low", "Close", "Volume"])
+        rows = self._read(_member(ticker, "__rows__"))
+        index = self.calendar[rows]
+        lo = index.searchsorted(pd.Timestamp(start)) if start else 0
+        hi = index.searchsorted(pd.Timestamp(end), side="right") if end else len(index)
+        wanted = [c for c in info["columns"] if columns is None or c in columns]
+        data = {column: self._read(_member(ticker, column))[lo:hi] for column in wanted}
+        df = pd.DataFrame(data, index=index[lo:hi])
+        df.index.name = "Date"
+        return df
+
+    def close(self):
+        self._npz.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_open_bundles = {}  # path -> (mtime, Bundle)
+_open_lock = threading.Lock()
+
+
+def open_bundle(path):
+    """Shared Bundle for path, reopened if the file has been replaced since."""
+    mtime = os.path.getmtime(path)
+    with _open_lock:
+        entry = _open_bundles.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        bundle = Bundle(path)
+        _open_bundles[path] = (mtime, bundle)
+    if entry is not None:
+        entry[1].close()
+    return bundle
+
+
+def is_bundle(path):
+    """True if path looks like a bundle (a zip holding bundle metadata)."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return META_MEMBER + ".npy" in zf.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def ingest(tickers, start, end, path, timeframe="1d", load_fn=None, source=None, on_progress=None):
+    """
+    Load a universe once through DataService (or load_fn(ticker, start, end)) and
+    write it as a bundle. Returns (meta, missing tickers).
+    """
+    if load_fn is None:
+        from data.data_service import DataService
+
+        def load_fn(ticker, start, end):
+            return DataService.load_timeframe(ticker, start, end, timeframe)
+
+        source = source or DataService.get_data_source()
+    frames = {}
+    missing = []
+    for i, ticker in enumerate(tickers, 1):
+        df = load_fn(ticker, start, end)
+        if df is None or df.empty:
+            missing.append(ticker)
+        else:
+            frames[ticker] = df
+        if on_progress:
+            on_progress(i, len(tickers), ticker)
+    meta = write_bundle(path, frames, source=source or "", timeframe=timeframe)
+    return meta, missing
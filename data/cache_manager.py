@@ -0,0 +1,292 @@
+# data/cache_manager.py
+
+import collections
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+# Seconds before a cached range that includes today goes stale, per data source.
+# Ranges that end before today are complete history and never expire.
+DEFAULT_TTLS = {
+    "yfinance": 15 * 60,
+    "investing.com": 60 * 60,
+    "Custom": 15 * 60,
+    "CSV File": None,   # keyed by file mtime instead, see DataService.cache_key
+}
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class CacheManager:
+    """
+    On-disk cache of normalized price frames with expiry, a size cap and LRU eviction.
+    DataService also keeps memoized backtest runs in one (see core.run_cache).
+
+    Each entry is a pickle file named by a hash of its key; index.json records
+    source, end date, size and last access for every entry. All files are
+    written to a temp file and os.replace()d into place, so a crash never leaves
+    a half-written entry behind.
+
+    Several processes (--processes, local sweep workers) may share a directory.
+    Saving the index takes a lock file, re-reads index.json and merges it with
+    this process's view before writing. Entry files no index knows about are
+    counted as stale entries, so the size cap holds across processes.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self.evictions = 0
+        self._lock = threading.RLock()
+        self._removed = {}  # name -> time, removals not yet merged into index.json
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._load_index()
+
+    # ------------------------------------------------------------ public API
+
+    def get(self, key, source):
+        """Return the cached frame for key, or None if missing or expired."""
+        name = self._name(key)
+        with self._lock:
+            meta = self._index.get(name)
+            if meta is None or not self._is_fresh(meta):
+                if meta is not None:
+                    self._remove(name)
+                    self._save_index()
+                self.misses[source] += 1
+                return None
+            try:
+                with open(self._path(name), "rb") as f:
+                    df = pickle.load(f)
+            except FileNotFoundError:
+                # Evicted by another process sharing the directory
+                self._remove(name)
+                self.misses[source] += 1
+                return None
+            except Exception as e:
+                print(f"Discarding unreadable cache entry: {e}")
+                self._remove(name)
+                self._save_index()
+                self.misses[source] += 1
+                return None
+            meta["last_access"] = time.time()
+            self.hits[source] += 1
+            return df
+
+    def contains(self, key):
+        """True if a fresh entry exists for key (does not count as a hit or miss)."""
+        with self._lock:
+            meta = self._index.get(self._name(key))
+            return meta is not None and self._is_fresh(meta)
+
+    def put(self, key, source, end, df, tag=None):
+        """
+        Store a frame (or any picklable result); evicts least-recently-used entries
+        if over the size cap. Entries put with a tag can be dropped together by discard.
+        """
+        name = self._name(key)
+        payload = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._atomic_write(self._path(name), payload)
+            now = time.time()
+            self._index[name] = {
+                "source": source,
+                "end": str(end) if end else None,
+                "size": len(payload),
+                "created": now,
+                "last_access": now,
+            }
+            if tag is not None:
+                self._index[name]["tag"] = tag
+            self._removed.pop(name, None)
+            self._save_index()
+
+    def discard(self, tag):
+        """Remove every entry put with tag, including ones written by other processes."""
+        with self._lock:
+            with self._index_lock():
+                self._index = self._merge(self._load_index())
+            for name in [n for n, meta in self._index.items() if meta.get("tag") == tag]:
+                self._remove(name)
+            self._save_index()
+
+    def clear(self):
+        with self._lock:
+            for name in list(self._index):
+                self._remove(name)
+            self._save_index()
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(meta["size"] for meta in self._index.values())
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._save_index()
+
+    def flush(self):
+        """Persist last-access times (they are updated in memory on every hit)."""
+        with self._lock:
+            self._save_index()
+
+    def stats(self):
+        """Hit rate and usage, overall and per source."""
+        with self._lock:
+            sources = set(self.hits) | set(self.misses)
+            per_source = {}
+            for source in sources:
+                total = self.hits[source] + self.misses[source]
+                per_source[source] = {
+                    "hits": self.hits[source],
+                    "misses": self.misses[source],
+                    "hit_rate": self.hits[source] / total if total else 0.0,
+                }
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "entries": len(self._index),
+                "bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "evictions": self.evictions,
+                "sources": per_source,
+            }
+
+    # ------------------------------------------------------------ internals
+
+    def _is_fresh(self, meta):
+        if meta.get("orphan"):
+            return False
+        end = meta.get("end")
+        try:
+            if end and datetime.date.fromisoformat(end[:10]) < datetime.date.today():
+                return True     # closed historical range
+        except ValueError:
+            pass
+        ttl = self.ttls.get(meta.get("source"))
+        return ttl is None or time.time() - meta["created"] < ttl
+
+    def _evict(self):
+        total = sum(meta["size"] for meta in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for name in sorted(self._index, key=lambda n: self._index[n]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[name]["size"]
+            self._remove(name)
+            self.evictions += 1
+
+    def _remove(self, name):
+        self._index.pop(name, None)
+        self._removed[name] = time.time()
+        try:
+            os.remove(self._path(name))
+        except OSError:
+            pass
+
+    @staticmethod
+    def _name(key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.pkl")
+
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path()) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose files are gone
+        return {n: m for n, m in index.items() if os.path.exists(self._path(n))}
+
+    @contextlib.contextmanager
+    def _index_lock(self):
+        """Exclusive lock on the index across processes (a no-op where file locks are unavailable)."""
+        with open(os.path.join(self.directory, "index.lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _merge(self, disk):
+        """This process's index combined with what other processes have written."""
+        merged = {}
+        for name, meta in disk.items():
+            removed = self._removed.get(name)
+            if removed is not None and meta["created"] <= removed:
+                continue    # we removed it (expired, unreadable or evicted) after it was written
+            merged[name] = meta
+        for name, meta in self._index.items():
+            other = merged.get(name)
+            if other is None or meta["created"] > other["created"]:
+                merged[name] = meta
+            elif meta["created"] == other["created"] and meta["last_access"] > other["last_access"]:
+                merged[name] = meta
+        try:
+            on_disk = {f[:-4] for f in os.listdir(self.directory) if f.endswith(".pkl")}
+        except OSError:
+            return merged
+        # Entries another process has evicted since are gone from the directory
+        merged = {name: meta for name, meta in merged.items() if name in on_disk}
+        # Files a process wrote but never got into the index (it crashed, or an
+        # older version overwrote the index) still take space: count them as stale
+        for name in on_disk - set(merged):
+            try:
+                stat = os.stat(self._path(name))
+            except OSError:
+                continue
+            merged[name] = {
+                "source": None, "end": None, "size": stat.st_size,
+                "created": stat.st_mtime, "last_access": stat.st_mtime, "orphan": True,
+            }
+        return merged
+
+    def _save_index(self):
+        """Merge with index.json under the lock, enforce the size cap, write the result."""
+        with self._index_lock():
+            self._index = self._merge(self._load_index())
+            self._evict()
+            self._atomic_write(self._index_path(), json.dumps(self._index).encode())
+            self._removed.clear()
+
+    @staticmethod
+    def _atomic_write(path, payload):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)
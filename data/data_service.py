@@ -1,49 +1,281 @@
+import collections
 import os
+import shutil
+import threading
 import webbrowser
 import pandas as pd
 import yfinance as yf
 import investpy
 from PyQt5.QtCore import QStandardPaths
+from data.normalize import normalize_ohlcv
+from data.cache_manager import CacheManager, DEFAULT_MAX_BYTES
+from data.fetch_scheduler import FetchScheduler, FetchCancelled, RateLimitError, is_throttled
+from data.resample import ResamplePyramid, finer_timeframes, resample_ohlcv
+from data.bundle import open_bundle
 
-class DataService:
-    _data_source = "yfinance"  # Default source
-    _csv_path = None
-    _investing_country = "united states"  # Default country for investpy
-    _custom_api_endpoint = None
-    _custom_api_key = None
 
-    @staticmethod
-    def set_data_source(source, csv_path=None, investing_country=None, custom_api_endpoint=None, custom_api_key=None):
-        DataService._data_source = source
+class SourceConfig:
+    """
+    Where and how to load prices from. DataService's static methods use a
+    process-wide default (set_data_source); pass a SourceConfig explicitly to
+    load from another source at the same time, e.g. with AsyncDataLoader.
+    """
+
+    def __init__(self, source="yfinance", csv_path=None, investing_country="united states",
+                 custom_api_endpoint=None, custom_api_key=None, bundle_path=None):
+        self.source = source
+        self.csv_path = csv_path
+        self.investing_country = investing_country
+        self.custom_api_endpoint = custom_api_endpoint
+        self.custom_api_key = custom_api_key
+        self.bundle_path = bundle_path
+
+    def with_source(self, source, csv_path=None, investing_country=None, custom_api_endpoint=None, custom_api_key=None,
+                    bundle_path=None):
+        """A copy switched to source, keeping this config's other settings unless given."""
+        config = SourceConfig(
+            source, self.csv_path, self.investing_country, self.custom_api_endpoint, self.custom_api_key,
+            self.bundle_path
+        )
         if source == "CSV File" and csv_path:
-            DataService._csv_path = csv_path
+            config.csv_path = csv_path
+        if source == "Bundle" and bundle_path:
+            config.bundle_path = bundle_path
         if source == "investing.com" and investing_country:
-            DataService._investing_country = investing_country
+            config.investing_country = investing_country
         if source == "Custom" and custom_api_endpoint and custom_api_key:
-            DataService._custom_api_endpoint = custom_api_endpoint
-            DataService._custom_api_key = custom_api_key
+            config.custom_api_endpoint = custom_api_endpoint
+            config.custom_api_key = custom_api_key
+        return config
+
+
+MEMORY_CACHE_BYTES = 256 * 1024 * 1024
+BUDGET_CACHE_FRACTION = 0.25  # share of a run's memory budget the in-memory frame cache may use
+RUN_STORE_FRACTION = 0.25  # share of the cache size limit memoized backtest runs may use; bars get the rest
+
+
+class DataService:
+    _config = SourceConfig()  # default source; replaced, never mutated, so in-flight loads keep theirs
+    _cache = collections.OrderedDict()  # cache_key -> normalized DataFrame (shared; treat as read-only), LRU order
+    _memory_bytes = 0
+    _memory_max_bytes = MEMORY_CACHE_BYTES  # in-memory frames beyond this are dropped (still on disk)
+    _cache_lock = threading.Lock()
+    _cache_dir = None  # custom cache location; None = platform cache dir
+    _cache_max_bytes = DEFAULT_MAX_BYTES
+    _disk_cache = None  # CacheManager, created on first use
+    _run_store = None  # CacheManager for core.run_cache.RunCache, created on first use
+    _scheduler = FetchScheduler()  # per-source rate limits, retries and in-flight dedupe
+    _pyramids = {}  # base cache_key -> ResamplePyramid of coarser timeframes; lives as long as its base in _cache
+    _pyramid_bytes = {}  # base cache_key -> bytes of that pyramid's coarser levels (counted in _memory_bytes)
+
+    @staticmethod
+    def set_data_source(source, csv_path=None, investing_country=None, custom_api_endpoint=None, custom_api_key=None,
+                        bundle_path=None):
+        DataService._config = DataService._config.with_source(
+            source, csv_path, investing_country, custom_api_endpoint, custom_api_key, bundle_path
+        )
+
+    @staticmethod
+    def get_source_config():
+        return DataService._config
+
+    @staticmethod
+    def set_rate_limit(source, rate=None, burst=None, max_concurrency=None):
+        """Override a provider's requests/second, burst and parallel request cap."""
+        DataService._scheduler.configure(source, rate=rate, burst=burst, max_concurrency=max_concurrency)
 
     @staticmethod
     def get_data_source():
-        return DataService._data_source
+        return DataService._config.source
 
     @staticmethod
     def get_cache_path():
-        cache_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "quantback_cache")
+        cache_dir = DataService._cache_dir or os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "quantback_cache"
+        )
         os.makedirs(cache_dir, exist_ok=True)
         return cache_dir
 
+    @staticmethod
+    def set_cache_dir(directory):
+        """Move the cache to directory (None = platform default). Existing entries stay where they were."""
+        with DataService._cache_lock:
+            DataService._cache_dir = directory or None
+            DataService._disk_cache = None
+            DataService._run_store = None
+
+    @staticmethod
+    def set_cache_limit(max_bytes):
+        """Cap on the whole on-disk cache, shared between bars and stored runs (RUN_STORE_FRACTION)."""
+        with DataService._cache_lock:
+            DataService._cache_max_bytes = max_bytes
+            disk_cache, run_store = DataService._disk_cache, DataService._run_store
+        if disk_cache is not None:
+            disk_cache.set_max_bytes(DataService._bars_max_bytes())
+        if run_store is not None:
+            run_store.set_max_bytes(DataService._runs_max_bytes())
+
+    @staticmethod
+    def get_cache_limit():
+        return DataService._cache_max_bytes
+
+    @staticmethod
+    def _runs_max_bytes():
+        return int(DataService._cache_max_bytes * RUN_STORE_FRACTION)
+
+    @staticmethod
+    def _bars_max_bytes():
+        return DataService._cache_max_bytes - DataService._runs_max_bytes()
+
+    @staticmethod
+    def disk_cache():
+        """The CacheManager holding normalized bars under <cache path>/bars."""
+        with DataService._cache_lock:
+            if DataService._disk_cache is None:
+                DataService._disk_cache = CacheManager(
+                    os.path.join(DataService.get_cache_path(), "bars"),
+                    max_bytes=DataService._bars_max_bytes()
+                )
+            return DataService._disk_cache
+
+    @staticmethod
+    def run_store():
+        """The CacheManager holding memoized backtest runs under <cache path>/runs."""
+        with DataService._cache_lock:
+            if DataService._run_store is None:
+                DataService._run_store = CacheManager(
+                    os.path.join(DataService.get_cache_path(), "runs"),
+                    max_bytes=DataService._runs_max_bytes()
+                )
+            return DataService._run_store
+
+    @staticmethod
+    def cache_stats():
+        return DataService.disk_cache().stats()
+
+    @staticmethod
+    def run_store_stats():
+        return DataService.run_store().stats()
+
     @staticmethod
     def cache_data():
-        # Placeholder for actual caching logic
-        return True
+        # Loads are written through to disk as they happen; this persists access times for LRU
+        try:
+            DataService.disk_cache().flush()
+            return True
+        except OSError as e:
+            print(f"Failed to write cache index: {e}")
+            return False
+
+    @staticmethod
+    def cache_key(ticker, start, end, interval="1d", config=None):
+        """Identifies one load: the source and its settings plus the request."""
+        config = config or DataService._config
+        csv_mtime = None
+        if config.source == "CSV File" and config.csv_path:
+            try:
+                csv_mtime = os.path.getmtime(config.csv_path)
+            except OSError:
+                pass
+        bundle = ()
+        if config.source == "Bundle" and config.bundle_path:
+            try:
+                bundle = (config.bundle_path, os.path.getmtime(config.bundle_path))
+            except OSError:
+                bundle = (config.bundle_path, None)
+        return (
+            config.source, config.csv_path, csv_mtime, config.investing_country,
+            config.custom_api_endpoint, ticker, str(start), str(end)
+        ) + ((interval,) if interval != "1d" else ()) + bundle
+
+    @staticmethod
+    def get_cached(ticker, start, end, interval="1d", config=None):
+        key = DataService.cache_key(ticker, start, end, interval, config)
+        with DataService._cache_lock:
+            df = DataService._cache.get(key)
+            if df is not None:
+                DataService._cache.move_to_end(key)
+            return df
+
+    @staticmethod
+    def put_cached(ticker, start, end, df, interval="1d", config=None):
+        """Keep df in memory, dropping least-recently-used frames past the memory cap."""
+        key = DataService.cache_key(ticker, start, end, interval, config)
+        size = int(df.memory_usage(index=True).sum())
+        with DataService._cache_lock:
+            previous = DataService._cache.pop(key, None)
+            if previous is not None:
+                DataService._memory_bytes -= int(previous.memory_usage(index=True).sum())
+            DataService._cache[key] = df
+            DataService._memory_bytes += size
+            DataService._trim_memory(keep=1)
+
+    @staticmethod
+    def _trim_memory(keep):
+        """
+        Drop least-recently-used frames, with the resample pyramids built on them,
+        until under the memory cap or only `keep` remain. Call with _cache_lock held.
+        """
+        while DataService._memory_bytes > DataService._memory_max_bytes and len(DataService._cache) > keep:
+            key, dropped = DataService._cache.popitem(last=False)
+            DataService._memory_bytes -= int(dropped.memory_usage(index=True).sum())
+            DataService._pyramids.pop(key, None)
+            DataService._memory_bytes -= DataService._pyramid_bytes.pop(key, 0)
+
+    @staticmethod
+    def set_memory_limit(max_bytes=None):
+        """
+        Cap on frames held in memory, resample pyramids included; large universes
+        stream through it in LRU order. None restores the default. Frames over a
+        lowered cap are dropped now.
+        """
+        with DataService._cache_lock:
+            DataService._memory_max_bytes = MEMORY_CACHE_BYTES if max_bytes is None else max_bytes
+            DataService._trim_memory(keep=0)
+
+    @staticmethod
+    def fit_memory_budget(budget_bytes):
+        """Size the in-memory frame cache for a run's memory budget (None = no budget, default cap)."""
+        if not budget_bytes:
+            DataService.set_memory_limit(None)
+        else:
+            DataService.set_memory_limit(min(MEMORY_CACHE_BYTES, int(budget_bytes * BUDGET_CACHE_FRACTION)))
+
+    @staticmethod
+    def release_memory():
+        """Drop every in-memory frame and resample pyramid (disk entries stay). Returns bytes released."""
+        with DataService._cache_lock:
+            released = DataService._memory_bytes
+            DataService._cache.clear()
+            DataService._pyramids.clear()
+            DataService._pyramid_bytes.clear()
+            DataService._memory_bytes = 0
+        return released
+
+    @staticmethod
+    def is_cached(ticker, start, end, interval="1d", config=None):
+        """True if a load would be served from memory or a fresh disk entry, without loading it."""
+        if DataService.get_cached(ticker, start, end, interval, config) is not None:
+            return True
+        return DataService.disk_cache().contains(DataService.cache_key(ticker, start, end, interval, config))
 
     @staticmethod
     def clear_cache():
+        with DataService._cache_lock:
+            DataService._cache.clear()
+            DataService._memory_bytes = 0
+            DataService._pyramids.clear()
+            DataService._pyramid_bytes.clear()
+            DataService._disk_cache = None
+            DataService._run_store = None
         path = DataService.get_cache_path()
         try:
             for file in os.listdir(path):
-                os.remove(os.path.join(path, file))
+                full = os.path.join(path, file)
+                if os.path.isdir(full):
+                    shutil.rmtree(full)
+                else:
+                    os.remove(full)
             return True, None
         except Exception as e:
             return False, str(e)
@@ -57,60 +289,159 @@ class DataService:
         return False
 
     @staticmethod
-    def load_data(ticker, start, end):
-        if DataService._data_source == "yfinance":
-            df = yf.download(ticker, start=start, end=end)
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-            return df
-        elif DataService._data_source == "CSV File" and DataService._csv_path:
-            try:
-                df = pd.read_csv(DataService._csv_path, parse_dates=True, index_col=0)
-                # Optionally filter by ticker, start, end if present in CSV
-                if ticker in df.columns or "Ticker" in df.columns:
-                    # If multi-ticker CSV, filter here
-                    pass
-                # Optionally filter by date range
-                if start and end:
-                    df = df.loc[start:end]
+    def load_data(ticker, start, end, use_cache=True, interval="1d", config=None, cancel_event=None):
+        """
+        Load OHLCV data for a ticker from the configured source, normalized
+        by data.normalize.normalize_ohlcv. Returns an empty DataFrame on failure.
+
+        interval is the provider bar size (a data.resample.TIMEFRAMES name); to get
+        coarser bars from data already loaded at a finer one, use load_timeframe.
+
+        config overrides the default source (see SourceConfig). Setting cancel_event
+        abandons a load still waiting on rate limits or backoff; the result is empty.
+
+        Successful loads are kept in the in-memory cache (also filled by
+        data.prefetch.Prefetcher) and written through to the on-disk CacheManager;
+        cached frames are shared, so don't mutate them.
+        """
+        config = config or DataService._config
+        key = DataService.cache_key(ticker, start, end, interval, config)
+        if use_cache:
+            cached = DataService.get_cached(ticker, start, end, interval, config)
+            if cached is not None:
+                return cached
+            cached = None if config.source == "Bundle" else DataService.disk_cache().get(key, config.source)
+            if cached is not None:
+                DataService.put_cached(ticker, start, end, cached, interval, config)
+                return cached
+
+        df = DataService._load_raw(ticker, start, end, interval, config, cancel_event)
+        try:
+            df = normalize_ohlcv(df)
+        except (ValueError, TypeError) as e:
+            print(f"Failed to normalize data for {ticker}: {e}")
+            return pd.DataFrame()
+        if use_cache and not df.empty:
+            DataService.put_cached(ticker, start, end, df, interval, config)
+            if config.source == "Bundle":
+                # Already a compressed local copy; don't duplicate it in the bar cache
                 return df
-            except Exception as e:
-                print(f"Failed to load CSV: {e}")
-                return pd.DataFrame()
-        elif DataService._data_source == "investing.com":
             try:
-                # investpy expects date strings in 'dd/mm/yyyy' format
-                start_fmt = pd.to_datetime(start).strftime('%d/%m/%Y')
-                end_fmt = pd.to_datetime(end).strftime('%d/%m/%Y')
-                df = investpy.get_stock_historical_data(
-                    stock=ticker,
-                    country=DataService._investing_country,
-                    from_date=start_fmt,
-                    to_date=end_fmt
+                DataService.disk_cache().put(key, config.source, end, df)
+            except OSError as e:
+                print(f"Failed to write {ticker} to the disk cache: {e}")
+        return df
+
+    @staticmethod
+    def load_timeframe(ticker, start, end, timeframe="1d", config=None, cancel_event=None):
+        """
+        Load bars at `timeframe`, aggregated from the finest resolution already cached
+        for this request (memory or disk) if there is one, otherwise fetched at
+        `timeframe` directly. Aggregated levels are kept in a ResamplePyramid per
+        base load, so switching back and forth between timeframes is a lookup.
+        Pyramids count against the memory cap and go when their base frame does.
+        """
+        base_tf = next(
+            (tf for tf in finer_timeframes(timeframe) if DataService.is_cached(ticker, start, end, tf, config)),
+            timeframe
+        )
+        base_key = DataService.cache_key(ticker, start, end, base_tf, config)
+        with DataService._cache_lock:
+            pyramid = DataService._pyramids.get(base_key)
+        if pyramid is None:
+            base = DataService.load_data(
+                ticker, start, end, interval=base_tf, config=config, cancel_event=cancel_event
+            )
+            if base.empty:
+                return base
+            pyramid = ResamplePyramid(base, base_tf)
+            with DataService._cache_lock:
+                if base_key in DataService._cache:
+                    pyramid = DataService._pyramids.setdefault(base_key, pyramid)
+        bars = pyramid.get(timeframe)
+        with DataService._cache_lock:
+            # Only keep the pyramid while its base is cached; otherwise it's used once and dropped
+            if DataService._pyramids.get(base_key) is pyramid:
+                size = pyramid.memory_bytes()
+                DataService._memory_bytes += size - DataService._pyramid_bytes.get(base_key, 0)
+                DataService._pyramid_bytes[base_key] = size
+                DataService._cache.move_to_end(base_key)
+                DataService._trim_memory(keep=1)
+        return bars
+
+    @staticmethod
+    def _load_raw(ticker, start, end, interval, config, cancel_event=None):
+        """Fetch the provider frame through the rate-limited scheduler; empty on failure."""
+        key = DataService.cache_key(ticker, start, end, interval, config)
+        source = config.source
+        try:
+            return DataService._scheduler.fetch(
+                source, key, lambda: DataService._fetch_raw(ticker, start, end, interval, config), cancel_event
+            )
+        except FetchCancelled:
+            return pd.DataFrame()
+        except Exception as e:
+            print(f"Failed to load data for {ticker} from {source}: {e}")
+            return pd.DataFrame()
+
+    @staticmethod
+    def _fetch_raw(ticker, start, end, interval, config):
+        """One provider request. Errors propagate so the scheduler can retry throttling and 5xx."""
+        if config.source == "yfinance":
+            # yf.download only logs failures and returns an empty frame, so a throttled
+            # request would look like missing data; history(raise_errors=True) raises instead
+            try:
+                return yf.Ticker(ticker).history(
+                    start=start, end=end, interval=interval, actions=False, raise_errors=True
                 )
-                return df
             except Exception as e:
-                print(f"Failed to load data from investing.com: {e}")
-                return pd.DataFrame()
-        elif DataService._data_source == "Custom" and DataService._custom_api_endpoint and DataService._custom_api_key:
+                if is_throttled(e) or "Too Many Requests" in str(e):
+                    raise RateLimitError(str(e)) from e
+                raise
+        elif config.source == "CSV File" and config.csv_path:
+            df = pd.read_csv(config.csv_path, parse_dates=True, index_col=0)
+            # Optionally filter by ticker, start, end if present in CSV
+            if ticker in df.columns or "Ticker" in df.columns:
+                # If multi-ticker CSV, filter here
+                pass
+            # Optionally filter by date range
+            if start and end:
+                df = df.loc[start:end]
+            return df
+        elif config.source == "Bundle" and config.bundle_path:
+            bundle = open_bundle(config.bundle_path)
+            if interval == bundle.timeframe:
+                return bundle.load(ticker, start, end)
+            if bundle.timeframe not in finer_timeframes(interval):
+                raise ValueError(f"Bundle holds {bundle.timeframe} bars; cannot provide {interval}")
+            return resample_ohlcv(bundle.load(ticker, start, end), interval)
+        elif config.source == "investing.com":
+            if interval != "1d":
+                raise ValueError("investing.com only provides daily bars")
+            # investpy expects date strings in 'dd/mm/yyyy' format
+            start_fmt = pd.to_datetime(start).strftime('%d/%m/%Y')
+            end_fmt = pd.to_datetime(end).strftime('%d/%m/%Y')
+            return investpy.get_stock_historical_data(
+                stock=ticker,
+                country=config.investing_country,
+                from_date=start_fmt,
+                to_date=end_fmt
+            )
+        elif config.source == "Custom" and config.custom_api_endpoint and config.custom_api_key:
             import requests
+            params = {
+                "ticker": ticker,
+                "start": start,
+                "end": end,
+                "interval": interval,
+                "apikey": config.custom_api_key
+            }
+            response = requests.get(config.custom_api_endpoint, params=params)
+            response.raise_for_status()
+            # Try to parse as DataFrame
             try:
-                params = {
-                    "ticker": ticker,
-                    "start": start,
-                    "end": end,
-                    "apikey": DataService._custom_api_key
-                }
-                response = requests.get(DataService._custom_api_endpoint, params=params)
-                response.raise_for_status()
-                # Try to parse as DataFrame
-                try:
-                    df = pd.read_json(response.text)
-                except Exception:
-                    df = pd.DataFrame(response.json())
-                return df
-            except Exception as e:
-                print(f"Failed to load data from custom API: {e}")
-                return pd.DataFrame()
+                return pd.read_json(response.text)
+            except Exception:
+                return pd.DataFrame(response.json())
         else:
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
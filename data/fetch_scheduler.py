@@ -0,0 +1,244 @@
+# data/fetch_scheduler.py
+
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+# Requests per second (sustained), burst size and parallel requests per provider.
+# Sources not listed (e.g. CSV File) are not throttled.
+SOURCE_LIMITS = {
+    "yfinance": {"rate": 2.0, "burst": 5, "max_concurrency": 4},
+    "investing.com": {"rate": 0.5, "burst": 2, "max_concurrency": 1},
+    "Custom": {"rate": 5.0, "burst": 10, "max_concurrency": 4},
+}
+
+CANCEL_POLL = 0.1  # seconds between cancel_event checks while waiting on a shared fetch
+
+
+class RateLimitError(Exception):
+    """A provider refused a request because of throttling (HTTP 429 or equivalent)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FetchCancelled(Exception):
+    """The caller's cancel_event was set before the fetch completed."""
+
+
+def _status_code(exc):
+    response = getattr(exc, "response", None)
+    code = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    if code is None:
+        # investpy and others only put the status in the message ("ERR#0015: error 429, ...")
+        match = re.search(r"\b(?:error|status)[ :]+(\d{3})\b", str(exc), re.IGNORECASE)
+        code = int(match.group(1)) if match else None
+    return code
+
+
+def _retry_after(exc):
+    if isinstance(exc, RateLimitError):
+        return exc.retry_after
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc):
+    """True for throttling (429), server errors (5xx) and dropped connections."""
+    if isinstance(exc, RateLimitError) or "RateLimit" in type(exc).__name__:
+        return True
+    code = _status_code(exc)
+    if code is not None:
+        return code == 429 or 500 <= code < 600
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & {"ConnectionError", "Timeout", "TimeoutError"})
+
+
+def is_throttled(exc):
+    return isinstance(exc, RateLimitError) or "RateLimit" in type(exc).__name__ or _status_code(exc) == 429
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second up to `burst`, one token per request.
+
+    The rate adapts: throttle() halves it when the provider pushes back, and
+    each success creeps it back up towards the configured ceiling, so long
+    loads settle near the highest rate the provider actually tolerates.
+    """
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cancel_event=None):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if cancel_event is not None:
+                if cancel_event.wait(wait):
+                    raise FetchCancelled()
+            else:
+                time.sleep(wait)
+
+    def throttle(self):
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeed(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class FetchScheduler:
+    """
+    Runs provider fetches under per-source rate limits.
+
+        scheduler.fetch("yfinance", key, lambda: yf.download(...))
+
+    - a token bucket and a concurrency cap per source (SOURCE_LIMITS)
+    - retries with exponential backoff and jitter on 429/5xx/connection errors,
+      honouring Retry-After when the provider sends it
+    - identical requests (same key) in flight at the same time share one fetch
+    - an optional threading.Event cancels a request while it is queued on the
+      bucket, backing off or waiting on a shared fetch (a provider call already
+      running finishes first)
+    """
+
+    def __init__(self, limits=None, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        self.limits = dict(SOURCE_LIMITS)
+        self.limits.update(limits or {})
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._slots = {}
+        self._in_flight = {}  # key -> Future
+        self.retries = 0
+        self.deduped = 0
+
+    def configure(self, source, rate=None, burst=None, max_concurrency=None):
+        """Override the limits for one source (takes effect for new buckets)."""
+        with self._lock:
+            limits = dict(self.limits.get(source, {"rate": 1.0, "burst": 1, "max_concurrency": 1}))
+            for name, value in (("rate", rate), ("burst", burst), ("max_concurrency", max_concurrency)):
+                if value is not None:
+                    limits[name] = value
+            self.limits[source] = limits
+            self._buckets.pop(source, None)
+            self._slots.pop(source, None)
+
+    def _limiters(self, source):
+        with self._lock:
+            limits = self.limits.get(source)
+            if limits is None:
+                return None, None
+            if source not in self._buckets:
+                self._buckets[source] = TokenBucket(limits["rate"], limits["burst"])
+                self._slots[source] = threading.BoundedSemaphore(limits["max_concurrency"])
+            return self._buckets[source], self._slots[source]
+
+    def fetch(self, source, key, fn, cancel_event=None):
+        """
+        Call fn() under source's limits and return its result; raises the last error
+        on failure, or FetchCancelled if cancel_event is set first.
+        """
+        while True:
+            with self._lock:
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._in_flight[key] = future
+                else:
+                    self.deduped += 1
+            if owner:
+                break
+            try:
+                return self._wait(future, cancel_event)
+            except FetchCancelled:
+                # The request we joined was cancelled by its owner; try again unless we were too
+                if cancel_event is not None and cancel_event.is_set():
+                    raise
+
+        # Unregister before resolving, so a waiter that retries never rejoins this future
+        try:
+            result = self._fetch(source, fn, cancel_event)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+        return result
+
+    @staticmethod
+    def _wait(future, cancel_event=None):
+        """The shared fetch's result; FetchCancelled as soon as our own cancel_event is set."""
+        if cancel_event is None:
+            return future.result()
+        while True:
+            if cancel_event.is_set():
+                raise FetchCancelled()
+            try:
+                return future.result(timeout=CANCEL_POLL)
+            except FutureTimeout:
+                if future.done():
+                    raise   # the fetch itself failed with a timeout
+
+    def _fetch(self, source, fn, cancel_event=None):
+        bucket, slots = self._limiters(source)
+        for attempt in range(1, self.max_attempts + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise FetchCancelled()
+            if bucket is not None:
+                bucket.acquire(cancel_event)
+            try:
+                if slots is not None:
+                    with slots:
+                        result = fn()
+                else:
+                    result = fn()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_attempts:
+                    raise
+                if bucket is not None and is_throttled(e):
+                    bucket.throttle()
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                    delay *= random.uniform(0.5, 1.0)
+                self.retries += 1
+                print(f"{source} fetch failed ({e}); retry {attempt}/{self.max_attempts - 1} in {delay:.1f}s")
+                if cancel_event is not None:
+                    if cancel_event.wait(delay):
+                        raise FetchCancelled()
+                else:
+                    time.sleep(delay)
+                continue
+            if bucket is not None:
+                bucket.succeed()
+            return result
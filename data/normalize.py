@@ -0,0 +1,95 @@
+# data/normalize.py
+
+import numpy as np
+import pandas as pd
+
+# Lower-cased provider column name -> canonical name
+COLUMN_ALIASES = {
+    "open": "Open", "o": "Open",
+    "high": "High", "h": "High",
+    "low": "Low", "l": "Low",
+    "close": "Close", "c": "Close", "price": "Close", "last": "Close",
+    "adj close": "Adj Close", "adj_close": "Adj Close", "adjclose": "Adj Close", "adjusted_close": "Adj Close",
+    "volume": "Volume", "vol": "Volume", "v": "Volume",
+}
+
+CANONICAL_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+DATE_COLUMNS = ("date", "datetime", "timestamp", "time", "t")
+
+
+def normalize_ohlcv(df, price_dtype=np.float64):
+    """
+    Canonicalize a provider frame into the shape the rest of the app expects.
+
+    In one pass this:
+        - flattens yfinance-style MultiIndex columns
+        - maps provider column names (investpy, CSV, custom JSON) to Open/High/Low/Close/Adj Close/Volume
+          and drops everything else
+        - moves a date column into a tz-naive DatetimeIndex named "Date"
+        - sorts the index if needed and drops duplicate timestamps (keeping the last)
+        - casts prices to price_dtype and volume to int64 (float32 if it has gaps)
+
+    The result is a fresh frame, so callers can treat it as their own and skip defensive copies.
+
+    Raises:
+        ValueError if there is no Close column or the dates cannot be parsed
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+
+    columns = df.columns.get_level_values(0) if isinstance(df.columns, pd.MultiIndex) else df.columns
+
+    # Pick the source position for each canonical column (first match wins)
+    source = {}
+    date_pos = None
+    for pos, name in enumerate(columns):
+        key = str(name).strip().lower()
+        canonical = COLUMN_ALIASES.get(key)
+        if canonical and canonical not in source:
+            source[canonical] = pos
+        elif key in DATE_COLUMNS and date_pos is None:
+            date_pos = pos
+    if "Close" not in source:
+        raise ValueError(f"No Close column in {list(columns)}")
+
+    if date_pos is not None and not isinstance(df.index, pd.DatetimeIndex):
+        raw_index = df.iloc[:, date_pos]
+    else:
+        raw_index = df.index
+    index = raw_index if isinstance(raw_index, pd.DatetimeIndex) else pd.to_datetime(raw_index)
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+
+    # Order rows once: stable sort only when needed, then keep the last duplicate
+    order = None
+    if not index.is_monotonic_increasing:
+        order = np.argsort(index.asi8, kind="stable")
+        index = index[order]
+    keep = None
+    if index.has_duplicates:
+        keep = ~index.duplicated(keep="last")
+        index = index[keep]
+
+    data = {}
+    for name in CANONICAL_COLUMNS:
+        if name not in source:
+            continue
+        values = df.iloc[:, source[name]].to_numpy()
+        if order is not None:
+            values = values[order]
+        if keep is not None:
+            values = values[keep]
+        if name == "Volume":
+            values = pd.to_numeric(values, errors="coerce")
+            values = values.astype(np.int64) if not np.isnan(values).any() else values.astype(np.float32)
+        else:
+            values = pd.to_numeric(values, errors="coerce").astype(price_dtype, copy=False)
+        data[name] = values
+
+    out = pd.DataFrame(data, index=index)
+    out.index.name = "Date"
+    if not out.index.is_monotonic_increasing or out.index.has_duplicates:
+        raise ValueError("Normalized index is not strictly increasing")
+    return out
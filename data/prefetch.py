@@ -0,0 +1,94 @@
+# data/prefetch.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from data.data_service import DataService
+
+
+class Prefetcher:
+    """
+    Loads ticker data in a background thread pool while the user is still
+    entering inputs, so that MainWindow.run_backtest mostly hits warm data.
+
+    Each call to request() describes the complete set of tickers and dates the
+    user currently wants. Loads that are no longer wanted are cancelled: queued
+    ones never start, and running ones stop at their next rate-limit or backoff
+    wait (a provider call already in progress finishes and is cached).
+    """
+
+    def __init__(self, max_workers=4, load_fn=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        # load_fn(ticker, start, end, cancel_event=None), like DataService.load_data
+        self._load_fn = load_fn or DataService.load_data
+        # Re-entrant: cancelling a future runs its done-callback (_forget) on this thread
+        self._lock = threading.RLock()
+        self._in_flight = {}  # (ticker, start, end) -> Future
+        self._cancel_events = {}  # (ticker, start, end) -> threading.Event for the running load
+        self._generation = 0
+
+    def request(self, tickers, start, end):
+        """Prefetch these tickers for this date range, superseding earlier requests."""
+        if not start or not end:
+            return
+        wanted = {(t, start, end) for t in tickers}
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            for key, future in list(self._in_flight.items()):
+                if key not in wanted:
+                    self._in_flight.pop(key, None)
+                    self._cancel_events.pop(key, threading.Event()).set()
+                    future.cancel()
+            for key in wanted:
+                if key in self._in_flight or DataService.get_cached(*key) is not None:
+                    continue
+                cancel_event = threading.Event()
+                future = self._pool.submit(self._load, key, generation, cancel_event)
+                self._in_flight[key] = future
+                self._cancel_events[key] = cancel_event
+                future.add_done_callback(lambda f, k=key: self._forget(k, f))
+
+    def _load(self, key, generation, cancel_event):
+        with self._lock:
+            if generation != self._generation and key not in self._in_flight:
+                return None
+        return self._load_fn(*key, cancel_event=cancel_event)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+                self._cancel_events.pop(key, None)
+
+    def load(self, ticker, start, end):
+        """
+        Get data for one ticker: waits for an in-flight prefetch if there is one,
+        otherwise loads it directly (through the DataService cache).
+        """
+        with self._lock:
+            future = self._in_flight.get((ticker, start, end))
+        if future is not None and not future.cancelled():
+            try:
+                df = future.result()
+                if df is not None:
+                    return df
+            except Exception as e:
+                print(f"Prefetch of {ticker} failed: {e}")
+        return self._load_fn(ticker, start, end)
+
+    def cancel_all(self):
+        with self._lock:
+            self._generation += 1
+            futures = list(self._in_flight.values())
+            events = list(self._cancel_events.values())
+            self._in_flight.clear()
+            self._cancel_events.clear()
+            for event in events:
+                event.set()
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,95 @@
+# data/resample.py
+
+import threading
+
+import pandas as pd
+
+# Supported bar sizes, finest first, as pandas offsets. Names match yfinance intervals.
+TIMEFRAMES = {
+    "1m": "1min",
+    "5m": "5min",
+    "15m": "15min",
+    "30m": "30min",
+    "1h": "1h",
+    "1d": "1D",
+}
+
+# How each canonical column aggregates into a coarser bar
+AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Adj Close": "last",
+    "Volume": "sum",
+}
+
+
+def timeframe_delta(timeframe):
+    return pd.Timedelta(TIMEFRAMES[timeframe])
+
+
+def finer_timeframes(timeframe):
+    """Timeframes that nest exactly into `timeframe` (including itself), finest first."""
+    target = timeframe_delta(timeframe)
+    return [tf for tf in TIMEFRAMES if target % timeframe_delta(tf) == pd.Timedelta(0)]
+
+
+def resample_ohlcv(df, timeframe):
+    """
+    Aggregate a normalized OHLCV frame (see data.normalize) to a coarser timeframe.
+
+    Bars are labelled by the start of their interval; intervals with no trades
+    (nights, weekends, halts) are dropped rather than forward-filled.
+    """
+    if df.empty:
+        return df
+    agg = {name: how for name, how in AGGREGATIONS.items() if name in df.columns}
+    out = df.resample(TIMEFRAMES[timeframe], label="left", closed="left").agg(agg)
+    out = out[out["Close"].notna()]
+    if "Volume" in out.columns and df["Volume"].dtype.kind == "i":
+        out["Volume"] = out["Volume"].astype(df["Volume"].dtype)
+    out.index.name = df.index.name
+    return out
+
+
+class ResamplePyramid:
+    """
+    Coarser views of one base frame, built on demand and kept.
+
+    Each level is aggregated from the coarsest level already built that nests
+    into it (e.g. 1h from 15m rather than from 1m). first/max/min/last/sum are
+    associative, so this gives exactly the same bars as aggregating the base
+    directly. After the first request, switching timeframe is a dict lookup.
+    """
+
+    def __init__(self, base, base_timeframe):
+        self.base_timeframe = base_timeframe
+        self._levels = {base_timeframe: base}
+        self._lock = threading.Lock()
+
+    def levels(self):
+        return list(self._levels)
+
+    def memory_bytes(self):
+        """Bytes held by the aggregated levels (the base frame is owned by the caller)."""
+        with self._lock:
+            return sum(
+                int(level.memory_usage(index=True).sum())
+                for tf, level in self._levels.items() if tf != self.base_timeframe
+            )
+
+    def get(self, timeframe):
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"Unknown timeframe '{timeframe}', expected one of {list(TIMEFRAMES)}")
+        if timeframe_delta(timeframe) < timeframe_delta(self.base_timeframe):
+            raise ValueError(f"Cannot build {timeframe} bars from {self.base_timeframe} data")
+        with self._lock:
+            level = self._levels.get(timeframe)
+            if level is None:
+                source = max(
+                    (tf for tf in self._levels if tf in finer_timeframes(timeframe)),
+                    key=timeframe_delta,
+                )
+                level = self._levels[timeframe] = resample_ohlcv(self._levels[source], timeframe)
+            return level
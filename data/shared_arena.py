@@ -0,0 +1,198 @@
+# data/shared_arena.py
+
+import atexit
+import multiprocessing
+import sys
+import uuid
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _attach_segment(name):
+    """Attach to an existing segment without letting this process's resource tracker unlink it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Child processes share their parent's tracker, where the owner already registered
+    # the segment. An unrelated process has its own tracker, which would unlink the
+    # segment when that process exits.
+    if multiprocessing.parent_process() is None:
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+def _release(segments, unlink):
+    for shm in segments:
+        try:
+            shm.close()
+        except Exception:
+            pass
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class PriceArena:
+    """
+    OHLCV prices for a whole universe packed into two shared-memory blocks:
+    a float64 values block (rows x columns) and an int64 block of timestamps.
+    Each ticker owns a contiguous row range.
+
+    The parent process creates the arena once (see from_loader) and passes the
+    small, picklable manifest to workers, which call PriceArena.attach(manifest)
+    and read zero-copy NumPy views by ticker.
+
+    Only the creating process unlinks the segments, on close() or at interpreter
+    exit, so they are not leaked if a run is interrupted. Attached arenas only close.
+    """
+
+    def __init__(self, manifest, segments, owner):
+        self.manifest = manifest
+        self._segments = segments
+        self.owner = owner
+        values_shm, dates_shm = segments
+        rows, cols = manifest["shape"]
+        self.values = np.ndarray((rows, cols), dtype=np.float64, buffer=values_shm.buf)
+        self.dates = np.ndarray((rows,), dtype=np.int64, buffer=dates_shm.buf)
+        # Runs on close(), garbage collection or interpreter exit, whichever comes first
+        self._finalizer = weakref.finalize(self, _release, segments, owner)
+
+    @classmethod
+    def create(cls, data, columns=None):
+        """
+        Pack a dict of ticker -> DataFrame into a new arena.
+        Missing columns are stored as NaN.
+        """
+        columns = list(columns or PRICE_COLUMNS)
+        frames = {t: df for t, df in data.items() if df is not None and not df.empty}
+        rows = sum(len(df) for df in frames.values())
+        prefix = f"canal_{uuid.uuid4().hex[:12]}"
+
+        values_shm = shared_memory.SharedMemory(name=f"{prefix}_v", create=True, size=max(rows * len(columns) * 8, 1))
+        try:
+            dates_shm = shared_memory.SharedMemory(name=f"{prefix}_d", create=True, size=max(rows * 8, 1))
+        except Exception:
+            _release([values_shm], True)
+            raise
+
+        manifest = {
+            "values": values_shm.name,
+            "dates": dates_shm.name,
+            "shape": (rows, len(columns)),
+            "columns": columns,
+            "tickers": {},
+        }
+        arena = cls(manifest, [values_shm, dates_shm], owner=True)
+
+        offset = 0
+        for ticker, df in frames.items():
+            n = len(df)
+            block = arena.values[offset:offset + n]
+            for j, col in enumerate(columns):
+                block[:, j] = df[col].to_numpy(dtype=np.float64) if col in df.columns else np.nan
+            arena.dates[offset:offset + n] = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+            manifest["tickers"][ticker] = (offset, n)
+            offset += n
+        return arena
+
+    @classmethod
+    def from_loader(cls, tickers, start, end, load_fn=None, columns=None):
+        """Load each ticker once (via DataService.load_data by default) and pack them into an arena."""
+        if load_fn is None:
+            from data.data_service import DataService
+            load_fn = DataService.load_data
+        data = {}
+        for ticker in tickers:
+            df = load_fn(ticker, start, end)
+            if df.empty:
+                print(f"Failed to load data for {ticker}")
+                continue
+            data[ticker] = df
+        return cls.create(data, columns)
+
+    @classmethod
+    def attach(cls, manifest):
+        """Attach to an arena created in another process."""
+        segments = [_attach_segment(manifest["values"])]
+        try:
+            segments.append(_attach_segment(manifest["dates"]))
+        except Exception:
+            _release(segments, False)
+            raise
+        return cls(manifest, segments, owner=False)
+
+    def tickers(self):
+        return list(self.manifest["tickers"])
+
+    def arrays(self, ticker):
+        """Zero-copy (dates, values) views for one ticker. Treat them as read-only."""
+        offset, n = self.manifest["tickers"][ticker]
+        return self.dates[offset:offset + n], self.values[offset:offset + n]
+
+    def frame(self, ticker):
+        """DataFrame for one ticker backed by the shared block (no copy of the values)."""
+        dates, values = self.arrays(ticker)
+        index = pd.DatetimeIndex(dates.view("datetime64[ns]"))
+        return pd.DataFrame(values, index=index, columns=self.manifest["columns"], copy=False)
+
+    def close(self):
+        """Release this process's mapping; the owner also unlinks the segments."""
+        self.values = None
+        self.dates = None
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Per-worker arena, attached once by the pool initializer
+_worker_arena = None
+
+
+def _init_worker(manifest):
+    global _worker_arena
+    _worker_arena = PriceArena.attach(manifest)
+    atexit.register(_worker_arena.close)
+
+
+def _backtest_ticker(ticker, strat_cfg, user_cfg):
+    from core.pipeline import run_ticker, compute_metrics
+    df = _worker_arena.frame(ticker)
+    portfolio = run_ticker(df, strat_cfg, user_cfg)
+    if portfolio is None:
+        return ticker, None
+    return ticker, {k: float(v) for k, v in compute_metrics(portfolio).items()}
+
+
+def parallel_backtest(arena, strat_cfg, user_cfg, processes=None):
+    """
+    Backtest every ticker in the arena across worker processes.
+    Workers attach to the shared blocks by name, so no price data is pickled per job.
+
+    Returns:
+        dict of ticker -> metrics
+    """
+    results = {}
+    tickers = arena.tickers()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(arena.manifest,)) as pool:
+        futures = [pool.submit(_backtest_ticker, t, strat_cfg, user_cfg) for t in tickers]
+        for future in futures:
+            ticker, metrics = future.result()
+            if metrics is not None:
+                results[ticker] = metrics
+    return results
@@ -0,0 +1,103 @@
+# data/universe.py
+
+import csv
+import os
+import re
+
+# Named universes are plain ticker lists (*.txt or *.csv) in this directory; the file stem is the name
+DEFAULT_UNIVERSE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "universes")
+
+# Optional leading ^ for indices (^GSPC, ^VIX); '=' for FX and futures (EURUSD=X, GC=F)
+TICKER_PATTERN = re.compile(r"^\^?[A-Z0-9][A-Z0-9.\-=]{0,14}$")
+TICKER_HEADERS = ("ticker", "tickers", "symbol", "symbols")
+
+
+def parse_tickers(text):
+    """
+    Tickers from free text: separated by commas, whitespace or newlines, '#' starts
+    a comment. Upper-cased and de-duplicated, keeping the first occurrence's order.
+    """
+    seen = {}
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        for token in re.split(r"[,\s;]+", line):
+            token = token.strip().strip('"\'').upper()
+            if token:
+                seen.setdefault(token, None)
+    return list(seen)
+
+
+def load_universe_file(path):
+    """
+    Read tickers from a .txt list or a .csv with a ticker/symbol column
+    (or the first column if there is no such header).
+    """
+    if not path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8") as f:
+            return parse_tickers(f.read())
+
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(h) for h in TICKER_HEADERS if h in header), None)
+    if column is None:
+        column, body = 0, rows
+    else:
+        body = rows[1:]
+    return parse_tickers("\n".join(row[column] for row in body if len(row) > column))
+
+
+def named_universes(directory=DEFAULT_UNIVERSE_DIR):
+    """{name: path} for the universe files in directory."""
+    if not os.path.isdir(directory):
+        return {}
+    return {
+        os.path.splitext(name)[0]: os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith((".txt", ".csv"))
+    }
+
+
+def load_universe(name_or_path, directory=DEFAULT_UNIVERSE_DIR):
+    """Tickers for a named universe or a path to a universe file."""
+    if os.path.exists(name_or_path):
+        return load_universe_file(name_or_path)
+    path = named_universes(directory).get(name_or_path)
+    if path is None:
+        raise ValueError(f"Unknown universe '{name_or_path}'")
+    return load_universe_file(path)
+
+
+def validate_universe(tickers, start=None, end=None, is_cached=None):
+    """
+    Check a universe before running it.
+
+    Returns {"valid": [...], "invalid": [...], "cached": [...], "uncached": [...]}:
+    invalid tickers are malformed symbols; valid ones are split by whether their
+    data for start/end is already in the data cache (is_cached defaults to
+    DataService.is_cached), i.e. what a run will have to download.
+    """
+    valid = [t for t in tickers if TICKER_PATTERN.match(t)]
+    invalid = [t for t in tickers if not TICKER_PATTERN.match(t)]
+    cached, uncached = [], []
+    if start and end:
+        if is_cached is None:
+            from data.data_service import DataService
+            is_cached = DataService.is_cached
+        for ticker in valid:
+            (cached if is_cached(ticker, start, end) else uncached).append(ticker)
+    else:
+        uncached = list(valid)
+    return {"valid": valid, "invalid": invalid, "cached": cached, "uncached": uncached}
+
+
+def batches(items, size):
+    """Consecutive slices of items, at most size long (everything at once if size is falsy)."""
+    items = list(items)
+    if not size:
+        yield items
+        return
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
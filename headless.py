@@ -0,0 +1,462 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from core import registry
+from core import distributed
+from core import optimize
+from core import replay
+from core import robustness
+from core.checkpoint import RunJournal, job_key
+from core.memory import MemoryMonitor
+from core.profiler import SamplingProfiler, default_log_dir
+from core.pipeline import iter_pipeline, strategy_cache_name
+from core.run_cache import RunCache
+from core.trades import build_ledger, trade_stats
+from data.async_loader import AsyncDataLoader
+from data.bundle import ingest, open_bundle
+from data.data_service import DataService
+from data.resample import TIMEFRAMES
+from data.universe import load_universe, batches
+from data.shared_arena import PriceArena, parallel_backtest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Canalytics backtest without the GUI.")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols, e.g. AAPL MSFT")
+    parser.add_argument("--universe", action="append", default=[], metavar="NAME_OR_FILE",
+                        help="Add tickers from a named universe (see universes/) or a .txt/.csv file (repeatable)")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="Keep the run under this much memory: shrink batches, throttle downloads "
+                             "and release caches as it gets close")
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="Tickers downloaded and backtested per batch, bounding memory on large universes")
+    parser.add_argument("--start", required=True, help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="End date (YYYY-MM-DD)")
+    parser.add_argument("--strategy", default="SMA Crossover", help="Strategy name")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="Strategy parameter, e.g. --param short_window=10 (repeatable)")
+    parser.add_argument("--strategies-dir", help="Extra directory to load custom strategy modules from")
+    parser.add_argument("--initial-capital", type=float, default=10000)
+    parser.add_argument("--position-size", type=float, default=10.0)
+    parser.add_argument("--stop-loss", type=float, help="Stop loss, %% below average entry")
+    parser.add_argument("--take-profit", type=float, help="Take profit, %% above average entry")
+    parser.add_argument("--trailing-stop", type=float, help="Trailing stop, %% below high since entry")
+    parser.add_argument("--max-holding", type=int, help="Max holding period in bars")
+    parser.add_argument("--commission", type=float, help="Commission, %% of traded notional")
+    parser.add_argument("--slippage", type=float, help="Slippage, %% of price")
+    parser.add_argument("--timeframe", default="1d", choices=list(TIMEFRAMES),
+                        help="Bar size; aggregated from finer cached data when available")
+    parser.add_argument("--timeout", type=float, help="Seconds to wait for each ticker's data before giving up")
+    parser.add_argument("--csv", help="Load prices from a CSV file instead of yfinance")
+    parser.add_argument("--bundle", help="Load prices from a bundle written by --ingest")
+    parser.add_argument("--ingest", metavar="FILE",
+                        help="Load the tickers once and write them to a compressed bundle FILE, then exit")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the run cache")
+    parser.add_argument("--cache-dir", help="Cache directory (default: the platform cache location)")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                        help="Report confidence intervals from N bootstrap resamples")
+    parser.add_argument("--bootstrap-method", choices=["block", "shuffle", "trades"], default="block",
+                        help="Resample bar returns in blocks, reshuffle them, or reshuffle the trades (drawdown spread)")
+    parser.add_argument("--seed", type=int, help="Random seed for --bootstrap and --optimize")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for --bootstrap")
+    parser.add_argument("--optimize", type=int, default=0, metavar="N",
+                        help="Search strategy parameters with successive halving over N candidates per bracket")
+    parser.add_argument("--brackets", type=int, default=1, help="Successive-halving brackets for --optimize")
+    parser.add_argument("--bayesian", action="store_true",
+                        help="Propose later --optimize brackets from earlier results instead of sampling randomly")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Backtest tickers in this many processes, sharing prices through shared memory")
+    parser.add_argument("--replay", action="store_true",
+                        help="Stream bars one at a time through incremental signals and portfolio (constant memory)")
+    parser.add_argument("--speed", type=float, help="Replay pace in bars per second (default: as fast as possible)")
+    parser.add_argument("--every", type=float, metavar="SECONDS", help="Repeat the replay on this schedule")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="Sweep a strategy parameter over these values (repeatable; cartesian product)")
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help="Coordinate the --grid sweep, handing jobs to workers that connect here")
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Also start this many worker processes on this machine for --serve")
+    parser.add_argument("--authkey", help="Shared secret for --serve workers (default: $CANAL_AUTHKEY, else a random key)")
+    parser.add_argument("--export", help="Write metrics to this .json file")
+    parser.add_argument("--profile", action="store_true",
+                        help="Sample the run and write a flame-graph (.folded) profile and hotspot summary")
+    parser.add_argument("--profile-dir", help="Where to write --profile output (default: the app's logs folder)")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="Journal finished tickers/jobs to FILE and skip them when the run is restarted")
+    args = parser.parse_args(argv)
+    for universe in args.universe:
+        try:
+            args.tickers.extend(load_universe(universe))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    if not args.tickers:
+        parser.error("no tickers given (pass symbols or --universe)")
+    return args
+
+
+def build_configs(args):
+    user_cfg = {
+        "tickers": list(dict.fromkeys(t.upper() for t in args.tickers)),
+        "start_date": args.start,
+        "end_date": args.end,
+        "initial_capital": args.initial_capital,
+        "position_size": args.position_size,
+        "stop_loss_pct": args.stop_loss,
+        "take_profit_pct": args.take_profit,
+        "trailing_stop_pct": args.trailing_stop,
+        "max_holding_bars": args.max_holding,
+        "commission_pct": args.commission,
+        "slippage_pct": args.slippage,
+        "timeframe": args.timeframe,
+    }
+    spec = registry.get_strategy(args.strategy)
+    if spec is None:
+        raise SystemExit(f"Unknown strategy '{args.strategy}'. Available: {', '.join(registry.strategy_names())}")
+    raw = dict(p.split("=", 1) for p in args.param if "=" in p)
+    strat_cfg = {"strategy": args.strategy}
+    strat_cfg.update(spec.coerce_params(raw))
+    return user_cfg, strat_cfg
+
+
+def make_loader(args):
+    """load_fn(ticker, start, end) for the requested --timeframe."""
+    def load(ticker, start, end):
+        return DataService.load_timeframe(ticker, start, end, args.timeframe)
+    return load
+
+
+def open_journal(args):
+    if not args.checkpoint:
+        return None
+    journal = RunJournal(args.checkpoint)
+    if journal.resumed:
+        print(f"Checkpoint {args.checkpoint}: {journal.resumed} finished jobs on record")
+    return journal
+
+
+def checkpoint_settings(args, user_cfg):
+    """
+    Everything besides ticker and strategy params that changes a job's result:
+    the run settings, the data source with its file paths and their mtimes (as
+    in DataService's cache key), and the plugin file's mtime for plugin strategies.
+    """
+    settings = dict(
+        user_cfg,
+        source=DataService.cache_key("", user_cfg["start_date"], user_cfg["end_date"], args.timeframe),
+        strategy=strategy_cache_name(args.strategy),
+    )
+    if args.bootstrap:
+        settings.update(bootstrap=args.bootstrap, bootstrap_method=args.bootstrap_method, seed=args.seed)
+    return settings
+
+
+def run_bootstrap(args, ticker, portfolio, ledger, user_cfg):
+    """Confidence intervals for one ticker by --bootstrap-method; None if it has too little to resample."""
+    try:
+        if args.bootstrap_method == "trades":
+            return robustness.trade_bootstrap(
+                ledger, user_cfg["initial_capital"], n_sims=args.bootstrap, seed=args.seed, n_jobs=args.jobs
+            )
+        return robustness.bootstrap(
+            portfolio["total"], n_sims=args.bootstrap, method=args.bootstrap_method, seed=args.seed,
+            n_jobs=args.jobs
+        )
+    except ValueError as e:
+        print(f"  {ticker} bootstrap skipped: {e}")
+        return None
+
+
+def run_optimize(args, user_cfg, strat_cfg):
+    best = {}
+    journal = open_journal(args)
+    settings = checkpoint_settings(args, user_cfg)
+    search_cfg = dict(strat_cfg, optimize=args.optimize, brackets=args.brackets, bayesian=args.bayesian, seed=args.seed)
+    try:
+        for ticker in user_cfg["tickers"]:
+            key = job_key(ticker, search_cfg, settings)
+            if journal is not None and key in journal:
+                best[ticker] = journal.get(key)
+                print(f"{ticker}: best {best[ticker]['params']} sharpe={best[ticker]['sharpe']:.2f} (from checkpoint)")
+                continue
+            df = make_loader(args)(ticker, user_cfg["start_date"], user_cfg["end_date"])
+            if df.empty:
+                print(f"Failed to load data for {ticker}")
+                continue
+            params, score, search = optimize.optimize(
+                df, strat_cfg["strategy"], user_cfg,
+                n_candidates=args.optimize, brackets=args.brackets, bayesian=args.bayesian, seed=args.seed
+            )
+            print(f"{ticker}: best {params} sharpe={score:.2f} ({search.backtests} backtests, "
+                  f"{search.bars_evaluated / len(df):.1f} full-history equivalents)")
+            best[ticker] = {"params": params, "sharpe": score}
+            if journal is not None:
+                # Each optimization is expensive, so don't wait for a full batch
+                journal.record(key, best[ticker], ticker=ticker)
+                journal.flush()
+    finally:
+        if journal is not None:
+            journal.close()
+
+    if args.export:
+        with open(args.export, "w") as f:
+            json.dump(best, f, indent=2)
+    return 0 if best else 1
+
+
+def run_sweep(args, user_cfg, strat_cfg):
+    spec = registry.get_strategy(strat_cfg["strategy"])
+    grid = {}
+    for item in args.grid:
+        name, _, values = item.partition("=")
+        grid[name] = [spec.coerce_params({name: v}).get(name, v) for v in values.split(",") if v]
+    jobs = distributed.build_jobs(user_cfg["tickers"], strat_cfg, grid, user_cfg)
+    address = distributed.parse_address(args.serve)
+    authkey = distributed.resolve_authkey(args.authkey)
+    generated = authkey is None
+    if generated:
+        authkey = distributed.generate_authkey().encode()
+
+    # Jobs already in the checkpoint journal are not served again
+    journal = open_journal(args)
+    settings = checkpoint_settings(args, user_cfg)
+    keys = {job["job_id"]: job_key(job["ticker"], job["strat_cfg"], settings) for job in jobs}
+    finished = {}
+    if journal is not None:
+        finished = {job["job_id"]: journal.get(keys[job["job_id"]]) for job in jobs if keys[job["job_id"]] in journal}
+    pending = [job for job in jobs if job["job_id"] not in finished]
+
+    def on_result(job, stats):
+        params = {k: v for k, v in job["strat_cfg"].items() if k in grid}
+        print(f"{job['ticker']} {params}: return={stats['return']:.2%} sharpe={stats['sharpe']:.2f}", flush=True)
+        if journal is not None:
+            journal.record(keys[job["job_id"]], stats, ticker=job["ticker"], params=params)
+
+    coordinator = distributed.Coordinator(pending, address, authkey=authkey, on_result=on_result)
+    host, port = coordinator.address
+    if finished:
+        print(f"Skipping {len(finished)} of {len(jobs)} jobs already in the checkpoint", flush=True)
+    print(f"Serving {len(pending)} jobs on {host}:{port}", flush=True)
+    if generated and not distributed.is_loopback(address[0]):
+        print(f"No --authkey or ${distributed.AUTHKEY_ENV} set; remote workers need --authkey {authkey.decode()}",
+              flush=True)
+
+    workers = []
+    worker_args = ["worker", f"{host}:{port}", "--authkey", authkey.decode()]
+    worker_args += ["--csv", args.csv] if args.csv else []
+    worker_args += ["--bundle", args.bundle] if args.bundle else []
+    ctx = multiprocessing.get_context("spawn")
+    for _ in range(args.local_workers):
+        proc = ctx.Process(target=distributed.main, args=(worker_args,))
+        proc.start()
+        workers.append(proc)
+
+    try:
+        results = coordinator.serve()
+        for proc in workers:
+            proc.join(timeout=10)
+    finally:
+        if journal is not None:
+            journal.close()
+
+    if args.export:
+        metrics = dict(finished)
+        metrics.update({job_id: r["metrics"] for job_id, r in results.items()})
+        with open(args.export, "w") as f:
+            json.dump([
+                {"ticker": job["ticker"], "strat_cfg": job["strat_cfg"], "metrics": metrics[job["job_id"]]}
+                for job in jobs if job["job_id"] in metrics
+            ], f, indent=2)
+    return 0 if (results or finished) and not coordinator.failed else 1
+
+
+def run_ingest(args, user_cfg):
+    tickers = user_cfg["tickers"]
+
+    def on_progress(done, total, ticker):
+        print(f"[{done}/{total}] {ticker}", flush=True)
+
+    started = time.perf_counter()
+    meta, missing = ingest(
+        tickers, user_cfg["start_date"], user_cfg["end_date"], args.ingest,
+        timeframe=args.timeframe, on_progress=on_progress
+    )
+    size = os.path.getsize(args.ingest)
+    print(f"Wrote {len(meta['tickers'])} tickers, {meta['calendar']['bars']} calendar bars to {args.ingest} "
+          f"({size / 1e6:.1f} MB) in {time.perf_counter() - started:.1f}s")
+    if missing:
+        print(f"No data for: {', '.join(missing)}")
+    return 0 if meta["tickers"] else 1
+
+
+def run_parallel(args, user_cfg, strat_cfg):
+    with PriceArena.from_loader(
+        user_cfg["tickers"], user_cfg["start_date"], user_cfg["end_date"], load_fn=make_loader(args)
+    ) as arena:
+        metrics = parallel_backtest(arena, strat_cfg, user_cfg, processes=args.processes)
+    for ticker, stats in metrics.items():
+        print(f"{ticker}: return={stats['return']:.2%} sharpe={stats['sharpe']:.2f} max_drawdown={stats['drawdown']:.2%}")
+    data_stats = DataService.cache_stats()
+    print(f"Data cache: {data_stats['hits']} hits, {data_stats['misses']} misses ({data_stats['hit_rate']:.0%})")
+
+    if args.export:
+        with open(args.export, "w") as f:
+            json.dump(metrics, f, indent=2)
+    return 0 if metrics else 1
+
+
+def replay_bars(args, ticker, start, end):
+    """
+    Bar stream for one ticker. CSV files are read in chunks and bundles only
+    read the ticker's Close column; other sources have to be downloaded whole,
+    one ticker at a time.
+    """
+    if args.csv:
+        return replay.csv_bars(args.csv, start, end)
+    if args.bundle and args.timeframe == open_bundle(args.bundle).timeframe:
+        return replay.bundle_bars(args.bundle, ticker, start, end)
+    return replay.frame_bars(make_loader(args)(ticker, start, end))
+
+
+def run_replays(args, user_cfg, strat_cfg):
+    if args.csv and len(user_cfg["tickers"]) > 1:
+        # A CSV file holds one price series; replaying it per ticker would repeat the same bars
+        raise SystemExit("--replay with --csv streams a single file; pass one ticker")
+
+    def replay_all():
+        for ticker in user_cfg["tickers"]:
+            bars = replay_bars(args, ticker, user_cfg["start_date"], user_cfg["end_date"])
+
+            def on_bar(state):
+                if args.speed:
+                    print(f"{ticker} {state['date']:%Y-%m-%d} close={state['price']:.2f} total={state['total']:.2f}", flush=True)
+
+            stats = replay.run_replay(bars, strat_cfg, user_cfg, speed=args.speed, on_bar=on_bar)
+            if stats:
+                print(f"{ticker}: return={stats['return']:.2%} sharpe={stats['sharpe']:.2f} "
+                      f"max_drawdown={stats['drawdown']:.2%}", flush=True)
+
+    if not args.every:
+        replay_all()
+        return 0
+
+    scheduler = replay.ReplayScheduler()
+    scheduler.every(args.every, replay_all)
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        return run(args)
+    with SamplingProfiler() as profiler:
+        status = run(args)
+    folded, summary = profiler.write(args.profile_dir or default_log_dir(), "headless")
+    print(f"Profile written to {folded} (flame graph input) and {summary}")
+    return status
+
+
+def run(args):
+    if args.strategies_dir:
+        registry.add_plugin_dir(args.strategies_dir)
+    if args.csv:
+        DataService.set_data_source("CSV File", csv_path=args.csv)
+    if args.bundle:
+        DataService.set_data_source("Bundle", bundle_path=args.bundle)
+    if args.cache_dir:
+        DataService.set_cache_dir(args.cache_dir)
+
+    user_cfg, strat_cfg = build_configs(args)
+    if args.ingest:
+        return run_ingest(args, user_cfg)
+    if args.optimize:
+        return run_optimize(args, user_cfg, strat_cfg)
+    if args.serve:
+        return run_sweep(args, user_cfg, strat_cfg)
+    if args.processes > 1:
+        return run_parallel(args, user_cfg, strat_cfg)
+    if args.replay:
+        return run_replays(args, user_cfg, strat_cfg)
+
+    # Download each batch concurrently, then run it ticker by ticker; only one batch of
+    # frames (bounded further by DataService's memory cap) is held at a time
+    loader = AsyncDataLoader(timeout=args.timeout)
+    monitor = MemoryMonitor(args.memory_budget * 2**20 if args.memory_budget else None)
+    DataService.fit_memory_budget(monitor.budget)
+    monitor.add_release_hook(DataService.release_memory)
+
+    async def warm(chunk, start, end):
+        # Only fills the caches; returning the frames would make asyncio.run's
+        # shutdown repr() them (SIGINT handler check on Python 3.11)
+        await loader.load_many(chunk, start, end, args.timeframe)
+
+    def prefetch(batch, start, end):
+        # Under memory pressure, download fewer tickers at a time
+        for chunk in batches(batch, monitor.concurrency(loader.max_workers)):
+            asyncio.run(warm(chunk, start, end))
+
+    cache = None if args.no_cache else RunCache(DataService.run_store())
+    metrics = {}
+
+    # Tickers finished by an earlier, interrupted run come from the checkpoint journal
+    journal = open_journal(args)
+    settings = checkpoint_settings(args, user_cfg)
+    keys = {ticker: job_key(ticker, strat_cfg, settings) for ticker in user_cfg["tickers"]}
+    remaining = []
+    for ticker in user_cfg["tickers"]:
+        if journal is not None and keys[ticker] in journal:
+            metrics[ticker] = journal.get(keys[ticker])
+        else:
+            remaining.append(ticker)
+    if len(remaining) < len(user_cfg["tickers"]):
+        print(f"Resuming: {len(metrics)} tickers already done, {len(remaining)} to run")
+
+    try:
+        for ticker, res in iter_pipeline(
+            dict(user_cfg, tickers=remaining), strat_cfg, make_loader(args), cache=cache,
+            source_name=f"{DataService.get_data_source()}|{args.timeframe}",
+            batch_size=args.batch_size, prefetch_fn=prefetch, monitor=monitor.start()
+        ):
+            stats = metrics[ticker] = {k: float(v) for k, v in res["metrics"].items()}
+            print(f"{ticker}: return={stats['return']:.2%} sharpe={stats['sharpe']:.2f} max_drawdown={stats['drawdown']:.2%}")
+            ledger = build_ledger(res["portfolio"], user_cfg["initial_capital"])
+            stats.update(trade_stats(ledger))
+            print(f"  trades={stats['trades']} win_rate={stats['win_rate']:.1%} "
+                  f"profit_factor={stats['profit_factor']:.2f} expectancy={stats['expectancy']:.2f}")
+
+            summary = run_bootstrap(args, ticker, res["portfolio"], ledger, user_cfg) if args.bootstrap else None
+            if summary is not None:
+                stats["bootstrap"] = {k: v for k, v in summary.items() if k != "samples"}
+                for key in ("return", "sharpe", "drawdown"):
+                    ci = summary[key]
+                    print(f"  {ticker} {key} 95% CI: [{ci['low']:.4f}, {ci['high']:.4f}] median={ci['median']:.4f}")
+            if journal is not None:
+                journal.record(keys[ticker], stats, ticker=ticker)
+    finally:
+        loader.close()
+        monitor.stop()
+        if journal is not None:
+            journal.close()
+
+    data_stats = DataService.cache_stats()
+    print(f"Data cache: {data_stats['hits']} hits, {data_stats['misses']} misses ({data_stats['hit_rate']:.0%})")
+    print(monitor.format_report())
+
+    if args.export:
+        with open(args.export, "w") as f:
+            json.dump(metrics, f, indent=2)
+    return 0 if metrics else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+# strategies/momentum.py
+#
+# Example custom strategy. Any .py file in this folder that defines
+# generate_signals() is picked up by core/registry.py and shows up in the
+# Strategy panel. PARAMS drives the input fields.
+
+import numpy as np
+
+NAME = "Momentum"
+
+PARAMS = [
+    {"name": "lookback", "label": "Lookback (bars)", "type": "int", "default": 20},
+    {"name": "threshold", "label": "Entry Threshold (%)", "type": "float", "default": 2.0},
+]
+
+
+def generate_signals(prices, lookback=20, threshold=2.0):
+    """
+    Buy when the close is more than threshold% above its value lookback bars ago,
+    sell when it is more than threshold% below.
+
+    prices: dict of NumPy arrays keyed by lower-case column name ('close', ...)
+    Returns a NumPy array of 1 (buy), -1 (sell), 0 (hold)
+    """
+    close = prices["close"]
+    signal = np.zeros(len(close), dtype=np.int8)
+    if lookback <= 0 or len(close) <= lookback:
+        return signal
+
+    change = np.zeros(len(close))
+    change[lookback:] = (close[lookback:] / close[:-lookback] - 1) * 100
+    signal[change > threshold] = 1
+    signal[change < -threshold] = -1
+    return signal
@@ -0,0 +1,122 @@
+# ui/correlation_panel.py
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton
+
+from ui.frame import FramelessWindow
+from core.correlation import returns_frame, pairwise_cov_corr, RollingCovariance
+
+
+class CorrelationDialog(FramelessWindow):
+    """
+    Heatmap of the return correlation (or covariance) matrix of the last run.
+
+    `equity` and `prices` map ticker -> equity curve / close prices. The window
+    selector shows the whole period or the most recent N bars; hovering a cell
+    shows the pair and its value. Sources without data (strategy returns after
+    a shared-capital run) are not offered.
+    """
+
+    SOURCES = ["Strategy Returns", "Price Returns"]
+    WINDOWS = {"Full Period": None, "Last 63 Bars": 63, "Last 252 Bars": 252}
+    MEASURES = ["Correlation", "Covariance"]
+
+    def __init__(self, equity, prices):
+        super().__init__(title="Correlation")
+        self.setMinimumSize(720, 640)
+        self.series = {"Strategy Returns": equity, "Price Returns": prices}
+        self._returns = {}
+        self.names = []
+        self.matrix = None
+
+        self.setStyleSheet(self.styleSheet() + """
+            QComboBox {
+                background-color: #2e2e2e;
+                color: #f0f0f0;
+                border: 1px solid #5a5a5a;
+                border-radius: 4px;
+                padding: 4px;
+            }
+        """)
+
+        layout = QVBoxLayout()
+        controls = QHBoxLayout()
+        self.source_combo = QComboBox()
+        self.source_combo.addItems([source for source in self.SOURCES if len(self.series[source])] or self.SOURCES)
+        self.window_combo = QComboBox()
+        self.window_combo.addItems(list(self.WINDOWS))
+        self.measure_combo = QComboBox()
+        self.measure_combo.addItems(self.MEASURES)
+        for combo in (self.source_combo, self.window_combo, self.measure_combo):
+            combo.currentIndexChanged.connect(self.refresh)
+            controls.addWidget(combo)
+        layout.addLayout(controls)
+
+        self.plot = pg.PlotWidget()
+        self.plot.setBackground("#1e1e1e")
+        self.plot.setAspectLocked(True)
+        self.plot.invertY(True)
+        self.image = pg.ImageItem()
+        self.plot.addItem(self.image)
+        self.colorbar = pg.ColorBarItem(values=(-1, 1), colorMap=pg.colormap.get("CET-D1"), interactive=False)
+        self.colorbar.setImageItem(self.image, insert_in=self.plot.getPlotItem())
+        self.plot.scene().sigMouseMoved.connect(self.on_hover)
+        layout.addWidget(self.plot)
+
+        self.info_label = QLabel("")
+        layout.addWidget(self.info_label)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+        body = QWidget()
+        body.setLayout(layout)
+        self.add_body_widget(body)
+        self.refresh()
+
+    def returns(self, source):
+        if source not in self._returns:
+            self._returns[source] = returns_frame(self.series[source])
+        return self._returns[source]
+
+    def refresh(self):
+        returns = self.returns(self.source_combo.currentText())
+        if returns.shape[1] < 2:
+            self.image.clear()
+            self.info_label.setText("Run a backtest with at least two tickers to see correlations.")
+            return
+
+        window = self.WINDOWS[self.window_combo.currentText()]
+        if window is None or window >= len(returns):
+            cov, corr = pairwise_cov_corr(returns)
+        else:
+            rolling = RollingCovariance(returns, window)
+            rolling.advance_to(len(returns))
+            cov, corr = rolling.current()
+
+        measure = self.measure_combo.currentText()
+        matrix = corr if measure == "Correlation" else cov
+        self.names = list(matrix.columns)
+        self.matrix = matrix.to_numpy()
+
+        if measure == "Correlation":
+            levels = (-1.0, 1.0)
+        else:
+            bound = np.nanmax(np.abs(self.matrix)) if np.isfinite(self.matrix).any() else 1.0
+            levels = (-bound, bound)
+        # ImageItem indexes [x, y]; transpose so rows run down the y axis
+        self.image.setImage(np.nan_to_num(self.matrix).T, levels=levels)
+        self.colorbar.setLevels(levels)
+        self.info_label.setText(f"{len(self.names)} tickers, {len(returns)} bars")
+
+    def on_hover(self, pos):
+        if self.matrix is None:
+            return
+        point = self.plot.getPlotItem().vb.mapSceneToView(pos)
+        col, row = int(np.floor(point.x())), int(np.floor(point.y()))
+        if 0 <= row < len(self.names) and 0 <= col < len(self.names):
+            value = self.matrix[row, col]
+            text = "n/a" if np.isnan(value) else f"{value:.4g}"
+            self.info_label.setText(f"{self.names[row]} / {self.names[col]}: {text}")
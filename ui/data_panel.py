@@ -9,6 +9,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import QStandardPaths
 from data.data_service import DataService
+from data.bundle import open_bundle, is_bundle
 
 
 class DataLayerDialog(FramelessWindow):
@@ -64,7 +65,7 @@ class DataLayerDialog(FramelessWindow):
         # Data source selection
         layout.addWidget(QLabel("Select Data Source"))
         self.source_dropdown = QComboBox()
-        self.source_dropdown.addItems(["yfinance", "CSV File", "investing.com", "Custom"])
+        self.source_dropdown.addItems(["yfinance", "CSV File", "investing.com", "Custom", "Bundle"])
         self.source_dropdown.currentTextChanged.connect(self.on_source_changed)
         layout.addWidget(self.source_dropdown)
 
@@ -74,6 +75,16 @@ class DataLayerDialog(FramelessWindow):
         self.csv_button.setVisible(False)
         layout.addWidget(self.csv_button)
 
+        # Bundle picker and summary (hidden by default)
+        self.bundle_button = QPushButton("Select Bundle File")
+        self.bundle_button.clicked.connect(self.select_bundle_file)
+        self.bundle_button.setVisible(False)
+        layout.addWidget(self.bundle_button)
+        self.bundle_label = QLabel("")
+        self.bundle_label.setWordWrap(True)
+        self.bundle_label.setVisible(False)
+        layout.addWidget(self.bundle_label)
+
         # Investing.com country input (hidden by default)
         self.country_label = QLabel("Investing.com Country")
         self.country_label.setVisible(False)
@@ -129,7 +140,8 @@ class DataLayerDialog(FramelessWindow):
 
         # Internal state for settings
         self._pending_source = DataService.get_data_source()
-        self._pending_csv_path = getattr(DataService, '_csv_path', None)
+        self._pending_csv_path = DataService.get_source_config().csv_path
+        self._pending_bundle_path = DataService.get_source_config().bundle_path
         self._pending_country = "united states"
         self._pending_custom_api_endpoint = None
         self._pending_custom_api_key = None
@@ -144,6 +156,7 @@ class DataLayerDialog(FramelessWindow):
         else:
             self.country_label.setVisible(False)
             self.country_input.setVisible(False)
+        self.set_bundle_visible(self._pending_source == "Bundle")
         if self._pending_source == "Custom":
             self.custom_api_label.setVisible(True)
             self.custom_api_input.setVisible(True)
@@ -157,6 +170,7 @@ class DataLayerDialog(FramelessWindow):
 
     def on_source_changed(self, text):
         self._pending_source = text
+        self.set_bundle_visible(text == "Bundle")
         if text == "CSV File":
             self.csv_button.setVisible(True)
             self.country_label.setVisible(False)
@@ -202,6 +216,38 @@ class DataLayerDialog(FramelessWindow):
             self._pending_custom_api_endpoint = None
             self._pending_custom_api_key = None
 
+    def set_bundle_visible(self, visible):
+        self.bundle_button.setVisible(visible)
+        self.bundle_label.setVisible(visible)
+        if visible:
+            self.update_bundle_label()
+
+    def update_bundle_label(self):
+        path = self._pending_bundle_path
+        if not path:
+            self.bundle_label.setText("No bundle selected. Create one with: headless.py ... --ingest FILE")
+            return
+        try:
+            meta = open_bundle(path).meta
+        except (OSError, ValueError) as e:
+            self.bundle_label.setText(f"Cannot open {os.path.basename(path)}: {e}")
+            return
+        calendar = meta["calendar"]
+        self.bundle_label.setText(
+            f"{os.path.basename(path)}: {len(meta['tickers'])} tickers, {meta['timeframe']} bars, "
+            f"{str(calendar['first'])[:10]} to {str(calendar['last'])[:10]}"
+        )
+
+    def select_bundle_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Select Bundle", "", "Data Bundles (*.npz);;All Files (*)")
+        if not path:
+            return
+        if not is_bundle(path):
+            QMessageBox.warning(self, "Invalid Bundle", f"{path} is not a data bundle.")
+            return
+        self._pending_bundle_path = path
+        self.update_bundle_label()
+
     def select_csv_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select CSV File", "", "CSV Files (*.csv)")
         if path:
@@ -214,6 +260,9 @@ class DataLayerDialog(FramelessWindow):
         if self._pending_source == "CSV File" and not self._pending_csv_path:
             QMessageBox.warning(self, "Missing CSV File", "Please select a CSV file for CSV data source.")
             return
+        if self._pending_source == "Bundle" and not self._pending_bundle_path:
+            QMessageBox.warning(self, "Missing Bundle", "Please select a bundle file for the Bundle data source.")
+            return
         if self._pending_source == "investing.com":
             country = self.country_input.text().strip() or "united states"
             self._pending_country = country
@@ -227,6 +276,8 @@ class DataLayerDialog(FramelessWindow):
             self._pending_custom_api_endpoint = endpoint
             self._pending_custom_api_key = key
             DataService.set_data_source(self._pending_source, custom_api_endpoint=endpoint, custom_api_key=key)
+        elif self._pending_source == "Bundle":
+            DataService.set_data_source(self._pending_source, bundle_path=self._pending_bundle_path)
         else:
             DataService.set_data_source(self._pending_source, csv_path=self._pending_csv_path)
         QMessageBox.information(self, "Settings Applied", "Data source settings have been applied.")
@@ -1,11 +1,14 @@
+import os
+import shutil
 import sys
 from datetime import datetime
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QGridLayout, QDialog, QVBoxLayout as QVBox, QSpacerItem, QSizePolicy
+    QLabel, QDialog, QSpacerItem, QSizePolicy,
+    QComboBox, QSlider
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 import pyqtgraph as pg
 from pyqtgraph import InfiniteLine, DateAxisItem
 
@@ -13,15 +16,25 @@ from ui.frame import FramelessWindow
 from ui.user_input_panel import UserInputDialog
 from ui.strategy_panel import StrategyEngineDialog
 from ui.data_panel import DataLayerDialog
-from ui.system_settings_panel import SystemSettingsDialog
-from core import strategy as strategy_module
-from core import backtest as backtest_module
-import yfinance as yf
-import pandas as pd
+from ui.correlation_panel import CorrelationDialog
+from ui.system_settings_panel import SystemSettingsDialog, apply_cache_settings, settings
+from core.pipeline import run_ticker, run_portfolio, compute_metrics
+from core.run_cache import RunCache
+from core.trades import build_ledger, trade_stats, position_changes
+from core.rolling import RollingStats
+from core.memory import MemoryMonitor, SpillDict
+from core.profiler import SamplingProfiler, default_log_dir
+from ui.results_table import ResultsTableModel, ResultsTable
 from data.data_service import DataService
+from data.prefetch import Prefetcher
 
 
 class MainWindow(FramelessWindow):
+    COLORS = ['#4fc3f7', '#ff8a65', '#9575cd', '#81c784', '#f06292', '#ffd54f', '#64b5f6', '#e57373', '#a1887f', '#4db6ac']
+    BATCH_SIZE = 50  # tickers loaded and run per batch
+    MAX_PLOTTED = 20  # equity curves kept and drawn; all tickers get table rows
+    CHART_MODES = ["Equity", "Rolling Sharpe", "Rolling Volatility", "Rolling Drawdown", "Underwater"]
+
     def __init__(self):
         super().__init__(title="Canalytics")
         self.setMinimumSize(1280, 720)
@@ -36,7 +49,8 @@ class MainWindow(FramelessWindow):
             "User Input": lambda: self.open_modal("User Input", "User input panel goes here."),
             "Strategy": lambda: self.open_modal("Strategy", "Strategy selection panel goes here."),
             "Data": lambda: self.open_modal("Data", "Data layer settings go here."),
-            "System": lambda: self.open_modal("System", "System settings go here.")
+            "System": lambda: self.open_modal("System", "System settings go here."),
+            "Correlation": lambda: self.open_modal("Correlation", "Correlation heatmap goes here.")
         }
 
         button_style = """
@@ -55,12 +69,18 @@ class MainWindow(FramelessWindow):
             }
         """
 
+        # Disabled while a backtest runs: the run loop processes events between
+        # batches, and these would change its inputs or start another run inside it
+        self.action_buttons = []
+        self._running = False
+
         for label, callback in buttons.items():
             btn = QPushButton(label)
             btn.setCursor(Qt.PointingHandCursor)
             btn.setStyleSheet(button_style)
             btn.clicked.connect(callback)
             header_layout.addWidget(btn)
+            self.action_buttons.append(btn)
 
         header_layout.addSpacerItem(QSpacerItem(40, 10, QSizePolicy.Expanding, QSizePolicy.Minimum))
 
@@ -69,15 +89,40 @@ class MainWindow(FramelessWindow):
         run_button.setStyleSheet(button_style)
         run_button.clicked.connect(self.run_backtest)
         header_layout.addWidget(run_button)
+        self.action_buttons.append(run_button)
 
         reset_button = QPushButton("Reset")
         reset_button.setCursor(Qt.PointingHandCursor)
         reset_button.setStyleSheet(button_style)
         reset_button.clicked.connect(self.reset_app)
         header_layout.addWidget(reset_button)
+        self.action_buttons.append(reset_button)
 
         main_layout.addLayout(header_layout)
 
+        # Chart mode and rolling window
+        chart_layout = QHBoxLayout()
+        self.chart_mode = QComboBox()
+        self.chart_mode.addItems(self.CHART_MODES)
+        self.chart_mode.setStyleSheet("QComboBox { background-color: #2e2e2e; color: #f0f0f0; padding: 4px; }")
+        self.chart_mode.currentIndexChanged.connect(self.update_chart)
+        chart_layout.addWidget(self.chart_mode)
+
+        self.window_label = QLabel("Window: 63 bars")
+        self.window_label.setStyleSheet("color: #f0f0f0;")
+        chart_layout.addWidget(self.window_label)
+        self.window_slider = QSlider(Qt.Horizontal)
+        self.window_slider.setRange(5, 504)
+        self.window_slider.setValue(63)
+        self.window_slider.valueChanged.connect(self.on_window_changed)
+        chart_layout.addWidget(self.window_slider)
+        # Dragging the slider emits every value; redraw once it settles
+        self.window_timer = QTimer(self)
+        self.window_timer.setSingleShot(True)
+        self.window_timer.setInterval(120)
+        self.window_timer.timeout.connect(self.update_chart)
+        main_layout.addLayout(chart_layout)
+
         # Plot with date axis
         date_axis = DateAxisItem(orientation='bottom')
         self.plot_widget = pg.PlotWidget(axisItems={'bottom': date_axis})
@@ -91,27 +136,32 @@ class MainWindow(FramelessWindow):
         plot_item.getAxis('bottom').setPen('#f0f0f0')
         main_layout.addWidget(self.plot_widget)
 
-        # Metrics layout (grid)
-        from PyQt5.QtWidgets import QScrollArea, QFrame
+        # Metrics table (one row per ticker, sortable)
+        self.results_model = ResultsTableModel(colors=self.COLORS)
+        self.results_table = ResultsTable(self.results_model)
+        self.results_table.setFixedHeight(180)
+        main_layout.addWidget(self.results_table)
 
-        self.metrics_container = QWidget()
-        self.metrics_layout = QGridLayout()
-        self.metrics_container.setLayout(self.metrics_layout)
+        # Memory use of the last run
+        self.memory_label = QLabel("")
+        self.memory_label.setStyleSheet("color: #a0a0a0;")
+        main_layout.addWidget(self.memory_label)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setFixedHeight(180)
-        self.scroll_area.setWidget(self.metrics_container)
-        self.scroll_area.setStyleSheet("QScrollArea { border: none; background-color: transparent; }")
+        self.add_body_widget(body)
 
-        main_layout.addWidget(self.scroll_area)
+        # Saved cache location and size cap (and auto-clear on launch)
+        apply_cache_settings()
 
-        self.add_body_widget(body)
+        # Identical runs (same data, strategy, params and capital) are served from here
+        self.run_cache = RunCache(DataService.run_store())
+
+        # Loads data in the background while inputs are being entered
+        self.prefetcher = Prefetcher()
 
     def open_modal(self, title, content):
         dialog = None
         if title == "User Input":
-            dialog = UserInputDialog()
+            dialog = UserInputDialog(prefetcher=self.prefetcher)
             if dialog.exec_() == QDialog.Accepted:
                 self.input_config = dialog.get_config()
         elif title == "Strategy":
@@ -126,8 +176,34 @@ class MainWindow(FramelessWindow):
         elif title == "System":
             dialog = SystemSettingsDialog()
             dialog.exec_()
+        elif title == "Correlation":
+            dialog = CorrelationDialog(getattr(self, "equity", {}), getattr(self, "closes", {}))
+            dialog.exec_()
 
     def run_backtest(self):
+        if self._running:
+            return
+        self._running = True
+        self.set_actions_enabled(False)
+        try:
+            # "Profile next run" (System settings) samples this one run, then switches itself off
+            if not settings().value("profile/next_run", False, type=bool):
+                self._run_backtest()
+                return
+            settings().setValue("profile/next_run", False)
+            with SamplingProfiler() as profiler:
+                self._run_backtest()
+            folded, summary = profiler.write(default_log_dir(), "run")
+            print(f"Profile written to {folded} (flame graph input) and {summary}")
+        finally:
+            self._running = False
+            self.set_actions_enabled(True)
+
+    def set_actions_enabled(self, enabled):
+        for button in self.action_buttons:
+            button.setEnabled(enabled)
+
+    def _run_backtest(self):
         user_cfg = getattr(self, 'input_config', None)
         strat_cfg = getattr(self, 'strategy_config', None)
 
@@ -139,67 +215,122 @@ class MainWindow(FramelessWindow):
         start = user_cfg["start_date"]
         end = user_cfg["end_date"]
 
-        self.plot_widget.clear()
-        self.results = {}
-        colors = ['#4fc3f7', '#ff8a65', '#9575cd', '#81c784', '#f06292', '#ffd54f', '#64b5f6', '#e57373', '#a1887f', '#4db6ac']
-
-        for i, ticker in enumerate(tickers):
-            df = DataService.load_data(ticker, start, end)
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-            if df.empty:
-                print(f"Failed to load data for {ticker}")
-                continue
+        # Memory accounting for this run; with a budget (System settings) batches
+        # shrink, caches are released and kept series spill to disk near the limit
+        budget_mb = settings().value("memory/budget_mb", 0, type=int)
+        spill_dir = os.path.join(DataService.get_cache_path(), "spill")
+        shutil.rmtree(spill_dir, ignore_errors=True)
+        monitor = MemoryMonitor(budget_mb * 2**20 if budget_mb else None, spill_dir=spill_dir).start()
+        DataService.fit_memory_budget(monitor.budget)
+        monitor.add_release_hook(DataService.release_memory)
 
-            strat = strat_cfg["strategy"]
-            if strat == "SMA Crossover":
-                signals = strategy_module.sma_crossover_strategy(df, strat_cfg["short_window"], strat_cfg["long_window"])
-            elif strat == "RSI":
-                signals = strategy_module.rsi_strategy(df, period=strat_cfg.get("rsi_period", 14))
-            elif strat == "Buy & Hold":
-                signals = strategy_module.buy_and_hold_strategy(df)
-            else:
-                print("Unknown strategy")
-                continue
+        # A new cache directory or a cleared cache replaces the run store
+        if self.run_cache.store is not DataService.run_store():
+            self.run_cache = RunCache(DataService.run_store())
 
-            portfolio = backtest_module.run_backtest(
-                df,
-                signals,
-                initial_capital=user_cfg["initial_capital"],
-                position_size_pct=user_cfg["position_size"]
-            )
+        self.results = {}
+        self.trades = {}
+        self.portfolios = {}
+        # ticker -> equity curve / close prices, for the correlation heatmap; beyond
+        # MAX_PLOTTED tickers they go straight to the spill directory
+        self.equity = SpillDict(monitor, max_in_memory=self.MAX_PLOTTED)
+        self.closes = SpillDict(monitor, max_in_memory=self.MAX_PLOTTED)
+        self.holding_values = None
+        self.rolling = {}
+        self.x_values = {}
+        shared_capital = user_cfg.get("shared_capital", False)
+        shared_data = {}
+
+        timeframe = user_cfg.get("timeframe", "1d")
+        self.results_model.clear()
+
+        # Work through the universe in batches: prefetch a batch, run it, show its rows.
+        # Only the first MAX_PLOTTED equity curves are kept (for the chart); the rest
+        # are reduced to metrics and trades, so memory stays flat for large universes.
+        position = 0
+        while position < len(tickers):
+            monitor.relieve()
+            batch = tickers[position:position + monitor.batch_size(self.BATCH_SIZE)]
+            position += len(batch)
+            if timeframe == "1d":
+                self.prefetcher.request(batch, start, end)
+            for ticker in batch:
+                with monitor.stage("load") as stage:
+                    if timeframe == "1d":
+                        df = stage.track(self.prefetcher.load(ticker, start, end))
+                    else:
+                        df = stage.track(DataService.load_timeframe(ticker, start, end, timeframe))
+                if df.empty:
+                    print(f"Failed to load data for {ticker}")
+                    continue
+                self.closes[ticker] = df["Close"]
+
+                if shared_capital:
+                    shared_data[ticker] = df
+                    continue
+
+                portfolio = run_ticker(
+                    df,
+                    strat_cfg,
+                    user_cfg,
+                    cache=self.run_cache,
+                    source_key=f"{DataService.get_data_source()}|{ticker}|{start}|{end}|{timeframe}",
+                    monitor=monitor
+                )
+                if portfolio is None:
+                    print("Unknown strategy")
+                    continue
+
+                if len(self.portfolios) < self.MAX_PLOTTED:
+                    self.portfolios[ticker] = portfolio
+                self.equity[ticker] = portfolio["total"]
+                with monitor.stage("metrics"):
+                    self.results[ticker] = compute_metrics(portfolio)
+                    self.trades[ticker] = build_ledger(portfolio, user_cfg.get("initial_capital"))
+                    self.results[ticker].update(trade_stats(self.trades[ticker]))
+                self.results_model.update_row(ticker, self.results[ticker])
+            QApplication.processEvents()
+
+        if shared_capital and shared_data:
+            with monitor.stage("portfolio"):
+                self.run_shared_portfolio(shared_data, strat_cfg, user_cfg)
+
+        self.update_chart()
+
+        self.results_model.set_results(self.results)
+        monitor.stop()
+        self.memory_label.setText(monitor.summary())
+        print(monitor.format_report())
+
+    def run_shared_portfolio(self, data, strat_cfg, user_cfg):
+        """Backtest all tickers on one cash pool; the combined equity is kept as "Portfolio"."""
+        result = run_portfolio(data, strat_cfg, user_cfg)
+        if result is None:
+            print("Unknown strategy")
+            return
 
-            x = [ts.timestamp() for ts in portfolio.index]
-            y = portfolio["total"].values
-            color = colors[i % len(colors)]
-            plot = self.plot_widget.plot(x, y, pen=pg.mkPen(color=color, width=2), name=ticker)
+        self.portfolios["Portfolio"] = result["portfolio"]
+        self.holding_values = result["values"]
+        self.results["Portfolio"] = result["metrics"]
 
-            returns = portfolio["total"].pct_change().dropna()
-            sharpe = (returns.mean() / returns.std()) * (252 ** 0.5) if not returns.empty else 0.0
-            peak = portfolio["total"].cummax()
-            drawdown = ((portfolio["total"] - peak) / peak).min()
-            total_return = (portfolio["total"].iloc[-1] - portfolio["total"].iloc[0]) / portfolio["total"].iloc[0]
+    def on_window_changed(self, value):
+        self.window_label.setText(f"Window: {value} bars")
+        if self.chart_mode.currentText() != "Equity":
+            self.window_timer.start()
 
-            # Draw entry/exit markers
-            prev_pos = 0
-            for j in range(len(portfolio)):
-                pos = portfolio["position"].iloc[j]
-                ts = portfolio.index[j].timestamp()
-                val = portfolio["total"].iloc[j]
-                if pos > prev_pos:
-                    entry = pg.ScatterPlotItem([ts], [val], symbol='t1', size=8, brush='g')
-                    self.plot_widget.addItem(entry)
-                elif pos < prev_pos:
-                    exit_ = pg.ScatterPlotItem([ts], [val], symbol='t', size=8, brush='r')
-                    self.plot_widget.addItem(exit_)
-                prev_pos = pos
-
-            self.results[ticker] = {
-                "return": total_return,
-                "sharpe": sharpe,
-                "drawdown": drawdown
-            }
+    def update_chart(self):
+        """Redraw the plot for the selected chart mode from the last run's equity curves."""
+        self.plot_widget.clear()
+        portfolios = getattr(self, "portfolios", {})
+        if not portfolios:
+            return
+        mode = self.chart_mode.currentText()
+        if mode == "Equity":
+            self.plot_equity()
+        else:
+            self.plot_rolling(mode, self.window_slider.value())
 
+        user_cfg = getattr(self, "input_config", None) or {}
         try:
             end_ts = datetime.strptime(user_cfg["end_date"], "%Y-%m-%d").timestamp()
             line = InfiniteLine(pos=end_ts, angle=90, pen=pg.mkPen('r', width=1.5, style=Qt.DashLine), movable=False)
@@ -207,48 +338,71 @@ class MainWindow(FramelessWindow):
         except Exception as e:
             print("Could not parse end date:", e)
 
-        # Clear metrics layout and display results
-        for i in reversed(range(self.metrics_layout.count())):
-            widget = self.metrics_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-
-        for row, (ticker, stats) in enumerate(self.results.items()):
-            color = colors[row % len(colors)]
-            style = f"color: {color}; font-weight: bold;"
-        
-            self.metrics_layout.addWidget(QLabel(f"{ticker} Return:"), row * 3, 0)
-            return_label = QLabel(f"{stats['return']:.2%}")
-            return_label.setStyleSheet(style)
-            self.metrics_layout.addWidget(return_label, row * 3, 1)
-        
-            self.metrics_layout.addWidget(QLabel(f"{ticker} Sharpe:"), row * 3 + 1, 0)
-            sharpe_label = QLabel(f"{stats['sharpe']:.2f}")
-            sharpe_label.setStyleSheet(style)
-            self.metrics_layout.addWidget(sharpe_label, row * 3 + 1, 1)
-        
-            self.metrics_layout.addWidget(QLabel(f"{ticker} Max Drawdown:"), row * 3 + 2, 0)
-            drawdown_label = QLabel(f"{stats['drawdown']:.2%}")
-            drawdown_label.setStyleSheet(style)
-            self.metrics_layout.addWidget(drawdown_label, row * 3 + 2, 1)
-
-            self.metrics_layout.addWidget(QLabel(f"{ticker} Sharpe:"), row * 3 + 1, 0)
-            self.metrics_layout.addWidget(QLabel(f"{stats['sharpe']:.2f}"), row * 3 + 1, 1)
-
-            self.metrics_layout.addWidget(QLabel(f"{ticker} Max Drawdown:"), row * 3 + 2, 0)
-            self.metrics_layout.addWidget(QLabel(f"{stats['drawdown']:.2%}"), row * 3 + 2, 1)
+    def x_axis(self, ticker, portfolio):
+        """Epoch seconds of the portfolio's bars for the date axis, computed once per run."""
+        x = self.x_values.get(ticker)
+        if x is None:
+            x = self.x_values[ticker] = portfolio.index.as_unit("ns").asi8 / 1e9
+        return x
+
+    def plot_equity(self):
+        for i, (ticker, portfolio) in enumerate(self.portfolios.items()):
+            x = self.x_axis(ticker, portfolio)
+            totals = portfolio["total"].to_numpy()
+            if ticker == "Portfolio" and self.holding_values is not None:
+                # Shared capital: each ticker's holding value, then the combined equity
+                for j, name in enumerate(self.holding_values.columns):
+                    color = self.COLORS[j % len(self.COLORS)]
+                    self.plot_widget.plot(x, self.holding_values[name].values, pen=pg.mkPen(color=color, width=1), name=name)
+                self.plot_widget.plot(x, totals, pen=pg.mkPen(color='#f0f0f0', width=2), name=ticker)
+                continue
+
+            color = self.COLORS[i % len(self.COLORS)]
+            self.plot_widget.plot(x, totals, pen=pg.mkPen(color=color, width=2), name=ticker)
+
+            # Draw entry/exit markers
+            entries, exits = position_changes(portfolio)
+            self.plot_widget.addItem(pg.ScatterPlotItem(x[entries], totals[entries], symbol='t1', size=8, brush='g'))
+            self.plot_widget.addItem(pg.ScatterPlotItem(x[exits], totals[exits], symbol='t', size=8, brush='r'))
+
+    def plot_rolling(self, mode, window):
+        for i, (ticker, portfolio) in enumerate(self.portfolios.items()):
+            stats = self.rolling.get(ticker)
+            if stats is None:
+                stats = self.rolling[ticker] = RollingStats(portfolio["total"])
+            if mode == "Rolling Sharpe":
+                y = stats.sharpe(window)
+            elif mode == "Rolling Volatility":
+                y = stats.volatility(window)
+            elif mode == "Rolling Drawdown":
+                y = stats.drawdown(window)
+            else:
+                y = stats.underwater()
+            x = self.x_axis(ticker, portfolio)
+            color = '#f0f0f0' if ticker == "Portfolio" else self.COLORS[i % len(self.COLORS)]
+            self.plot_widget.plot(x, y, pen=pg.mkPen(color=color, width=2), name=ticker, connect="finite")
 
     def reset_app(self):
-        # Stop any running backtest (if threaded, add logic here)
+        if self._running:
+            return
+        self.prefetcher.cancel_all()
         self.input_config = None
         self.strategy_config = None
         self.plot_widget.clear()
         self.results = {}
-        # Clear metrics layout
-        for i in reversed(range(self.metrics_layout.count())):
-            widget = self.metrics_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
+        self.trades = {}
+        self.portfolios = {}
+        self.equity = {}
+        self.closes = {}
+        self.holding_values = None
+        self.rolling = {}
+        self.x_values = {}
+        self.results_model.clear()
+        self.memory_label.setText("")
+
+    def closeEvent(self, event):
+        self.prefetcher.shutdown()
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+# ui/results_table.py
+
+import math
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QTableView, QAbstractItemView, QHeaderView
+
+# (stats key, header, format); keys missing from a row show as blank
+RESULT_COLUMNS = [
+    ("return", "Return", "{:.2%}"),
+    ("sharpe", "Sharpe", "{:.2f}"),
+    ("drawdown", "Max Drawdown", "{:.2%}"),
+    ("trades", "Trades", "{:d}"),
+    ("win_rate", "Win Rate", "{:.1%}"),
+    ("profit_factor", "Profit Factor", "{:.2f}"),
+    ("expectancy", "Expectancy", "{:.2f}"),
+    ("avg_bars_held", "Avg Bars Held", "{:.1f}"),
+]
+
+SORT_ROLE = Qt.UserRole
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    One row per ticker (or sweep run) with a column per metric.
+
+    Rows are stored as plain (name, stats dict) pairs and the view only asks for
+    the cells it shows, so thousands of rows cost nothing to display. Updating a
+    row that already exists only repaints it; new rows are inserted in place.
+    """
+
+    def __init__(self, columns=None, colors=None, parent=None):
+        super().__init__(parent)
+        self.columns = columns or RESULT_COLUMNS
+        self.colors = colors or []
+        self._names = []
+        self._stats = []
+        self._rows = {}  # name -> row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns) + 1
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Vertical:
+            return section + 1
+        return "Ticker" if section == 0 else self.columns[section - 1][1]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if col == 0:
+            if role in (Qt.DisplayRole, SORT_ROLE):
+                return self._names[row]
+            if role == Qt.ForegroundRole and self.colors:
+                return QColor(self.colors[row % len(self.colors)])
+            return None
+
+        key, _, fmt = self.columns[col - 1]
+        value = self._stats[row].get(key)
+        if role == SORT_ROLE:
+            # Blanks and NaN sort below every number
+            return float(value) if value is not None and not _is_nan(value) else -math.inf
+        if role == Qt.DisplayRole:
+            if value is None or _is_nan(value):
+                return ""
+            try:
+                return fmt.format(int(value) if fmt.endswith("d}") else float(value))
+            except (TypeError, ValueError):
+                return str(value)
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def update_row(self, name, stats):
+        """Insert or replace one row's stats."""
+        row = self._rows.get(name)
+        if row is None:
+            row = len(self._names)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._names.append(name)
+            self._stats.append(dict(stats))
+            self._rows[name] = row
+            self.endInsertRows()
+        else:
+            self._stats[row] = dict(stats)
+            self.dataChanged.emit(self.index(row, 1), self.index(row, len(self.columns)))
+
+    def set_results(self, results):
+        """
+        Show exactly these {name: stats} results. If the set of names is unchanged,
+        cells are updated in place; otherwise the model is reset in one go.
+        """
+        names = list(results)
+        if names == self._names:
+            self._stats = [dict(results[name]) for name in names]
+            if names:
+                self.dataChanged.emit(self.index(0, 1), self.index(len(names) - 1, len(self.columns)))
+            return
+        self.beginResetModel()
+        self._names = names
+        self._stats = [dict(results[name]) for name in names]
+        self._rows = {name: i for i, name in enumerate(names)}
+        self.endResetModel()
+
+    def clear(self):
+        self.set_results({})
+
+
+def _is_nan(value):
+    try:
+        return math.isnan(value)
+    except TypeError:
+        return False
+
+
+class ResultsTable(QTableView):
+    """Sortable view over a ResultsTableModel (click a header to sort)."""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.results_model = model
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(model)
+        self.proxy.setSortRole(SORT_ROLE)
+        self.setModel(self.proxy)
+        self.setSortingEnabled(True)
+        self.sortByColumn(-1, Qt.AscendingOrder)  # keep run order until a header is clicked
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setAlternatingRowColors(True)
+        self.verticalHeader().setVisible(False)
+        # Fixed row height lets the view compute scrolling without measuring rows
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(22)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.setStyleSheet("""
+            QTableView {
+                background-color: #1e1e1e;
+                alternate-background-color: #262626;
+                color: #f0f0f0;
+                gridline-color: #3d3d3d;
+                border: none;
+            }
+            QHeaderView::section {
+                background-color: #2e2e2e;
+                color: #f0f0f0;
+                border: 1px solid #3d3d3d;
+                padding: 4px;
+            }
+        """)
@@ -6,6 +6,7 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit,
     QComboBox, QPushButton
 )
+from core import registry
 
 class StrategyEngineDialog(FramelessWindow):
     def __init__(self):
@@ -60,7 +61,7 @@ class StrategyEngineDialog(FramelessWindow):
         # Strategy dropdown
         layout.addWidget(QLabel("Strategy Type"))
         self.strategy_dropdown = QComboBox()
-        self.strategy_dropdown.addItems(["SMA Crossover", "RSI", "Buy & Hold"])
+        self.strategy_dropdown.addItems(registry.strategy_names())
         self.strategy_dropdown.currentTextChanged.connect(self.update_config_fields)
         layout.addWidget(self.strategy_dropdown)
 
@@ -82,7 +83,7 @@ class StrategyEngineDialog(FramelessWindow):
         form.setLayout(layout)
         self.add_body_widget(form)
 
-        self.update_config_fields("SMA Crossover")
+        self.update_config_fields(self.strategy_dropdown.currentText())
 
     def update_config_fields(self, strategy_name):
         # Clear old widgets
@@ -91,36 +92,28 @@ class StrategyEngineDialog(FramelessWindow):
             if child.widget():
                 child.widget().deleteLater()
 
-        # Add new fields depending on strategy
-        if strategy_name == "SMA Crossover":
-            self.short_window = QLineEdit()
-            self.short_window.setPlaceholderText("Short window (e.g. 10)")
-            self.config_section.addWidget(QLabel("Short Window"))
-            self.config_section.addWidget(self.short_window)
+        # Add one field per declared parameter
+        self.param_inputs = {}
+        spec = registry.get_strategy(strategy_name)
+        if spec is None:
+            return
+        for param in spec.params:
+            field = QLineEdit()
+            field.setPlaceholderText(f"{param['label']} (e.g. {param['default']})")
+            self.config_section.addWidget(QLabel(param["label"]))
+            self.config_section.addWidget(field)
+            self.param_inputs[param["name"]] = field
 
-            self.long_window = QLineEdit()
-            self.long_window.setPlaceholderText("Long window (e.g. 30)")
-            self.config_section.addWidget(QLabel("Long Window"))
-            self.config_section.addWidget(self.long_window)
-
-        elif strategy_name == "RSI":
-            self.rsi_period = QLineEdit()
-            self.rsi_period.setPlaceholderText("RSI period (e.g. 14)")
-            self.config_section.addWidget(QLabel("RSI Period"))
-            self.config_section.addWidget(self.rsi_period)
-
-        # Buy & Hold requires no inputs
+        # Strategies without parameters (e.g. Buy & Hold) require no inputs
 
     def get_config(self):
         strategy = self.strategy_dropdown.currentText()
         config = {"strategy": strategy}
 
-        if strategy == "SMA Crossover":
-            config["short_window"] = int(self.short_window.text()) if self.short_window.text().isdigit() else 10
-            config["long_window"] = int(self.long_window.text()) if self.long_window.text().isdigit() else 30
-
-        elif strategy == "RSI":
-            config["rsi_period"] = int(self.rsi_period.text()) if self.rsi_period.text().isdigit() else 14
+        spec = registry.get_strategy(strategy)
+        if spec is not None:
+            raw = {name: field.text().strip() for name, field in self.param_inputs.items()}
+            config.update(spec.coerce_params(raw))
 
         return config
 
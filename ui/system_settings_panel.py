@@ -1,13 +1,31 @@
 # ui/system_settings_panel.py
 
-import os
 import webbrowser
 from ui.frame import FramelessWindow
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QComboBox, QPushButton,
-    QCheckBox, QFileDialog, QMessageBox
+    QCheckBox, QFileDialog, QMessageBox, QSpinBox
 )
-from PyQt5.QtCore import QStandardPaths
+from PyQt5.QtCore import QSettings
+from core import registry
+from core.profiler import default_log_dir
+from data.data_service import DataService
+from data.cache_manager import DEFAULT_MAX_BYTES
+
+
+def settings():
+    return QSettings("Canalytics", "Canalytics")
+
+
+def apply_cache_settings():
+    """Apply the saved cache directory and size cap, and auto-clear if enabled. Call once at launch."""
+    s = settings()
+    DataService.set_cache_dir(s.value("cache/dir", "", type=str) or None)
+    DataService.set_cache_limit(s.value("cache/max_mb", DEFAULT_MAX_BYTES // 2**20, type=int) * 2**20)
+    if s.value("cache/auto_clear", False, type=bool):
+        success, error = DataService.clear_cache()
+        if not success:
+            print(f"Auto-clear of cache failed: {error}")
 
 
 class SystemSettingsDialog(FramelessWindow):
@@ -29,7 +47,7 @@ class SystemSettingsDialog(FramelessWindow):
                 padding-bottom: 4px;
             }
 
-            QComboBox {
+            QComboBox, QSpinBox {
                 background-color: #2e2e2e;
                 color: #f0f0f0;
                 border: 1px solid #5a5a5a;
@@ -75,7 +93,7 @@ class SystemSettingsDialog(FramelessWindow):
         # Default strategy
         layout.addWidget(QLabel("Default Strategy"))
         self.default_strategy = QComboBox()
-        self.default_strategy.addItems(["SMA Crossover", "RSI", "Buy & Hold"])
+        self.default_strategy.addItems(registry.strategy_names())
         layout.addWidget(self.default_strategy)
 
         # Default data source
@@ -86,12 +104,42 @@ class SystemSettingsDialog(FramelessWindow):
 
         # Auto-clear cache on launch
         self.auto_clear_checkbox = QCheckBox("Auto-clear cache on launch")
+        self.auto_clear_checkbox.setChecked(settings().value("cache/auto_clear", False, type=bool))
+        self.auto_clear_checkbox.toggled.connect(lambda on: settings().setValue("cache/auto_clear", on))
         layout.addWidget(self.auto_clear_checkbox)
 
+        # Cache size cap (least recently used entries are evicted past it)
+        layout.addWidget(QLabel("Cache Size Limit (MB)"))
+        self.cache_limit = QSpinBox()
+        self.cache_limit.setRange(16, 1024 * 1024)
+        self.cache_limit.setValue(DataService.get_cache_limit() // 2**20)
+        self.cache_limit.editingFinished.connect(self.set_cache_limit)
+        layout.addWidget(self.cache_limit)
+
+        self.cache_stats_label = QLabel()
+        layout.addWidget(self.cache_stats_label)
+        self.update_cache_stats()
+
+        # Memory budget per run (batches shrink and results spill to disk near it)
+        layout.addWidget(QLabel("Run Memory Budget (MB, 0 = unlimited)"))
+        self.memory_budget = QSpinBox()
+        self.memory_budget.setRange(0, 1024 * 1024)
+        self.memory_budget.setValue(settings().value("memory/budget_mb", 0, type=int))
+        self.memory_budget.editingFinished.connect(
+            lambda: settings().setValue("memory/budget_mb", self.memory_budget.value())
+        )
+        layout.addWidget(self.memory_budget)
+
         # Developer mode
         self.dev_mode_checkbox = QCheckBox("Enable developer mode")
         layout.addWidget(self.dev_mode_checkbox)
 
+        # One-shot profiling: the next Run Backtest writes a profile to the logs folder
+        self.profile_checkbox = QCheckBox("Profile next run")
+        self.profile_checkbox.setChecked(settings().value("profile/next_run", False, type=bool))
+        self.profile_checkbox.toggled.connect(lambda on: settings().setValue("profile/next_run", on))
+        layout.addWidget(self.profile_checkbox)
+
         # Set custom cache dir
         self.set_cache_btn = QPushButton("Set Custom Cache Directory")
         self.set_cache_btn.clicked.connect(self.set_cache_dir)
@@ -119,12 +167,27 @@ class SystemSettingsDialog(FramelessWindow):
     def set_cache_dir(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Cache Directory")
         if directory:
+            DataService.set_cache_dir(directory)
+            settings().setValue("cache/dir", directory)
+            self.update_cache_stats()
             QMessageBox.information(self, "Set Cache", f"Cache path set to:\n{directory}")
 
+    def set_cache_limit(self):
+        DataService.set_cache_limit(self.cache_limit.value() * 2**20)
+        settings().setValue("cache/max_mb", self.cache_limit.value())
+        self.update_cache_stats()
+
+    def update_cache_stats(self):
+        stats = DataService.cache_stats()
+        runs = DataService.run_store_stats()
+        self.cache_stats_label.setText(
+            f"Cache: {stats['entries']} entries, {stats['bytes'] / 2**20:.1f} MB\n"
+            f"Stored runs: {runs['entries']} entries, {runs['bytes'] / 2**20:.1f} MB\n"
+            f"Hit rate: {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)"
+        )
+
     def open_logs(self):
-        log_dir = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        webbrowser.open(f"file://{log_dir}")
+        webbrowser.open(f"file://{default_log_dir()}")
 
     def reset_settings(self):
         self.theme_mode.setCurrentIndex(0)
@@ -132,4 +195,12 @@ class SystemSettingsDialog(FramelessWindow):
         self.default_data_source.setCurrentIndex(0)
         self.auto_clear_checkbox.setChecked(False)
         self.dev_mode_checkbox.setChecked(False)
+        self.profile_checkbox.setChecked(False)
+        self.cache_limit.setValue(DEFAULT_MAX_BYTES // 2**20)
+        self.set_cache_limit()
+        self.memory_budget.setValue(0)
+        settings().remove("memory/budget_mb")
+        DataService.set_cache_dir(None)
+        settings().remove("cache/dir")
+        self.update_cache_stats()
         QMessageBox.information(self, "Preferences Reset", "All preferences have been reset to default.")
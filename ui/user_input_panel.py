@@ -1,17 +1,23 @@
 from ui.frame import FramelessWindow
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit,
-    QDateEdit, QPushButton, QListWidget, QListWidgetItem, QHBoxLayout
+    QDateEdit, QPushButton, QListWidget, QHBoxLayout,
+    QCheckBox, QComboBox, QFileDialog, QMessageBox
 )
 from PyQt5.QtCore import QDate
+from core.portfolio import parse_asset_weights
+from data.universe import parse_tickers, load_universe_file, load_universe, named_universes, validate_universe
 
 
 class UserInputDialog(FramelessWindow):
-    def __init__(self):
+    PREFETCH_LIMIT = 50
+
+    def __init__(self, prefetcher=None):
         super().__init__(title="User Input Panel")
         self.setFixedWidth(400)
 
         self.tickers = []
+        self.prefetcher = prefetcher
 
         self.setStyleSheet("""
             QDialog, QWidget {
@@ -27,7 +33,7 @@ class UserInputDialog(FramelessWindow):
                 padding-bottom: 4px;
             }
 
-            QLineEdit, QDateEdit {
+            QLineEdit, QDateEdit, QComboBox {
                 background-color: #2e2e2e;
                 color: #f0f0f0;
                 border: 1px solid #5a5a5a;
@@ -37,6 +43,12 @@ class UserInputDialog(FramelessWindow):
                 min-height: 28px;
             }
 
+            QCheckBox {
+                color: #f0f0f0;
+                font-size: 13px;
+                padding: 6px;
+            }
+
             QPushButton {
                 background-color: #3d3d3d;
                 color: #f0f0f0;
@@ -69,9 +81,29 @@ class UserInputDialog(FramelessWindow):
         ticker_input_layout.addWidget(add_btn)
         layout.addLayout(ticker_input_layout)
 
+        # Universe import: a named list from universes/ or a .txt/.csv file
+        universe_layout = QHBoxLayout()
+        self.universe_combo = QComboBox()
+        self.universe_combo.addItems(list(named_universes()))
+        universe_layout.addWidget(self.universe_combo)
+        load_universe_btn = QPushButton("Load List")
+        load_universe_btn.clicked.connect(self.load_named_universe)
+        universe_layout.addWidget(load_universe_btn)
+        import_btn = QPushButton("Import File")
+        import_btn.clicked.connect(self.import_universe)
+        universe_layout.addWidget(import_btn)
+        clear_btn = QPushButton("Clear")
+        clear_btn.clicked.connect(self.clear_tickers)
+        universe_layout.addWidget(clear_btn)
+        layout.addLayout(universe_layout)
+
         self.ticker_list = QListWidget()
+        self.ticker_list.setUniformItemSizes(True)
         layout.addWidget(self.ticker_list)
 
+        self.universe_status = QLabel("")
+        layout.addWidget(self.universe_status)
+
         # Start date
         layout.addWidget(QLabel("Start Date"))
         self.start_date = QDateEdit()
@@ -86,6 +118,18 @@ class UserInputDialog(FramelessWindow):
         self.end_date.setDate(QDate.currentDate())
         layout.addWidget(self.end_date)
 
+        # Start loading data as soon as tickers and dates are known
+        self.start_date.dateChanged.connect(self.prefetch)
+        self.end_date.dateChanged.connect(self.prefetch)
+
+        # Bar size; coarser bars are aggregated from finer data already loaded
+        layout.addWidget(QLabel("Timeframe"))
+        self.timeframe = QComboBox()
+        for name, label in [("1d", "Daily"), ("1h", "1 hour"), ("30m", "30 minutes"),
+                            ("15m", "15 minutes"), ("5m", "5 minutes"), ("1m", "1 minute")]:
+            self.timeframe.addItem(label, name)
+        layout.addWidget(self.timeframe)
+
         # Initial capital
         layout.addWidget(QLabel("Initial Capital ($, optional)"))
         self.initial_capital = QLineEdit()
@@ -98,6 +142,44 @@ class UserInputDialog(FramelessWindow):
         self.position_size.setPlaceholderText("e.g. 10")
         layout.addWidget(self.position_size)
 
+        # Shared-capital portfolio mode
+        self.shared_capital = QCheckBox("Share capital across tickers")
+        layout.addWidget(self.shared_capital)
+
+        layout.addWidget(QLabel("Portfolio Sizing"))
+        self.sizing = QComboBox()
+        self.sizing.addItem("Equal weight", "equal")
+        self.sizing.addItem("Fixed % per position", "fixed")
+        layout.addWidget(self.sizing)
+
+        layout.addWidget(QLabel("Portfolio Rebalance"))
+        self.rebalance = QComboBox()
+        self.rebalance.addItem("On signal", "signal")
+        self.rebalance.addItem("Weekly", "W")
+        self.rebalance.addItem("Monthly", "M")
+        layout.addWidget(self.rebalance)
+
+        layout.addWidget(QLabel("Asset Weights (% of equity, optional)"))
+        self.asset_weights = QLineEdit()
+        self.asset_weights.setPlaceholderText("e.g. AAPL=30, MSFT=20 (others follow Portfolio Sizing)")
+        layout.addWidget(self.asset_weights)
+
+        # Exit rules and trading costs
+        self.execution_inputs = {}
+        for key, label, placeholder in [
+            ("stop_loss_pct", "Stop Loss (%, optional)", "e.g. 5"),
+            ("take_profit_pct", "Take Profit (%, optional)", "e.g. 15"),
+            ("trailing_stop_pct", "Trailing Stop (%, optional)", "e.g. 8"),
+            ("max_holding_bars", "Max Holding Period (bars, optional)", "e.g. 20"),
+            ("commission_pct", "Commission (%, optional)", "e.g. 0.1"),
+            ("slippage_pct", "Slippage (%, optional)", "e.g. 0.05"),
+        ]:
+            layout.addWidget(QLabel(label))
+            field = QLineEdit()
+            field.setPlaceholderText(placeholder)
+            layout.addWidget(field)
+            self.execution_inputs[key] = field
+
         # Lock button
         lock_btn = QPushButton("Lock Inputs")
         lock_btn.clicked.connect(self.lock_inputs)
@@ -113,14 +195,63 @@ class UserInputDialog(FramelessWindow):
         self.add_body_widget(form)
 
     def add_ticker(self):
-        text = self.ticker_input.text().strip().upper()
-        if text and text not in self.tickers and len(self.tickers) < 10:
-            self.tickers.append(text)
-            item = QListWidgetItem(text)
-            del_btn = QPushButton("x")
-            del_btn.setMaximumWidth(20)
-            del_btn.clicked.connect(lambda _, t=text: self.remove_ticker(t))
-            self.ticker_list.addItem(item)
+        # Accepts one symbol or a pasted list ("AAPL, MSFT NVDA")
+        self.add_tickers(parse_tickers(self.ticker_input.text()))
+        self.ticker_input.clear()
+
+    def add_tickers(self, tickers):
+        """Add tickers (skipping duplicates and malformed symbols) and report cache coverage."""
+        existing = set(self.tickers)
+        new = [t for t in tickers if t not in existing]
+        report = validate_universe(new)
+        if report["invalid"]:
+            QMessageBox.warning(
+                self, "Invalid Tickers",
+                f"Skipped {len(report['invalid'])} malformed symbols: {', '.join(report['invalid'][:20])}"
+            )
+        if report["valid"]:
+            self.tickers.extend(report["valid"])
+            self.ticker_list.addItems(report["valid"])
+            self.prefetch()
+        self.update_universe_status()
+
+    def load_named_universe(self):
+        name = self.universe_combo.currentText()
+        if not name:
+            return
+        try:
+            self.add_tickers(load_universe(name))
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Universe", f"Could not load {name}: {e}")
+
+    def import_universe(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Universe", "", "Ticker lists (*.txt *.csv);;All Files (*)")
+        if not path:
+            return
+        try:
+            self.add_tickers(load_universe_file(path))
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.warning(self, "Universe", f"Could not read {path}: {e}")
+
+    def clear_tickers(self):
+        self.tickers = []
+        self.ticker_list.clear()
+        self.prefetch()
+        self.update_universe_status()
+
+    def update_universe_status(self):
+        if not self.tickers:
+            self.universe_status.setText("")
+            return
+        report = validate_universe(
+            self.tickers,
+            self.start_date.date().toString("yyyy-MM-dd"),
+            self.end_date.date().toString("yyyy-MM-dd")
+        )
+        self.universe_status.setText(
+            f"{len(self.tickers)} tickers, {len(report['cached'])} already cached, "
+            f"{len(report['uncached'])} to download"
+        )
 
     def remove_ticker(self, ticker):
         if ticker in self.tickers:
@@ -129,16 +260,48 @@ class UserInputDialog(FramelessWindow):
                 if self.ticker_list.item(i).text() == ticker:
                     self.ticker_list.takeItem(i)
                     break
+            self.prefetch()
+            self.update_universe_status()
+
+    def prefetch(self):
+        # Only warm the head of large universes; the run itself loads in batches
+        if self.prefetcher is not None:
+            self.prefetcher.request(
+                self.tickers[:self.PREFETCH_LIMIT],
+                self.start_date.date().toString("yyyy-MM-dd"),
+                self.end_date.date().toString("yyyy-MM-dd")
+            )
 
     def get_config(self):
-        return {
+        config = {
             "tickers": self.tickers,
             "start_date": self.start_date.date().toString("yyyy-MM-dd"),
             "end_date": self.end_date.date().toString("yyyy-MM-dd"),
             "initial_capital": float(self.initial_capital.text()) if self.initial_capital.text().isdigit() else 10000,
             "position_size": float(self.position_size.text()) if self.position_size.text().isdigit() else 10.0,
+            "timeframe": self.timeframe.currentData(),
+            "shared_capital": self.shared_capital.isChecked(),
+            "sizing": self.sizing.currentData(),
+            "rebalance": self.rebalance.currentData(),
         }
+        # Checked by lock_inputs before the dialog is accepted
+        weights = parse_asset_weights(self.asset_weights.text())
+        if weights:
+            config["asset_weights"] = weights
+        for key, field in self.execution_inputs.items():
+            try:
+                value = float(field.text())
+            except ValueError:
+                continue
+            if value > 0:
+                config[key] = int(value) if key == "max_holding_bars" else value
+        return config
 
     def lock_inputs(self):
+        try:
+            parse_asset_weights(self.asset_weights.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Asset Weights", str(e))
+            return
         print("Inputs locked:", self.get_config())
         self.accept()